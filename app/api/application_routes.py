@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.core.auth import get_current_user
+from app.core.mysql_connection import DB_READ_REPLICA, pool_metrics, replica_pool_metrics
 from .product_routes import router as product_router
 from .client_routes import router as client_router
 from .order_routes import router as order_router
@@ -11,4 +13,21 @@ router.include_router(order_router)
 
 @router.get("/health_check")
 async def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@router.get("/db/pool/stats")
+async def get_db_pool_stats(pool: str = Query("primary", description="primary or replica"),
+                            current_user: dict = Depends(get_current_user)):
+    """
+    Get the database connection pool usage, checkout wait histogram and
+    timeout/recycle counters of this process
+    """
+    pools = {"primary": pool_metrics}
+    if DB_READ_REPLICA:
+        pools["replica"] = replica_pool_metrics
+    if pool not in pools:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Pool {pool} is not configured"
+        )
+    return pools[pool].stats()
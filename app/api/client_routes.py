@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.core.mysql_connection import get_db
-from app.service.client_service import ClientService
+from app.core.mysql_connection import get_session, DB_ASYNC
+from app.core.concurrency import run_service
+from app.core.codec import ModelJSONResponse
+from app.core.pagination import PageParams, get_page_params
+from app.service.client_service import ClientService, AsyncClientService
 from app.domain.client_model import ClientResponse, ClientListResponse, ClientCreate, ClientUpdate, ClientTokenResponse
 from app.core.auth import get_current_user
 
@@ -10,14 +13,22 @@ router = APIRouter(
     tags=["clients"]
 )
 
+def _get_service(db):
+    """
+    Build the service matching the configured database mode
+    """
+    return AsyncClientService(db) if DB_ASYNC else ClientService(db)
+
 @router.get("/", response_model=ClientListResponse)
-async def get_all_clients(db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def get_all_clients(page: PageParams = Depends(get_page_params),
+                          db: Session = Depends(get_session),
+                          current_user: dict = Depends(get_current_user)):
     """
-    Get all clients
+    Get a page of clients
     """
     try:
-        service = ClientService(db)
-        return service.get_all_clients()
+        service = _get_service(db)
+        return ModelJSONResponse(await run_service(service.get_all_clients, page.limit, page.after_id))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -25,13 +36,13 @@ async def get_all_clients(db: Session = Depends(get_db), current_user: dict = De
         )
 
 @router.get("/filter", response_model=ClientTokenResponse)
-async def get_client_by_cpf(cpf: str, db: Session = Depends(get_db)):
+async def get_client_by_cpf(cpf: str, db: Session = Depends(get_session)):
     """
     Get a client by CPF and generate JWT token for authentication
     """
     try:
-        service = ClientService(db)
-        return service.get_client_by_cpf(cpf)
+        service = _get_service(db)
+        return await run_service(service.get_client_by_cpf, cpf)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -44,13 +55,13 @@ async def get_client_by_cpf(cpf: str, db: Session = Depends(get_db)):
         )
 
 @router.get("/{client_id}", response_model=ClientResponse)
-async def get_client_by_id(client_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def get_client_by_id(client_id: int, db: Session = Depends(get_session), current_user: dict = Depends(get_current_user)):
     """
     Get a specific client by ID
     """
     try:
-        service = ClientService(db)
-        return service.get_client_by_id(client_id)
+        service = _get_service(db)
+        return ModelJSONResponse(await run_service(service.get_client_by_id, client_id))
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -63,13 +74,13 @@ async def get_client_by_id(client_id: int, db: Session = Depends(get_db), curren
         )
 
 @router.post("/", response_model=ClientResponse, status_code=status.HTTP_201_CREATED)
-async def create_client(client: ClientCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def create_client(client: ClientCreate, db: Session = Depends(get_session), current_user: dict = Depends(get_current_user)):
     """
     Create a new client
     """
     try:
-        service = ClientService(db)
-        return service.create_client(client)
+        service = _get_service(db)
+        return await run_service(service.create_client, client)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -79,14 +90,14 @@ async def create_client(client: ClientCreate, db: Session = Depends(get_db), cur
 @router.put("/{client_id}", response_model=ClientResponse)
 async def update_client(client_id: int, 
                         client: ClientUpdate, 
-                        db: Session = Depends(get_db),
+                        db: Session = Depends(get_session),
                         current_user: dict = Depends(get_current_user)):
     """
     Update an existing client's name
     """
     try:
-        service = ClientService(db)
-        return service.update_client(client_id, client)
+        service = _get_service(db)
+        return await run_service(service.update_client, client_id, client)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.admission import admission_controller
+from app.core.auth import token_cache
+from app.core.instrumentation import registry, cache_collector
+from app.core.metrics import collect_pools
+from app.core.mysql_connection import DB_READ_REPLICA, pool_metrics, replica_pool_metrics
+from app.service.product_service import product_cache
+
+router = APIRouter(tags=["metrics"])
+
+# Values kept outside the registry, read at scrape time
+pools = [pool_metrics, replica_pool_metrics] if DB_READ_REPLICA else [pool_metrics]
+registry.add_collector(lambda: collect_pools(pools))
+registry.add_collector(cache_collector({"product": product_cache, "token": token_cache}))
+registry.add_collector(admission_controller.collect)
+
+# Content type of the Prometheus text exposition format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Serve the process metrics in the Prometheus text exposition format.
+    Unauthenticated, like /api/health_check, so scrapers need no token.
+    """
+    return PlainTextResponse(registry.render(), media_type=METRICS_CONTENT_TYPE)
@@ -1,9 +1,19 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.core.mysql_connection import get_db
-from app.service.order_service import OrderService
-from app.domain.order_model import OrderResponse, OrderListResponse, OrderCreate, OrderStatusUpdate, OrderStatus
+from app.core.mysql_connection import get_session, get_db_session, AsyncSessionLocal, DB_ASYNC
+from app.core.concurrency import run_service
+from app.core.codec import ModelJSONResponse, json_body, json_body_openapi
+from app.core.pagination import PageParams, get_page_params
+from app.service.order_service import OrderService, AsyncOrderService, order_events
+from app.core.broadcaster import Broadcaster
+from app.domain.order_model import OrderResponse, OrderListResponse, OrderCreate, OrderStatusUpdate, OrderStatus, OrderExportFormat, ProductSalesResponse, OrderBatchCreate, OrderBatchResponse
+from app.core.idempotency import (
+    IDEMPOTENCY_KEY_MAX_LENGTH, IDEMPOTENCY_STORE, IdempotencyCoordinator, MemoryIdempotencyStore, request_fingerprint
+)
+from app.repository.idempotency_repository import DatabaseIdempotencyStore
+from app.exceptions import OrderBatchError, OrderStatusConflict, IdempotencyKeyInProgress, IdempotencyKeyReused
 from app.core.auth import get_current_user
 
 router = APIRouter(
@@ -11,20 +21,126 @@ router = APIRouter(
     tags=["orders"]
 )
 
+def _get_service(db):
+    """
+    Build the service matching the configured database mode
+    """
+    return AsyncOrderService(db) if DB_ASYNC else OrderService(db)
+
+# Replays POST /orders/ retries sent with the same Idempotency-Key
+order_idempotency = IdempotencyCoordinator(
+    DatabaseIdempotencyStore() if IDEMPOTENCY_STORE == "database" else MemoryIdempotencyStore()
+)
+
 @router.get("/", response_model=OrderListResponse)
 async def get_orders(
     status: Optional[OrderStatus] = Query(None, description="Filter orders by status"),
-    db: Session = Depends(get_db),
+    include_products: bool = Query(True, description="Include the products of each order; false returns products as null"),
+    page: PageParams = Depends(get_page_params),
+    db: Session = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Get all orders or filter by status if provided
+    Get a page of orders, filtered by status if provided
     """
     try:
-        service = OrderService(db)
+        service = _get_service(db)
         if status:
-            return service.get_orders_by_status(status)
-        return service.get_all_orders()
+            return ModelJSONResponse(await run_service(service.get_orders_by_status, status, page.limit, page.after_id, include_products))
+        return ModelJSONResponse(await run_service(service.get_all_orders, page.limit, page.after_id, include_products))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+def _export_chunks(export_format: OrderExportFormat):
+    """
+    Stream the export with its own session: dependencies with yield are
+    closed before a StreamingResponse starts sending the body
+    """
+    with get_db_session() as db:
+        yield from OrderService(db).export_orders(export_format)
+
+async def _export_chunks_async(export_format: OrderExportFormat):
+    """
+    Async counterpart of _export_chunks for DB_ASYNC=true
+    """
+    async with AsyncSessionLocal() as db:
+        async for chunk in AsyncOrderService(db).export_orders(export_format):
+            yield chunk
+
+@router.get("/export")
+async def export_orders(
+    export_format: OrderExportFormat = Query(OrderExportFormat.NDJSON, alias="format", description="Export format"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Export the full order history as NDJSON or CSV, streamed in constant memory
+    """
+    chunks = _export_chunks_async(export_format) if DB_ASYNC else _export_chunks(export_format)
+    media_type = "text/csv" if export_format == OrderExportFormat.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders.{export_format.value}"'}
+    )
+
+# Seconds between keep-alive comments on idle event streams
+EVENTS_KEEPALIVE_SECONDS = 15
+
+async def order_event_stream(broadcaster: Broadcaster, order_id: Optional[int] = None,
+                             keepalive: float = EVENTS_KEEPALIVE_SECONDS):
+    """
+    Subscribe to the broadcaster and encode its events as Server-Sent Events,
+    optionally for a single order
+    """
+    with broadcaster.subscribe() as subscription:
+        yield "retry: 3000\n\n"
+        while True:
+            event = await subscription.get(timeout=keepalive)
+            if event is None:
+                yield ": keepalive\n\n"
+            elif order_id is None or event.data.get("id") == order_id:
+                yield event.sse
+
+@router.get("/events")
+async def subscribe_order_events(
+    order_id: Optional[int] = Query(None, description="Only receive events for this order"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Push order creations and status changes as Server-Sent Events
+    """
+    return StreamingResponse(
+        order_event_stream(order_events, order_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/reports/product-sales", response_model=ProductSalesResponse)
+async def get_product_sales(db: Session = Depends(get_session), current_user: dict = Depends(get_current_user)):
+    """
+    Get the quantity and revenue sold per product, aggregated in SQL over order_items
+    """
+    try:
+        service = _get_service(db)
+        return await run_service(service.get_product_sales)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.get("/kitchen", response_model=OrderListResponse)
+async def get_kitchen_queue(db: Session = Depends(get_session), current_user: dict = Depends(get_current_user)):
+    """
+    Get the kitchen board: active orders ordered by status priority
+    (Pronto, Em preparação, Recebido) and then by age, served from memory
+    """
+    try:
+        service = _get_service(db)
+        return ModelJSONResponse(await run_service(service.get_kitchen_queue))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -32,13 +148,13 @@ async def get_orders(
         )
 
 @router.get("/{order_id}", response_model=OrderResponse)
-async def get_order_by_id(order_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def get_order_by_id(order_id: int, db: Session = Depends(get_session), current_user: dict = Depends(get_current_user)):
     """
     Get a specific order by ID
     """
     try:
-        service = OrderService(db)
-        return service.get_order_by_id(order_id)
+        service = _get_service(db)
+        return ModelJSONResponse(await run_service(service.get_order_by_id, order_id))
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -50,14 +166,58 @@ async def get_order_by_id(order_id: int, db: Session = Depends(get_db), current_
             detail=str(e)
         )
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-async def create_order(order: OrderCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED,
+             openapi_extra=json_body_openapi(OrderCreate))
+async def create_order(order: OrderCreate = Depends(json_body(OrderCreate)),
+                       idempotency_key: Optional[str] = Header(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH,
+                                                               description="Retries with the same key return the first response"),
+                       db: Session = Depends(get_session), current_user: dict = Depends(get_current_user)):
+    """
+    Create a new order. With an Idempotency-Key header, retries replay the
+    first response (marked Idempotent-Replayed) instead of inserting again.
+    """
+    async def create() -> ModelJSONResponse:
+        service = _get_service(db)
+        created = await run_service(service.create_order, order)
+        return ModelJSONResponse(created, status_code=status.HTTP_201_CREATED)
+    
+    try:
+        if idempotency_key is None:
+            return await create()
+        # Keys are scoped to the caller, so two totems cannot collide
+        key = f"{current_user.get('sub')}:{idempotency_key}"
+        return await order_idempotency.run(key, request_fingerprint(order.model_dump_json()), create)
+    except IdempotencyKeyReused as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except IdempotencyKeyInProgress as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/batch", response_model=OrderBatchResponse, openapi_extra=json_body_openapi(OrderBatchCreate))
+async def create_orders_batch(batch: OrderBatchCreate = Depends(json_body(OrderBatchCreate)), db: Session = Depends(get_session), current_user: dict = Depends(get_current_user)):
     """
-    Create a new order
+    Create several orders in a single transaction, reporting the generated ID
+    or the validation error of each item. Set atomic to reject the whole batch
+    when any item is invalid.
     """
     try:
-        service = OrderService(db)
-        return service.create_order(order)
+        service = _get_service(db)
+        return await run_service(service.create_orders_batch, batch)
+    except OrderBatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[result.model_dump() for result in e.results]
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -65,13 +225,20 @@ async def create_order(order: OrderCreate, db: Session = Depends(get_db), curren
         )
 
 @router.patch("/{order_id}/status", response_model=OrderResponse)
-async def update_order_status(order_id: int, status_update: OrderStatusUpdate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def update_order_status(order_id: int, status_update: OrderStatusUpdate, db: Session = Depends(get_session), current_user: dict = Depends(get_current_user)):
     """
-    Update an order's status
+    Update an order's status. Orders only move forward (Recebido, Em
+    preparação, Pronto, Finalizado); a change the current status does not
+    allow, or a stale version, is answered with 409.
     """
     try:
-        service = OrderService(db)
-        return service.update_order_status(order_id, status_update)
+        service = _get_service(db)
+        return await run_service(service.update_order_status, order_id, status_update)
+    except OrderStatusConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
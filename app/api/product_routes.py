@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response, File, Query, UploadFile
 from sqlalchemy.orm import Session
-from app.core.mysql_connection import get_db
-from app.service.product_service import ProductService
-from app.domain.product_model import ProductResponse, ProductListResponse, ProductCreate
+from app.core.mysql_connection import get_session, DB_ASYNC
+from app.core.concurrency import run_service
+from app.core.pagination import PageParams, get_page_params
+from app.core.etag import etag_matches
+from app.core.codec import ModelJSONResponse
+from app.service.product_service import ProductService, AsyncProductService, product_cache
+from app.domain.product_model import ProductResponse, ProductListResponse, ProductCreate, ProductImportFormat, ProductImportResponse
+from app.exceptions import ProductImportAborted
 from app.core.auth import get_current_user
 
 router = APIRouter(
@@ -10,28 +16,59 @@ router = APIRouter(
     tags=["products"]
 )
 
+def _get_service(db):
+    """
+    Build the service matching the configured database mode
+    """
+    return AsyncProductService(db) if DB_ASYNC else ProductService(db)
+
+def _conditional_response(content, etag: str, if_none_match: Optional[str]) -> Response:
+    """
+    Return a 304 response when the client already has this version, or the
+    content tagged with its ETag otherwise
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return ModelJSONResponse(content, headers=headers)
+
 @router.get("/", response_model=ProductListResponse)
-async def get_all_products(db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def get_all_products(page: PageParams = Depends(get_page_params),
+                           if_none_match: Optional[str] = Header(None),
+                           db: Session = Depends(get_session),
+                           current_user: dict = Depends(get_current_user)):
     """
-    Get all products
+    Get a page of products, answering 304 when If-None-Match matches its ETag
     """
     try:
-        service = ProductService(db)
-        return service.get_all_products()
+        service = _get_service(db)
+        products, etag = await run_service(service.get_all_products_with_etag, page.limit, page.after_id)
+        return _conditional_response(products, etag, if_none_match)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
+@router.get("/cache/stats")
+async def get_product_cache_stats(current_user: dict = Depends(get_current_user)):
+    """
+    Get the product catalog cache size and hit/miss/eviction counters
+    """
+    return product_cache.stats()
+
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product_by_id(product_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def get_product_by_id(product_id: int,
+                            if_none_match: Optional[str] = Header(None),
+                            db: Session = Depends(get_session),
+                            current_user: dict = Depends(get_current_user)):
     """
-    Get a specific product by ID
+    Get a specific product by ID, answering 304 when If-None-Match matches its ETag
     """
     try:
-        service = ProductService(db)
-        return service.get_product_by_id(product_id)
+        service = _get_service(db)
+        product, etag = await run_service(service.get_product_by_id_with_etag, product_id)
+        return _conditional_response(product, etag, if_none_match)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -44,13 +81,38 @@ async def get_product_by_id(product_id: int, db: Session = Depends(get_db), curr
         )
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
-async def create_product(product: ProductCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def create_product(product: ProductCreate, db: Session = Depends(get_session), current_user: dict = Depends(get_current_user)):
     """
     Create a new product
     """
     try:
-        service = ProductService(db)
-        return service.create_product(product)
+        service = _get_service(db)
+        return await run_service(service.create_product, product)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/import", response_model=ProductImportResponse)
+async def import_products(file: UploadFile = File(...),
+                          import_format: ProductImportFormat = Query(ProductImportFormat.CSV, alias="format", description="File format"),
+                          db: Session = Depends(get_session),
+                          current_user: dict = Depends(get_current_user)):
+    """
+    Create or update products from an uploaded CSV or NDJSON file. Rows with
+    an id update that product; invalid rows are reported by line number.
+    When a chunk fails to write, the 500 detail counts the rows already
+    imported.
+    """
+    try:
+        service = _get_service(db)
+        return await run_service(service.import_products, file.file, import_format)
+    except ProductImportAborted as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"message": str(e), **e.summary.model_dump()}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -58,13 +120,13 @@ async def create_product(product: ProductCreate, db: Session = Depends(get_db),
         )
 
 @router.put("/{product_id}", response_model=ProductResponse)
-async def update_product(product_id: int, product: ProductCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def update_product(product_id: int, product: ProductCreate, db: Session = Depends(get_session), current_user: dict = Depends(get_current_user)):
     """
     Update an existing product
     """
     try:
-        service = ProductService(db)
-        return service.update_product(product_id, product)
+        service = _get_service(db)
+        return await run_service(service.update_product, product_id, product)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
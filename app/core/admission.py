@@ -0,0 +1,233 @@
+import asyncio
+import itertools
+import json
+import os
+import re
+import time
+from enum import IntEnum
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.instrumentation import registry
+from app.core.metrics import Counter, HistogramVec, POOL_WAIT_BUCKETS, render_family
+from app.core.mysql_connection import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+# Load environment variables
+load_dotenv()
+
+# Requests handled at once by this process (0 disables admission control).
+# Defaults to the connections the pool can open, so requests queue here with
+# a short bound instead of in the pool for DB_POOL_TIMEOUT.
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+# Requests waiting for a slot; beyond that the lowest priority is shed
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "30"))
+# Seconds a request waits for a slot before it is shed
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+# Slots only kitchen status updates may take, so the kitchen keeps moving
+# while totems and reports saturate the rest
+ADMISSION_PRIORITY_RESERVE = int(os.getenv("ADMISSION_PRIORITY_RESERVE", "2"))
+# Retry-After of a shed request, in seconds
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+class Priority(IntEnum):
+    """
+    Admission priority of a request, lower values are served first
+    """
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+# (method, path pattern, priority), first match wins. Anything else is NORMAL.
+PRIORITY_RULES: List[Tuple[str, "re.Pattern[str]", Priority]] = [
+    ("PATCH", re.compile(r"^/api/orders/\d+/status$"), Priority.HIGH),
+    ("GET", re.compile(r"^/api/orders/kitchen$"), Priority.HIGH),
+    ("GET", re.compile(r"^/api/orders/?$"), Priority.LOW),
+    ("GET", re.compile(r"^/api/orders/export$"), Priority.LOW),
+    ("GET", re.compile(r"^/api/orders/reports/"), Priority.LOW),
+    ("GET", re.compile(r"^/api/clients/?$"), Priority.LOW),
+    ("POST", re.compile(r"^/api/products/import$"), Priority.LOW),
+]
+
+# Paths never queued or shed: probes, scrapes, docs and the long-lived event
+# stream, none of which holds a database connection
+EXEMPT_PATHS = re.compile(r"^/(api/health_check|metrics|docs|redoc|openapi\.json|api/orders/events)/?$")
+
+ADMISSION_REJECTED = registry.register(Counter(
+    "admission_rejected", "Requests shed with 503 by admission control", ("priority", "reason")
+))
+ADMISSION_QUEUE_WAIT = registry.register(HistogramVec(
+    "admission_queue_wait_seconds", "Time admitted requests waited for a slot", ("priority",),
+    buckets=POOL_WAIT_BUCKETS
+))
+
+def request_priority(method: str, path: str) -> Optional[Priority]:
+    """
+    Return the admission priority of a request, or None when it is exempt
+    """
+    if EXEMPT_PATHS.match(path):
+        return None
+    for rule_method, pattern, priority in PRIORITY_RULES:
+        if method == rule_method and pattern.match(path):
+            return priority
+    return Priority.NORMAL
+
+class _Waiter:
+    __slots__ = ("priority", "sequence", "future")
+    
+    def __init__(self, priority: Priority, sequence: int, future: "asyncio.Future[bool]"):
+        self.priority = priority
+        self.sequence = sequence
+        self.future = future
+    
+    @property
+    def rank(self) -> Tuple[int, int]:
+        return (self.priority, self.sequence)
+
+class AdmissionController:
+    """
+    Concurrency limit with a short bounded wait queue ordered by priority.
+    
+    Up to max_in_flight requests run at once, the last priority_reserve slots
+    only for HIGH requests. Others wait in priority order, then arrival
+    order, for at most queue_timeout. When the queue is full a newcomer
+    takes the place of the newest waiter of a lower priority, or is shed.
+    acquire() returns whether the request got a slot; release() must follow
+    every successful acquire. State belongs to the event loop of the worker.
+    """
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float, priority_reserve: int = 0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.priority_reserve = min(max(priority_reserve, 0), max(max_in_flight - 1, 0))
+        self.in_flight = 0
+        self._waiters: List[_Waiter] = []
+        self._sequence = itertools.count()
+    
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+    
+    def limit(self, priority: Priority) -> int:
+        return self.max_in_flight if priority == Priority.HIGH else self.max_in_flight - self.priority_reserve
+    
+    def _can_run(self, priority: Priority) -> bool:
+        return self.in_flight < self.limit(priority)
+    
+    async def acquire(self, priority: Priority) -> bool:
+        # Waiters of the same or a higher priority go first
+        if self._can_run(priority) and not any(w.priority <= priority for w in self._waiters):
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            worst = max(self._waiters, key=lambda w: w.rank, default=None)
+            if worst is None or worst.priority <= priority:
+                ADMISSION_REJECTED.inc(priority.name.lower(), "queue_full")
+                return False
+            self._waiters.remove(worst)
+            ADMISSION_REJECTED.inc(worst.priority.name.lower(), "evicted")
+            worst.future.set_result(False)
+        
+        waiter = _Waiter(priority, next(self._sequence), asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            admitted = await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.future.done() and waiter.future.result():
+                # Granted as the timeout fired: take the slot anyway
+                admitted = True
+            else:
+                self._discard(waiter)
+                ADMISSION_REJECTED.inc(priority.name.lower(), "timeout")
+                return False
+        except asyncio.CancelledError:
+            if waiter.future.done() and waiter.future.result():
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        if admitted:
+            ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - start, priority.name.lower())
+        return admitted
+    
+    def _discard(self, waiter: _Waiter) -> None:
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+        if not waiter.future.done():
+            waiter.future.cancel()
+    
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+    
+    def _wake(self) -> None:
+        # Hand free slots to the waiters in priority order; a NORMAL or LOW
+        # waiter at the head does not block a HIGH one behind the reserve
+        for waiter in sorted(self._waiters, key=lambda w: w.rank):
+            if self.in_flight >= self.max_in_flight:
+                return
+            if not self._can_run(waiter.priority):
+                continue
+            self._waiters.remove(waiter)
+            self.in_flight += 1
+            waiter.future.set_result(True)
+    
+    def collect(self) -> List[str]:
+        """
+        Collector exposing the slots in use and the queue length
+        """
+        lines = render_family("admission_in_flight", "gauge", "Requests holding an admission slot",
+                              [("", {}, self.in_flight)])
+        lines.extend(render_family("admission_queued", "gauge", "Requests waiting for an admission slot",
+                                   [("", {}, self.queued)]))
+        lines.extend(render_family("admission_max_in_flight", "gauge", "Admission slots of this process",
+                                   [("", {}, self.max_in_flight)]))
+        return lines
+
+admission_controller = AdmissionController(
+    ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT, ADMISSION_PRIORITY_RESERVE
+)
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware shedding load before it reaches the connection pool.
+    Requests over the limit wait briefly in the admission queue and are
+    otherwise answered right away with 503 and Retry-After, so an overloaded
+    pod fails fast and predictably (reports first, kitchen updates last)
+    instead of timing out every request after DB_POOL_TIMEOUT.
+    """
+    def __init__(self, app: ASGIApp, controller: Optional[AdmissionController] = None,
+                 retry_after: int = ADMISSION_RETRY_AFTER):
+        self.app = app
+        self.controller = controller or admission_controller
+        self.retry_after = retry_after
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.controller.max_in_flight <= 0:
+            await self.app(scope, receive, send)
+            return
+        priority = request_priority(scope["method"], scope["path"])
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+        
+        if not await self.controller.acquire(priority):
+            await self.reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+    
+    async def reject(self, send: Send) -> None:
+        body = json.dumps({"detail": "Service overloaded, retry later"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(self.retry_after).encode("latin-1"))
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,11 +1,48 @@
+import hashlib
+import os
+import time
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from dotenv import load_dotenv
+from app.core.cache import TTLCache
 from app.core.jwt import verify_access_token
 
+# Load environment variables
+load_dotenv()
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+# Payloads of tokens that already passed signature verification. Each entry
+# expires at the token's own "exp"; TOKEN_CACHE_TTL only applies to tokens
+# without one.
+token_cache = TTLCache(
+    maxsize=int(os.getenv("TOKEN_CACHE_MAXSIZE", "4096")),
+    ttl=float(os.getenv("TOKEN_CACHE_TTL", "300"))
+)
+
+def verify_access_token_cached(token: str) -> Optional[dict]:
+    """
+    Verify a token, skipping the JWT decode when it was verified before.
+    Tampered or expired tokens are never cached and keep failing.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
+    
     payload = verify_access_token(token)
+    if payload is None:
+        return None
+    
+    expires_at = payload.get("exp")
+    ttl = expires_at - time.time() if isinstance(expires_at, (int, float)) else None
+    if ttl is None or ttl > 0:
+        token_cache.set(key, dict(payload), ttl=ttl)
+    return payload
+
+def get_current_user(token: str = Depends(oauth2_scheme)):
+    payload = verify_access_token_cached(token)
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -20,4 +57,4 @@ def get_admin_user(current_user: dict = Depends(get_current_user)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Acesso não permitido"
         )
-    return current_user
\ No newline at end of file
+    return current_user
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Dict, Optional, Set
+
+@dataclass(eq=False)
+class Event:
+    """
+    Message fanned out to subscribers. The Server-Sent Events encoding is
+    computed once per event and shared by every subscriber.
+    """
+    name: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    
+    @cached_property
+    def sse(self) -> str:
+        return f"event: {self.name}\ndata: {json.dumps(self.data, ensure_ascii=False)}\n\n"
+
+class Subscription:
+    """
+    Bounded queue of events for one client. When the client falls behind the
+    oldest events are dropped, so a slow screen never grows memory unbounded.
+    """
+    def __init__(self, broadcaster: "Broadcaster", queue_size: int):
+        self._broadcaster = broadcaster
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+    
+    def put(self, event: Event) -> None:
+        """
+        Enqueue an event; must run on the subscriber's event loop
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+    
+    async def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """
+        Wait for the next event, returning None when the timeout expires
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+    
+    def close(self) -> None:
+        self._broadcaster.unsubscribe(self)
+    
+    def __enter__(self) -> "Subscription":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+class Broadcaster:
+    """
+    Fan out events to asyncio subscribers.
+
+    publish() is thread-safe: it can be called from the event loop (async
+    services) or from threadpool workers (sync services).
+    """
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+    
+    def subscribe(self) -> Subscription:
+        """
+        Register a new subscriber; must be called from a running event loop
+        """
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+    
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+    
+    def publish(self, event: Event) -> None:
+        """
+        Deliver an event to every subscriber without blocking the caller
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        
+        for subscription in subscribers:
+            if subscription.loop is current_loop:
+                subscription.put(event)
+            else:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.put, event)
+                except RuntimeError:
+                    # The subscriber's loop is already closed
+                    self.unsubscribe(subscription)
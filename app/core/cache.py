@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries expire after a TTL.
+
+    All operations take a lock and never await, so the same instance can be
+    shared by threadpool workers and by coroutines on the event loop.
+    
+    generation changes on every clear(). A reader filling the cache after a
+    miss passes the generation it saw before querying to set(), so a value
+    read before a concurrent invalidation is not stored after it.
+    """
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.generation = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value, or default when it is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            generation: Optional[int] = None) -> bool:
+        """
+        Store a value, evicting the least recently used entry when full.
+        ttl overrides the cache default for this entry. With generation, the
+        value is dropped when the cache was cleared since that generation.
+        Return whether the value was stored.
+        """
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+    
+    def delete(self, key: Hashable) -> None:
+        """
+        Remove a single entry if present
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """
+        Remove every entry, keeping the counters
+        """
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the size and the hit/miss/eviction counters
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
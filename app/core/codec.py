@@ -0,0 +1,77 @@
+from typing import Any, Awaitable, Callable, Dict, Type, TypeVar
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import BaseModel, ValidationError
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Response class for endpoints returning plain data: orjson when it is
+# installed, the standard library encoder otherwise
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+class ModelJSONResponse(Response):
+    """
+    JSON response rendered straight from a Pydantic model by pydantic-core.
+    Returning it skips FastAPI's response_model re-validation and the
+    jsonable_encoder pass; keep response_model on the route for the docs.
+    """
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return super().render(content)
+
+def from_row(model: Type[ModelT], row: Any) -> ModelT:
+    """
+    Build a response model from a database row without validating it again.
+    Only for rows read from our own schema, whose types already match.
+    Fields the row does not carry (columns left out of the query) keep their
+    defaults.
+    """
+    return model.model_construct(**{
+        name: getattr(row, name) for name in model.model_fields if hasattr(row, name)
+    })
+
+def json_body(model: Type[ModelT]) -> Callable[[Request], Awaitable[ModelT]]:
+    """
+    Dependency decoding and validating a JSON body in a single pydantic-core
+    pass, instead of json.loads followed by validation of the Python objects.
+    Errors are reported like FastAPI's own body validation (422).
+    """
+    async def dependency(request: Request) -> ModelT:
+        body = await request.body()
+        try:
+            return model.model_validate_json(body)
+        except ValidationError as e:
+            errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            raise RequestValidationError(errors, body=body)
+    return dependency
+
+def _inline_refs(schema: Any, definitions: Dict[str, Any]) -> Any:
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            return _inline_refs(definitions[schema["$ref"].rsplit("/", 1)[-1]], definitions)
+        return {key: _inline_refs(value, definitions) for key, value in schema.items()}
+    if isinstance(schema, list):
+        return [_inline_refs(item, definitions) for item in schema]
+    return schema
+
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    openapi_extra documenting the body of a route that reads it with json_body
+    """
+    schema = model.model_json_schema()
+    definitions = schema.pop("$defs", {})
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": _inline_refs(schema, definitions)}}
+        }
+    }
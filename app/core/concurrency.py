@@ -0,0 +1,15 @@
+import inspect
+from typing import Any, Callable
+from starlette.concurrency import run_in_threadpool
+
+async def run_service(method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Call a service method without blocking the event loop.
+
+    Async services (DB_ASYNC=true) are awaited directly. Synchronous services
+    run the blocking PyMySQL round trips in the threadpool, so a slow query on
+    one request does not freeze every other request on the worker.
+    """
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    return await run_in_threadpool(method, *args, **kwargs)
@@ -0,0 +1,27 @@
+import hashlib
+from typing import Optional
+from pydantic import BaseModel
+
+def compute_etag(model: BaseModel) -> str:
+    """
+    Build a weak ETag from the JSON representation of a response model.
+
+    The value depends only on the content, so every replica answers with the
+    same ETag for the same catalog state.
+    """
+    digest = hashlib.sha256(model.model_dump_json().encode()).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag using weak comparison.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque_tag
+        for candidate in if_none_match.split(",")
+    )
@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+from dotenv import load_dotenv
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from app.core.cache import TTLCache
+from app.exceptions import IdempotencyKeyInProgress, IdempotencyKeyReused
+
+# Load environment variables
+load_dotenv()
+
+# Where completed responses are kept: "memory" (per process) or "database"
+# (shared by every replica, see app.repository.idempotency_repository)
+IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE", "memory").lower()
+# Seconds a stored response can be replayed
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+# Responses kept by the in-memory store
+IDEMPOTENCY_MAXSIZE = int(os.getenv("IDEMPOTENCY_MAXSIZE", "10000"))
+# Seconds a duplicate waits for the in-flight request before answering 409
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "10"))
+# Seconds a replica holds a key in the database store before another one may
+# take it over (only matters when the holder died mid-request)
+IDEMPOTENCY_LEASE = float(os.getenv("IDEMPOTENCY_LEASE", "60"))
+
+# Longest Idempotency-Key accepted
+IDEMPOTENCY_KEY_MAX_LENGTH = 200
+
+# Header marking a response replayed from the store
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    body: bytes
+
+def request_fingerprint(payload: str) -> str:
+    """
+    Hash of the canonical request body, to detect a key reused for another request
+    """
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class MemoryIdempotencyStore:
+    """
+    Completed responses in a bounded TTL cache of this process. Requests in
+    flight are tracked by the coordinator, so reserve always succeeds.
+    """
+    blocking = False
+    
+    def __init__(self, maxsize: int = IDEMPOTENCY_MAXSIZE, ttl: float = IDEMPOTENCY_TTL):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    def get(self, key: str) -> Optional[StoredResponse]:
+        return self.cache.get(key)
+    
+    def reserve(self, key: str, fingerprint: str) -> bool:
+        return True
+    
+    def complete(self, key: str, response: StoredResponse) -> None:
+        self.cache.set(key, response)
+    
+    def release(self, key: str) -> None:
+        pass
+
+class IdempotencyCoordinator:
+    """
+    Run a handler once per idempotency key and replay its response to retries.
+    
+    Duplicates arriving while the first request is running wait for it in
+    this process; with the database store, duplicates on other replicas wait
+    for its row to be completed. Only responses below 500 are stored, so a
+    failed attempt can be retried with the same key.
+    """
+    def __init__(self, store, wait_timeout: float = IDEMPOTENCY_WAIT_TIMEOUT, poll_interval: float = 0.1):
+        self.store = store
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Event] = {}
+    
+    async def _call(self, method, *args):
+        if self.store.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+    
+    def _replay(self, key: str, fingerprint: str, stored: StoredResponse) -> Response:
+        if stored.fingerprint != fingerprint:
+            raise IdempotencyKeyReused(key)
+        return Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={REPLAYED_HEADER: "true"}
+        )
+    
+    async def run(self, key: str, fingerprint: str, handler: Callable[[], Awaitable[Response]]) -> Response:
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            stored = await self._call(self.store.get, key)
+            if stored is not None:
+                return self._replay(key, fingerprint, stored)
+            
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                # Same process: wait for the first request, then look again
+                try:
+                    await asyncio.wait_for(inflight.wait(), max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    raise IdempotencyKeyInProgress(key)
+                continue
+            
+            event = self._inflight[key] = asyncio.Event()
+            try:
+                if not await self._call(self.store.reserve, key, fingerprint):
+                    # Another replica holds the key: poll until it completes
+                    if time.monotonic() >= deadline:
+                        raise IdempotencyKeyInProgress(key)
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                return await self._execute(key, fingerprint, handler)
+            finally:
+                del self._inflight[key]
+                event.set()
+    
+    async def _execute(self, key: str, fingerprint: str, handler: Callable[[], Awaitable[Response]]) -> Response:
+        try:
+            response = await handler()
+        except BaseException:
+            await self._call(self.store.release, key)
+            raise
+        if response.status_code >= 500:
+            await self._call(self.store.release, key)
+            return response
+        await self._call(self.store.complete, key, StoredResponse(fingerprint, response.status_code, bytes(response.body)))
+        return response
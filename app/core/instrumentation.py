@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.cache import TTLCache
+from app.core.metrics import Counter, Gauge, HistogramVec, MetricsRegistry, render_family
+
+# Load environment variables
+load_dotenv()
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+# Add X-DB-Query-* headers with the per-request query accounting (debug only:
+# they reveal SQL to the client)
+DB_QUERY_HEADERS = os.getenv("DB_QUERY_HEADERS", "false").lower() == "true"
+
+# Statements slower than this are logged with their route (0 disables the log)
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "500"))
+
+# Longest statement text kept in headers and log records
+STATEMENT_PREVIEW_LENGTH = 500
+
+# Metrics served by GET /metrics
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests", "HTTP requests handled", ("method", "route", "status")
+))
+HTTP_REQUEST_DURATION = registry.register(HistogramVec(
+    "http_request_duration_seconds", "HTTP request latency until the response is sent", ("method", "route")
+))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being handled", ("method",)
+))
+DB_QUERY_DURATION = registry.register(HistogramVec(
+    "db_query_duration_seconds", "Database statement execution time", ("operation",)
+))
+
+# Route label of requests that matched no route, so 404 scans do not create
+# one series per path
+UNMATCHED_ROUTE = "unmatched"
+
+def route_label(scope: Scope) -> str:
+    """
+    Return the path template of the route that handled the request
+    """
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+def statement_preview(statement: str) -> str:
+    """
+    Collapse a statement to a single line of bounded length
+    """
+    return " ".join(statement.split())[:STATEMENT_PREVIEW_LENGTH]
+
+class QueryStats:
+    """
+    Statements run on behalf of one request (or one count_queries block):
+    how many, the total time and the slowest one.
+    """
+    def __init__(self, scope: Optional[Scope] = None):
+        self.scope = scope
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: List[str] = []
+    
+    @property
+    def route(self) -> str:
+        return route_label(self.scope) if self.scope is not None else "-"
+    
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        self.statements.append(statement)
+        if duration >= self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+    
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-DB-Query-Count": str(self.count),
+            "X-DB-Query-Time-Ms": f"{self.total_time * 1000:.2f}"
+        }
+        if self.slowest_statement is not None:
+            headers["X-DB-Slowest-Query"] = (
+                f"{self.slowest_time * 1000:.2f}ms {statement_preview(self.slowest_statement)}"
+            )
+        return headers
+
+# Accounting of the request being handled. Starlette's threadpool copies the
+# context and the async driver's greenlets share it, so the statements of
+# sync and async services both land on the request's QueryStats.
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """
+    Account the statements run inside the block on a fresh QueryStats.
+    Usage:
+        with count_queries() as stats:
+            service.get_order_by_id(1)
+        assert stats.count == 1
+    """
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests per method, route template and status,
+    and timing them until the response body is sent. Plain ASGI instead of
+    BaseHTTPMiddleware, so streaming responses are passed through untouched.
+    
+    It also opens the per-request query accounting. With DB_QUERY_HEADERS the
+    totals are added to the response headers; for streaming responses they
+    only cover the statements run before the body starts.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        status_code = 500
+        stats = QueryStats(scope)
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if DB_QUERY_HEADERS:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in stats.headers().items():
+                        headers[name] = value
+            await send(message)
+        
+        HTTP_REQUESTS_IN_FLIGHT.inc(method)
+        token = current_query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+            route = route_label(scope)
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method, route)
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+            HTTP_REQUESTS_IN_FLIGHT.dec(method)
+
+def statement_operation(statement: str) -> str:
+    """
+    Return the SQL verb of a statement (select, insert, ...) as a label
+    """
+    verb = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    return verb if verb in ("select", "insert", "update", "delete", "replace") else "other"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def log_slow_query(statement: str, duration: float, stats: Optional[QueryStats]) -> None:
+    """
+    Write one JSON record for a statement over DB_SLOW_QUERY_MS. Parameters
+    are left out: they carry client data such as CPFs.
+    """
+    slow_query_logger.warning(json.dumps({
+        "event": "slow_query",
+        "duration_ms": round(duration * 1000, 2),
+        "threshold_ms": DB_SLOW_QUERY_MS,
+        "method": stats.scope["method"] if stats is not None and stats.scope is not None else None,
+        "route": stats.route if stats is not None else "-",
+        "statement": statement_preview(statement)
+    }))
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    DB_QUERY_DURATION.observe(duration, statement_operation(statement))
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    if DB_SLOW_QUERY_MS > 0 and duration * 1000 >= DB_SLOW_QUERY_MS:
+        log_slow_query(statement, duration, stats)
+
+def instrument_queries(engine: Engine) -> None:
+    """
+    Time every statement run by the engine (the sync_engine of an async
+    engine) into the db_query_duration_seconds histogram, the accounting of
+    the current request and the slow-query log
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def cache_collector(caches: Dict[str, TTLCache]):
+    """
+    Collector exposing the size and counters of named TTL caches
+    """
+    def collect() -> List[str]:
+        stats: Dict[str, Any] = {name: cache.stats() for name, cache in caches.items()}
+        lines = render_family("cache_entries", "gauge", "Entries held by the cache",
+                              [("", {"cache": name}, stat["size"]) for name, stat in stats.items()])
+        for counter, help_text in (("hits", "Cache lookups answered from the cache"),
+                                   ("misses", "Cache lookups that missed or found an expired entry"),
+                                   ("evictions", "Entries evicted to respect maxsize"),
+                                   ("expirations", "Entries dropped after their TTL")):
+            lines.extend(render_family(f"cache_{counter}", "counter", help_text,
+                                       [("_total", {"cache": name}, stat[counter]) for name, stat in stats.items()]))
+        return lines
+    return collect
@@ -0,0 +1,306 @@
+import bisect
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool
+
+# Checkout wait buckets in seconds, up to the default pool_timeout
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Latency buckets in seconds for requests and queries
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# A sample of the text exposition format: (name suffix, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def render_family(name: str, kind: str, help_text: str, samples: Iterable[Sample]) -> List[str]:
+    """
+    Render one metric family in the Prometheus text exposition format
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        label_text = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+        lines.append(f"{name}{suffix}{{{label_text}}} {_format_value(value)}" if label_text
+                     else f"{name}{suffix} {_format_value(value)}")
+    return lines
+
+class Histogram:
+    """
+    Thread-safe histogram with fixed upper bounds, Prometheus style:
+    snapshot() reports cumulative counts per bucket plus the sum and count.
+    """
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            cumulative.append((bound, running))
+        return {"buckets": cumulative, "sum": total, "count": running}
+    
+    def samples(self, labels: Optional[Dict[str, str]] = None) -> List[Sample]:
+        """
+        Return the _bucket, _sum and _count samples of the histogram
+        """
+        labels = labels or {}
+        snapshot = self.snapshot()
+        samples = [("_bucket", {**labels, "le": _format_value(bound)}, count) for bound, count in snapshot["buckets"]]
+        samples.append(("_sum", labels, snapshot["sum"]))
+        samples.append(("_count", labels, snapshot["count"]))
+        return samples
+
+class _Family:
+    """
+    Base of the labelled metric families: one child value per label set
+    """
+    kind = "untyped"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+    
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+    
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+    
+    def collect(self) -> List[str]:
+        return render_family(self.name, self.kind, self.help_text, self.samples())
+
+class Counter(_Family):
+    """
+    Monotonic counter, optionally labelled
+    """
+    kind = "counter"
+    suffix = "_total"
+    
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._children[labels] = self._children.get(labels, 0) + amount
+    
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._children.get(labels, 0)
+    
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            children = sorted(self._children.items())
+        return [(self.suffix, self._labels(key), value) for key, value in children]
+
+class Gauge(Counter):
+    """
+    Value that goes up and down, optionally labelled
+    """
+    kind = "gauge"
+    suffix = ""
+    
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+class HistogramVec(_Family):
+    """
+    Histogram per label set, all sharing the same buckets
+    """
+    kind = "histogram"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+    
+    def child(self, *labels: str) -> Histogram:
+        with self._lock:
+            histogram = self._children.get(labels)
+            if histogram is None:
+                histogram = self._children[labels] = Histogram(self.buckets)
+            return histogram
+    
+    def observe(self, value: float, *labels: str) -> None:
+        self.child(*labels).observe(value)
+    
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            children = sorted(self._children.items())
+        return [sample for key, histogram in children for sample in histogram.samples(self._labels(key))]
+
+class MetricsRegistry:
+    """
+    Metric families and collector callbacks rendered together by /metrics.
+    Collectors return exposition lines for values kept elsewhere (pool,
+    caches) and are read at scrape time.
+    """
+    def __init__(self):
+        self._families: List[_Family] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+    
+    def register(self, family: _Family) -> _Family:
+        self._families.append(family)
+        return family
+    
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        self._collectors.append(collector)
+    
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self._families:
+            lines.extend(family.collect())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+class PoolMetrics:
+    """
+    Connection pool counters gathered from SQLAlchemy pool events, plus the
+    checkout wait time and timeouts recorded by the instrumented pool class.
+    The gauges (checked out, overflow) are read from the live pool.
+    """
+    def __init__(self, recycle: int = -1, wait_buckets: Sequence[float] = POOL_WAIT_BUCKETS, name: str = "primary"):
+        self.name = name
+        self.recycle = recycle
+        self.checkout_wait = Histogram(wait_buckets)
+        self.pool: Optional[Pool] = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.recycles = 0
+        self.invalidations = 0
+    
+    def _increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        self.checkout_wait.observe(seconds)
+        if timed_out:
+            self._increment("timeouts")
+    
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self._increment("checkouts")
+    
+    def on_connect(self, dbapi_connection, connection_record) -> None:
+        self._increment("connects")
+    
+    def on_close(self, dbapi_connection, connection_record) -> None:
+        # Connections closed after outliving pool_recycle are being recycled
+        if self.recycle > -1 and time.time() - connection_record.starttime > self.recycle:
+            self._increment("recycles")
+    
+    def on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self._increment("invalidations")
+    
+    def listen(self, target: Any) -> None:
+        """
+        Register the event handlers on a pool or pool class
+        """
+        event.listen(target, "checkout", self.on_checkout)
+        event.listen(target, "connect", self.on_connect)
+        event.listen(target, "close", self.on_close)
+        event.listen(target, "invalidate", self.on_invalidate)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the pool gauges, counters and checkout wait histogram
+        """
+        pool = self.pool
+        with self._lock:
+            counters = {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "timeouts": self.timeouts,
+                "recycles": self.recycles,
+                "invalidations": self.invalidations
+            }
+        wait = self.checkout_wait.snapshot()
+        return {
+            "size": pool.size() if pool is not None else 0,
+            "checked_out": pool.checkedout() if pool is not None else 0,
+            "overflow": max(pool.overflow(), 0) if pool is not None else 0,
+            **counters,
+            "checkout_wait_seconds": {
+                "buckets": {("+Inf" if bound == float("inf") else str(bound)): count for bound, count in wait["buckets"]},
+                "sum": wait["sum"],
+                "count": wait["count"]
+            }
+        }
+
+def collect_pools(pools: Sequence[PoolMetrics]) -> List[str]:
+    """
+    Render the metrics of several pools in the Prometheus text exposition
+    format, one family per metric with a pool label per engine
+    """
+    stats = [({"pool": pool.name}, pool.stats()) for pool in pools]
+    lines = []
+    for name, help_text in (("size", "Configured pool size"),
+                            ("checked_out", "Connections currently checked out"),
+                            ("overflow", "Overflow connections currently open")):
+        lines.extend(render_family(f"db_pool_{name}", "gauge", help_text,
+                                   [("", labels, stat[name]) for labels, stat in stats]))
+    for name, help_text in (("checkouts", "Connection checkouts"),
+                            ("connects", "New database connections opened"),
+                            ("timeouts", "Checkouts that gave up after pool_timeout"),
+                            ("recycles", "Connections closed for exceeding pool_recycle"),
+                            ("invalidations", "Connections invalidated after an error")):
+        lines.extend(render_family(f"db_pool_{name}", "counter", help_text,
+                                   [("_total", labels, stat[name]) for labels, stat in stats]))
+    lines.extend(render_family("db_pool_checkout_wait_seconds", "histogram",
+                               "Time spent getting a connection from the pool",
+                               [sample for pool in pools for sample in pool.checkout_wait.samples({"pool": pool.name})]))
+    return lines
+
+def instrumented_pool_class(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """
+    Subclass a queue pool so every checkout records how long it took to get
+    a connection (queueing, connecting and pre-ping), and whether it gave up
+    after pool_timeout. SQLAlchemy has no event for the start of a checkout,
+    so it is timed around connect(). The class survives engine.dispose(),
+    which recreates the pool from it.
+    """
+    class InstrumentedPool(base):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            metrics.pool = self
+        
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                connection = super().connect()
+            except PoolTimeoutError:
+                metrics.record_wait(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.record_wait(time.perf_counter() - start)
+            return connection
+    
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    metrics.listen(InstrumentedPool)
+    return InstrumentedPool
@@ -1,9 +1,14 @@
-from sqlalchemy import create_engine, Engine
+from sqlalchemy import create_engine, event, make_url, Engine, URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 from contextlib import contextmanager
+from typing import Any, Dict, Optional
 import os
 from dotenv import load_dotenv
+from app.core.metrics import PoolMetrics, instrumented_pool_class
+from app.core.instrumentation import instrument_queries
 
 # Load environment variables
 load_dotenv()
@@ -11,36 +16,242 @@ load_dotenv()
 # Base class for all models
 Base = declarative_base()
 
-def get_connection_url() -> str:
+# Serve the API through the asyncio driver (aiomysql) instead of PyMySQL
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+
+# Full SQLAlchemy URL replacing the MySQL settings below, e.g. a local
+# profile without a MySQL server:
+#   sqlite:///./fastfood.db  file-backed
+#   sqlite://                in-memory, one connection shared by all sessions
+# The SQLite profile serves the synchronous services only (DB_ASYNC=false).
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+
+# Async driver used for each backend when DB_ASYNC=true. Backends without
+# one in requirements.txt are rejected by get_connection_url.
+ASYNC_DRIVERS = {"mysql": "aiomysql"}
+
+# Read replica for the SELECTs (see RoutingSession): a MySQL host sharing the
+# primary's credentials and database, or a full URL. Unset, everything goes
+# to the primary.
+DB_READ_HOST = os.getenv("DB_READ_HOST", "")
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
+DB_READ_REPLICA = bool(DB_READ_HOST or DATABASE_READ_URL)
+
+# Keep reading from the primary for the rest of the session (one request)
+# after its first write is committed, so a request never reads a replica
+# that has not caught up with its own write yet
+DB_READ_YOUR_WRITES = os.getenv("DB_READ_YOUR_WRITES", "true").lower() == "true"
+
+# Connection pool sizing, per API process. Every replica holds up to
+# DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so with the HPA at maxReplicas
+# the sum must stay below the MySQL max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+
+def get_connection_url(driver: str = "pymysql", replica: bool = False) -> str:
     """
     Build database connection URL from environment variables or default values.
+    DATABASE_URL wins when set; an async driver swaps in the asyncio driver
+    of its backend (mysql -> mysql+aiomysql), and a backend without one
+    raises ValueError. With replica, the read replica settings
+    (DATABASE_READ_URL or DB_READ_HOST) are used instead.
     """
+    database_url = DATABASE_READ_URL if replica else DATABASE_URL
+    if database_url:
+        url = make_url(database_url)
+        if driver in ASYNC_DRIVERS.values():
+            backend = url.get_backend_name()
+            if backend not in ASYNC_DRIVERS:
+                raise ValueError(
+                    f"DB_ASYNC=true has no async driver for a {backend} database URL: "
+                    f"use a MySQL URL or run with DB_ASYNC=false"
+                )
+            url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+        return url.render_as_string(hide_password=False)
+    
     db_user = os.getenv("DB_USER", "fastfood_user")
     db_password = os.getenv("DB_PASSWORD", "Mudar123!")
-    db_host = os.getenv("DB_HOST", "db-fastfood")
+    db_host = DB_READ_HOST if replica else os.getenv("DB_HOST", "db-fastfood")
     db_port = os.getenv("DB_PORT", "3306")
     db_name = os.getenv("DB_NAME", "fastfood")
     
     # Build MySQL connection URL
-    return f"mysql+pymysql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+    return f"mysql+{driver}://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+
+def get_pool_settings() -> Dict[str, Any]:
+    """
+    Build the connection pool arguments shared by the sync and async engines.
+    """
+    return {
+        "pool_pre_ping": True,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW
+    }
+
+def is_memory_database(url: URL) -> bool:
+    """
+    Tell whether a SQLite URL points to an in-memory database
+    """
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
 
-def get_engine() -> Engine:
+def get_engine_options(connection_url: str) -> Dict[str, Any]:
     """
-    Create and return a SQLAlchemy engine instance.
+    Build the engine arguments for the backend of the URL. An in-memory
+    SQLite database lives in its connection, so it gets a single shared one.
     """
-    connection_url = get_connection_url()
-    return create_engine(
+    url = make_url(connection_url)
+    if url.get_backend_name() != "sqlite":
+        return get_pool_settings()
+    # Sessions are used from the threadpool, not only from their creating thread
+    options = {"connect_args": {"check_same_thread": False}}
+    if is_memory_database(url):
+        options["poolclass"] = StaticPool
+    else:
+        options.update(get_pool_settings())
+    return options
+
+def enable_sqlite_foreign_keys(engine: Engine) -> None:
+    """
+    Enforce foreign keys on SQLite connections, as MySQL does
+    """
+    @event.listens_for(engine, "connect")
+    def set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+def get_engine(metrics: Optional[PoolMetrics] = None, replica: bool = False) -> Engine:
+    """
+    Create and return a SQLAlchemy engine instance (for the read replica
+    with replica). When metrics is given, its pool reports checkout waits
+    and events to it.
+    """
+    connection_url = get_connection_url(replica=replica)
+    options = get_engine_options(connection_url)
+    if metrics and "poolclass" not in options:
+        options["poolclass"] = instrumented_pool_class(QueuePool, metrics)
+    engine = create_engine(
         connection_url,
         echo=os.getenv("SQL_ECHO", "False").lower() == "true",
-        pool_pre_ping=True,
-        pool_recycle=3600,
-        pool_timeout=30,
-        pool_size=5,
-        max_overflow=10
+        **options
     )
+    if engine.dialect.name == "sqlite":
+        enable_sqlite_foreign_keys(engine)
+    return engine
 
-# Create a session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+def get_async_engine(metrics: Optional[PoolMetrics] = None, replica: bool = False) -> AsyncEngine:
+    """
+    Create and return a SQLAlchemy asyncio engine instance backed by aiomysql,
+    for the read replica with replica. When metrics is given, its pool reports checkout waits and
+    events to it.
+    """
+    connection_url = get_connection_url("aiomysql", replica=replica)
+    options = get_engine_options(connection_url)
+    if metrics and "poolclass" not in options:
+        options["poolclass"] = instrumented_pool_class(AsyncAdaptedQueuePool, metrics)
+    engine = create_async_engine(
+        connection_url,
+        echo=os.getenv("SQL_ECHO", "False").lower() == "true",
+        **options
+    )
+    if engine.dialect.name == "sqlite":
+        enable_sqlite_foreign_keys(engine.sync_engine)
+    return engine
+
+# Execution option keeping a plain SELECT on the primary, for reads whose
+# result outlives the request, like the product cache fills:
+#   select(...).execution_options(**{PRIMARY_READ: True})
+PRIMARY_READ = "primary_read"
+
+def is_read_statement(clause: Any) -> bool:
+    """
+    Tell whether a statement only reads: a SELECT without FOR UPDATE
+    """
+    return (
+        clause is not None
+        and getattr(clause, "is_select", False)
+        and getattr(clause, "_for_update_arg", None) is None
+    )
+
+def is_primary_read(clause: Any) -> bool:
+    """
+    Tell whether a statement asks to be read from the primary (PRIMARY_READ)
+    """
+    return bool(clause.get_execution_options().get(PRIMARY_READ, False))
+
+class RoutingSession(Session):
+    """
+    Session sending plain SELECTs to the read replica and everything else
+    (flushes, INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE, text SQL) to the
+    primary, so read-only repository methods scale out without changes.
+    SELECTs with the PRIMARY_READ execution option stay on the primary.
+    
+    Once the session writes, its reads stay on the primary until the
+    transaction ends, and for the rest of the session when read_your_writes
+    is set (DB_READ_YOUR_WRITES). Without a reader it always uses the writer.
+    """
+    def __init__(self, writer: Engine, reader: Optional[Engine] = None,
+                 read_your_writes: bool = DB_READ_YOUR_WRITES, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.writer = writer
+        self.reader = reader
+        self.read_your_writes = read_your_writes
+        self.wrote = False
+    
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Engine:
+        if self.reader is None:
+            return self.writer
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.wrote = True
+            return self.writer
+        if self.wrote or not is_read_statement(clause) or is_primary_read(clause):
+            return self.writer
+        return self.reader
+    
+    def commit(self) -> None:
+        super().commit()
+        if not self.read_your_writes:
+            self.wrote = False
+    
+    def rollback(self) -> None:
+        super().rollback()
+        self.wrote = False
+
+# Pool metrics of the engines serving the API (the async ones when DB_ASYNC=true)
+pool_metrics = PoolMetrics(recycle=DB_POOL_RECYCLE)
+replica_pool_metrics = PoolMetrics(recycle=DB_POOL_RECYCLE, name="replica")
+
+# Engines behind the API sessions; their statements feed the query histogram
+engine = get_engine(None if DB_ASYNC else pool_metrics)
+instrument_queries(engine)
+read_engine = get_engine(None if DB_ASYNC else replica_pool_metrics, replica=True) if DB_READ_REPLICA else None
+if read_engine is not None:
+    instrument_queries(read_engine)
+
+# Create a session factory. Objects stay loaded after commit, so returning a
+# freshly written row does not cost another SELECT.
+SessionLocal = sessionmaker(
+    class_=RoutingSession, writer=engine, reader=read_engine,
+    autocommit=False, autoflush=False, expire_on_commit=False
+)
+
+# Create the async session factory only when the async mode is enabled, so the
+# aiomysql driver is not required by the default synchronous deployment
+async_engine = get_async_engine(pool_metrics) if DB_ASYNC else None
+async_read_engine = get_async_engine(replica_pool_metrics, replica=True) if DB_ASYNC and DB_READ_REPLICA else None
+for instrumented in (async_engine, async_read_engine):
+    if instrumented is not None:
+        instrument_queries(instrumented.sync_engine)
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession,
+    writer=async_engine.sync_engine,
+    reader=async_read_engine.sync_engine if async_read_engine is not None else None,
+    autoflush=False, expire_on_commit=False
+) if DB_ASYNC else None
 
 @contextmanager
 def get_db_session():
@@ -72,4 +283,18 @@ def get_db():
     try:
         yield session
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+async def get_async_db():
+    """
+    Async generator function for FastAPI dependency injection (DB_ASYNC=true).
+    Usage:
+        @app.get("/items/")
+        async def read_items(db: AsyncSession = Depends(get_async_db)):
+            # await db operations
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
+
+# Session dependency used by the routers, selected by the DB_ASYNC setting
+get_session = get_async_db if DB_ASYNC else get_db
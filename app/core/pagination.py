@@ -0,0 +1,77 @@
+import base64
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Query, status
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Page sizes for the list endpoints; MAX_PAGE_SIZE is a hard limit
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+
+@dataclass(frozen=True)
+class PageParams:
+    limit: int
+    after_id: Optional[int] = None
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Build the opaque cursor that points right after the given ID.
+    """
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Read the ID back from an opaque cursor. Raises ValueError when it is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(last_id, int):
+        raise ValueError("Invalid cursor")
+    return last_id
+
+def keyset(query: Any, id_column: Any, limit: Optional[int] = None, after_id: Optional[int] = None) -> Any:
+    """
+    Apply keyset pagination (id > after_id ORDER BY id LIMIT limit) to a
+    Query or a select() statement.
+    """
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    query = query.order_by(id_column)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def split_page(rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    Split rows fetched with limit + 1 into the page and the next cursor.
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1].id)
+
+def get_page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of items to return"),
+    after: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page")
+) -> PageParams:
+    """
+    FastAPI dependency that validates the limit/after query parameters.
+    """
+    try:
+        after_id = decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return PageParams(limit=limit, after_id=after_id)
@@ -0,0 +1,11 @@
+from pydantic import ValidationError
+
+def validation_message(error: ValidationError) -> str:
+    """
+    Flatten a validation error into a single line, used to report the
+    problems of one item of a bulk request
+    """
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    )
@@ -1,9 +1,16 @@
+import re
 from sqlalchemy import Column, Integer, String
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, field_validator
+from typing import List, Optional
 
 from app.core.mysql_connection import Base
 
+def normalize_cpf(cpf: str) -> str:
+    """
+    Canonical CPF used for storage and lookups: digits only (620.546.640-65 -> 62054664065)
+    """
+    return re.sub(r"\D", "", cpf)
+
 # SQLAlchemy model for database mapping
 class ClientDB(Base):
     __tablename__ = "clients"
@@ -11,11 +18,19 @@ class ClientDB(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     cpf = Column(String(14), nullable=False, unique=True)
+    cpf_digits = Column(String(11), nullable=False, unique=True)
 
 # Pydantic model for API requests
 class ClientCreate(BaseModel):
     name: str
     cpf: str
+    
+    @field_validator("cpf")
+    @classmethod
+    def validate_cpf(cls, value: str) -> str:
+        if len(normalize_cpf(value)) != 11:
+            raise ValueError("CPF must contain 11 digits")
+        return value
 
 # Pydantic model for API responses
 class ClientResponse(BaseModel):
@@ -29,6 +44,7 @@ class ClientResponse(BaseModel):
 # Pydantic model for multiple clients response
 class ClientListResponse(BaseModel):
     clients: List[ClientResponse]
+    next_cursor: Optional[str] = None
 
 # Pydantic model for client name updates
 class ClientUpdate(BaseModel):
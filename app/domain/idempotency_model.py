@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Float, Index, Integer, String, Text
+
+from app.core.mysql_connection import Base
+
+# SQLAlchemy model for the responses stored per Idempotency-Key. A row with
+# no status_code is a request still in progress.
+class IdempotencyKeyDB(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+    
+    idempotency_key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    body = Column(Text, nullable=True)
+    # Epoch seconds: end of the replay window, or of the in-progress lease
+    expires_at = Column(Float, nullable=False)
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, JSON
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+import math
+import re
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, JSON, Index
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Dict, Any, FrozenSet
 from enum import Enum
 
 from app.core.mysql_connection import Base
@@ -8,12 +10,86 @@ from app.core.mysql_connection import Base
 # SQLAlchemy model for database mapping
 class OrderDB(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_status_id", "status", "id"),
+        Index("ix_orders_client_id_id", "client_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
     total_price = Column(Float, nullable=False)
     status = Column(String(50), nullable=False)
     products = Column(JSON, nullable=False)
+    # Bumped by every status change, for optimistic concurrency control
+    version = Column(Integer, nullable=False, default=0)
+
+# SQLAlchemy model for the normalized order line items
+class OrderItemDB(Base):
+    __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+        Index("ix_order_items_product_id_order_id", "product_id", "order_id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    product_id = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False, default=1)
+    unit_price = Column(Float, nullable=False, default=0)
+
+def _whole_number(value: Any, field: str) -> int:
+    """
+    Read an integer column from free-form JSON: integers, whole floats and
+    digit strings. Fractions are rejected instead of truncated.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and re.fullmatch(r"\s*-?\d+\s*", value):
+        return int(value)
+    raise ValueError(f"{field} must be a whole number, got {value!r}")
+
+def _number(value: Any, field: str) -> float:
+    """
+    Read a float column from free-form JSON: numbers and numeric strings
+    """
+    if not isinstance(value, bool):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            pass
+        else:
+            if math.isfinite(number):
+                return number
+    raise ValueError(f"{field} must be a number, got {value!r}")
+
+def build_order_item_rows(order_id: int, products: List[Dict[str, Any]],
+                          skip_invalid: bool = False) -> List[Dict[str, Any]]:
+    """
+    Map the line items of an order's products JSON to order_items rows.
+    Items without a product ID cannot be indexed and are left only in the JSON.
+    Items whose ID, quantity or price is not a number raise ValueError, or are
+    left only in the JSON as well with skip_invalid (rows stored before the
+    items were validated).
+    """
+    rows = []
+    for index, item in enumerate(products):
+        product_id = item.get("id", item.get("product_id"))
+        if product_id is None:
+            continue
+        try:
+            rows.append({
+                "order_id": order_id,
+                "product_id": _whole_number(product_id, "id"),
+                "quantity": _whole_number(item.get("quantity", 1), "quantity"),
+                "unit_price": _number(item.get("price", item.get("unit_price", 0)), "price"),
+            })
+        except ValueError as e:
+            if skip_invalid:
+                continue
+            raise ValueError(f"products[{index}]: {e}") from None
+    return rows
 
 # Enum for order status validation
 class OrderStatus(str, Enum):
@@ -21,6 +97,28 @@ class OrderStatus(str, Enum):
     PREPARING = "Em preparação"
     READY = "Pronto"
     FINISHED = "Finalizado"
+    
+    def can_transition_to(self, target: "OrderStatus") -> bool:
+        return target in ORDER_STATUS_TRANSITIONS[self]
+    
+    def previous_statuses(self) -> List["OrderStatus"]:
+        """
+        Return the statuses an order may move to this status from
+        """
+        return [source for source, targets in ORDER_STATUS_TRANSITIONS.items() if self in targets]
+
+# Allowed status changes: orders only move forward through the kitchen
+ORDER_STATUS_TRANSITIONS: Dict[OrderStatus, FrozenSet[OrderStatus]] = {
+    OrderStatus.RECEIVED: frozenset({OrderStatus.PREPARING}),
+    OrderStatus.PREPARING: frozenset({OrderStatus.READY}),
+    OrderStatus.READY: frozenset({OrderStatus.FINISHED}),
+    OrderStatus.FINISHED: frozenset()
+}
+
+# Enum for order export formats
+class OrderExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
 
 # Pydantic model for API requests
 class OrderCreate(BaseModel):
@@ -28,10 +126,39 @@ class OrderCreate(BaseModel):
     total_price: float
     products: List[Dict[str, Any]]
     status: OrderStatus = OrderStatus.RECEIVED
+    
+    @field_validator("products")
+    @classmethod
+    def validate_line_items(cls, products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Line items are also written to order_items: reject what cannot be
+        # stored there as is
+        build_order_item_rows(0, products)
+        return products
+
+# Pydantic model for batch order creation requests. Items are validated
+# one by one against OrderCreate so a bad item is reported on its own.
+class OrderBatchCreate(BaseModel):
+    orders: List[Dict[str, Any]] = Field(..., min_length=1, max_length=500)
+    atomic: bool = Field(False, description="Reject the whole batch when any item is invalid")
+
+# Pydantic model for the result of one batch item
+class OrderBatchItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+# Pydantic model for batch order creation responses
+class OrderBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[OrderBatchItemResult]
 
 # Pydantic model for status updates
 class OrderStatusUpdate(BaseModel):
     status: OrderStatus
+    # Version the client last saw; when given, the update fails with 409 if
+    # the order changed since
+    version: Optional[int] = None
 
 # Pydantic model for API responses
 class OrderResponse(BaseModel):
@@ -39,7 +166,9 @@ class OrderResponse(BaseModel):
     client_id: int
     total_price: float
     status: str
-    products: List[Dict[str, Any]]
+    # None when the order was listed without its products
+    products: Optional[List[Dict[str, Any]]] = None
+    version: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -47,3 +176,14 @@ class OrderResponse(BaseModel):
 # Pydantic model for multiple orders response
 class OrderListResponse(BaseModel):
     orders: List[OrderResponse]
+    next_cursor: Optional[str] = None
+
+# Pydantic model for the quantity and revenue sold of a product
+class ProductSales(BaseModel):
+    product_id: int
+    quantity: int
+    revenue: float
+
+# Pydantic model for the product sales report
+class ProductSalesResponse(BaseModel):
+    products: List[ProductSales]
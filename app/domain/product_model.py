@@ -29,6 +29,27 @@ class ProductCreate(BaseModel):
     price: float
     description: Optional[str] = None
 
+# Enum for product import formats
+class ProductImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+# Pydantic model for an imported product row. Rows with an ID update that
+# product, rows without one create a new product.
+class ProductImportRow(ProductCreate):
+    id: Optional[int] = None
+
+# Pydantic model for a rejected import row
+class ProductImportError(BaseModel):
+    line: int
+    error: str
+
+# Pydantic model for the product import summary
+class ProductImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ProductImportError]
+
 # Pydantic model for API responses
 class ProductResponse(BaseModel):
     id: int
@@ -43,3 +64,4 @@ class ProductResponse(BaseModel):
 # Pydantic model for multiple products response
 class ProductListResponse(BaseModel):
     products: List[ProductResponse]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,50 @@
+from typing import Any, List
+
+class OrderBatchError(Exception):
+    """
+    Raised when an atomic order batch has invalid items; nothing was inserted
+    """
+    def __init__(self, results: List[Any]):
+        super().__init__("Order batch has invalid items")
+        self.results = results
+
+class IdempotencyKeyReused(Exception):
+    """
+    Raised when an Idempotency-Key is sent again with a different request body
+    """
+    def __init__(self, key: str):
+        super().__init__("Idempotency-Key was already used with a different request")
+        self.key = key
+
+class IdempotencyKeyInProgress(Exception):
+    """
+    Raised when another request with the same Idempotency-Key is still being
+    processed after the wait timeout
+    """
+    def __init__(self, key: str):
+        super().__init__("A request with this Idempotency-Key is still being processed")
+        self.key = key
+
+class OrderStatusConflict(Exception):
+    """
+    Raised when an order's status update loses to a concurrent update or
+    asks for a transition its current status does not allow
+    """
+    def __init__(self, order_id: int, current_status: str, current_version: int, requested_status: str):
+        super().__init__(
+            f"Order {order_id} is '{current_status}' (version {current_version}) "
+            f"and cannot move to '{requested_status}'"
+        )
+        self.order_id = order_id
+        self.current_status = current_status
+        self.current_version = current_version
+        self.requested_status = requested_status
+
+class ProductImportAborted(Exception):
+    """
+    Raised when a product import chunk fails to write. Earlier chunks are
+    already committed; summary counts them and the rows rejected so far.
+    """
+    def __init__(self, summary: Any, error: Exception):
+        super().__init__(f"Product import stopped after {summary.imported} imported rows: {error}")
+        self.summary = summary
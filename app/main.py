@@ -1,14 +1,47 @@
+import logging
+import os
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 from app.api.application_routes import router as api_router
-from app.repository.db_repository import create_db_tables
+from app.api.metrics_routes import router as metrics_router
+from app.core.admission import AdmissionMiddleware
+from app.core.codec import DefaultJSONResponse
+from app.core.instrumentation import MetricsMiddleware
+from app.repository.db_repository import create_db_tables, insert_initial_data
+from app.repository.migrations import run_migrations
+from app.service.order_service import warm_kitchen_queue
 
+logger = logging.getLogger(__name__)
+
+# Apply pending schema migrations before serving. On by default so the
+# schema always matches the code; replicas starting together wait on the
+# migration lock. Set to false when "python -m app.repository.migrations"
+# runs as a release step instead.
+DB_MIGRATE_ON_STARTUP = os.getenv("DB_MIGRATE_ON_STARTUP", "true").lower() == "true"
+# Insert the sample products and clients into empty tables after migrating
+# (local docker-compose; the schema itself comes from the migrations)
+DB_SEED_ON_STARTUP = os.getenv("DB_SEED_ON_STARTUP", "false").lower() == "true"
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # create_db_tables()
+    if DB_MIGRATE_ON_STARTUP:
+        await run_in_threadpool(run_migrations)
+    if DB_SEED_ON_STARTUP:
+        await run_in_threadpool(insert_initial_data)
+    try:
+        await warm_kitchen_queue()
+    except Exception as e:
+        # The board is loaded on the first kitchen request instead
+        logger.warning("Could not load the kitchen queue at startup: %s", e)
     yield
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=DefaultJSONResponse)
+
+# Added first so it runs inside MetricsMiddleware, which counts the 503s
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
-app.include_router(api_router, prefix="/api")
\ No newline at end of file
+app.include_router(api_router, prefix="/api")
+app.include_router(metrics_router)
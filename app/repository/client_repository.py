@@ -1,52 +1,130 @@
+from sqlalchemy import Row, select, update
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.domain.client_model import ClientDB
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Iterable, List, Optional, Set
+from app.domain.client_model import ClientDB, normalize_cpf
+from app.core.pagination import keyset
+
+# Columns selected by the read queries, returned as plain rows instead of
+# tracked ClientDB entities
+CLIENT_COLUMNS = (ClientDB.id, ClientDB.name, ClientDB.cpf)
 
 class ClientRepository:
     def __init__(self, db_session: Session):
         self.db_session = db_session
     
-    def get_all_clients(self) -> List[ClientDB]:
+    def get_all_clients(self, limit: Optional[int] = None, after_id: Optional[int] = None) -> List[Row]:
         """
-        Retrieve all clients from the database
+        Retrieve client rows ordered by ID, after the given ID and up to limit rows
         """
-        return self.db_session.query(ClientDB).all()
+        return keyset(self.db_session.query(*CLIENT_COLUMNS), ClientDB.id, limit, after_id).all()
     
-    def get_client_by_id(self, client_id: int) -> Optional[ClientDB]:
+    def get_client_by_id(self, client_id: int) -> Optional[Row]:
         """
-        Retrieve a client by its ID
+        Retrieve a client row by its ID
         """
-        return self.db_session.query(ClientDB).filter(ClientDB.id == client_id).first()
+        return self.db_session.query(*CLIENT_COLUMNS).filter(ClientDB.id == client_id).first()
     
-    def get_client_by_cpf(self, cpf: str) -> Optional[ClientDB]:
+    def get_client_by_cpf(self, cpf: str) -> Optional[Row]:
         """
-        Retrieve a client by CPF
+        Retrieve a client row by CPF in any format, as a point query on the
+        canonical digits
         """
-        return self.db_session.query(ClientDB).filter(ClientDB.cpf == cpf).first()
+        return self.db_session.query(*CLIENT_COLUMNS).filter(ClientDB.cpf_digits == normalize_cpf(cpf)).first()
+    
+    def get_existing_client_ids(self, client_ids: Iterable[int]) -> Set[int]:
+        """
+        Return which of the given client IDs exist, in a single query
+        """
+        rows = self.db_session.query(ClientDB.id).filter(ClientDB.id.in_(set(client_ids))).all()
+        return {row.id for row in rows}
     
     def create_client(self, client_data: dict) -> ClientDB:
         """
         Create a new client in the database
         """
-        new_client = ClientDB(**client_data)
+        new_client = ClientDB(**client_data, cpf_digits=normalize_cpf(client_data["cpf"]))
         self.db_session.add(new_client)
         self.db_session.commit()
-        self.db_session.refresh(new_client)
         return new_client
         
-    def update_client(self, client_id: int, client_data: dict) -> ClientDB:
+    def update_client(self, client_id: int, client_data: dict) -> Row:
         """
-        Update an existing client in the database
+        Update an existing client with a single conditional UPDATE, then read
+        the client back once for the columns that were not written
         """
-        client = self.db_session.query(ClientDB).filter(ClientDB.id == client_id).first()
-        if not client:
-            raise ValueError(f"Client with ID {client_id} not found")
+        # Keep the canonical CPF in sync when the CPF changes
+        if "cpf" in client_data:
+            client_data = {**client_data, "cpf_digits": normalize_cpf(client_data["cpf"])}
         
-        # Update client attributes
-        for key, value in client_data.items():
-            setattr(client, key, value)
+        result = self.db_session.execute(
+            update(ClientDB).where(ClientDB.id == client_id).values(**client_data)
+        )
+        if result.rowcount == 0:
+            raise ValueError(f"Client with ID {client_id} not found")
         
-        # Commit changes
+        client = self.get_client_by_id(client_id)
         self.db_session.commit()
-        self.db_session.refresh(client)
+        return client
+
+class AsyncClientRepository:
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+    
+    async def get_all_clients(self, limit: Optional[int] = None, after_id: Optional[int] = None) -> List[Row]:
+        """
+        Retrieve client rows ordered by ID, after the given ID and up to limit rows
+        """
+        result = await self.db_session.execute(keyset(select(*CLIENT_COLUMNS), ClientDB.id, limit, after_id))
+        return list(result.all())
+    
+    async def get_client_by_id(self, client_id: int) -> Optional[Row]:
+        """
+        Retrieve a client row by its ID
+        """
+        result = await self.db_session.execute(select(*CLIENT_COLUMNS).where(ClientDB.id == client_id))
+        return result.first()
+    
+    async def get_client_by_cpf(self, cpf: str) -> Optional[Row]:
+        """
+        Retrieve a client row by CPF in any format, as a point query on the
+        canonical digits
+        """
+        query = select(*CLIENT_COLUMNS).where(ClientDB.cpf_digits == normalize_cpf(cpf))
+        result = await self.db_session.execute(query)
+        return result.first()
+    
+    async def get_existing_client_ids(self, client_ids: Iterable[int]) -> Set[int]:
+        """
+        Return which of the given client IDs exist, in a single query
+        """
+        result = await self.db_session.execute(select(ClientDB.id).where(ClientDB.id.in_(set(client_ids))))
+        return {row.id for row in result.all()}
+    
+    async def create_client(self, client_data: dict) -> ClientDB:
+        """
+        Create a new client in the database
+        """
+        new_client = ClientDB(**client_data, cpf_digits=normalize_cpf(client_data["cpf"]))
+        self.db_session.add(new_client)
+        await self.db_session.commit()
+        return new_client
+        
+    async def update_client(self, client_id: int, client_data: dict) -> Row:
+        """
+        Update an existing client with a single conditional UPDATE, then read
+        the client back once for the columns that were not written
+        """
+        # Keep the canonical CPF in sync when the CPF changes
+        if "cpf" in client_data:
+            client_data = {**client_data, "cpf_digits": normalize_cpf(client_data["cpf"])}
+        
+        result = await self.db_session.execute(
+            update(ClientDB).where(ClientDB.id == client_id).values(**client_data)
+        )
+        if result.rowcount == 0:
+            raise ValueError(f"Client with ID {client_id} not found")
+        
+        client = await self.get_client_by_id(client_id)
+        await self.db_session.commit()
         return client
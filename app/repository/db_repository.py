@@ -1,13 +1,11 @@
 import os
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import OperationalError, ProgrammingError
+from app.core.mysql_connection import engine as app_engine
+from app.repository.migrations import run_migrations
 
-# Configurações do banco de dados
-DB_USER = os.getenv("DB_USER", "fastfood_user")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "Mudar123!")
-DB_HOST = os.getenv("DB_HOST", "db-fastfood")
-DB_PORT = os.getenv("DB_PORT", "3306")
-DB_NAME = os.getenv("DB_NAME", "fastfood")
+# Configurações do banco de dados (as de DATABASE_URL quando definido)
+DB_NAME = app_engine.url.database
 SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
 
 def create_db_tables():
@@ -21,8 +19,12 @@ def create_db_tables():
     insert_initial_data()
 
 def create_database_if_not_exists():
+    # O SQLite cria o arquivo (ou o banco em memória) na primeira conexão
+    if app_engine.dialect.name != "mysql":
+        return
+    
     # URL sem o nome do banco específico
-    base_url = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/"
+    base_url = app_engine.url.set(database="")
     
     try:
         engine = create_engine(base_url, echo=SQL_ECHO)
@@ -40,62 +42,22 @@ def create_database_if_not_exists():
             engine.dispose()
 
 def create_tables():
-    # URL com o nome do banco específico
-    db_url = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    
+    # Usa o engine da aplicação: um banco SQLite em memória só existe nele
     try:
-        engine = create_engine(db_url, echo=SQL_ECHO)
-        with engine.connect() as conn:
-            # Criação das tabelas (substitua com seu schema real)
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS products (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    category VARCHAR(100) NOT NULL,
-                    price FLOAT NOT NULL,
-                    description TEXT
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
-            """))
-            
-            # Criar tabela de clientes
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS clients (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    cpf VARCHAR(14) NOT NULL UNIQUE
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
-            """))
-            
-            # Criar tabela de pedidos (depende da tabela clients)
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS orders (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    client_id INT NOT NULL,
-                    total_price FLOAT NOT NULL,
-                    status VARCHAR(50) NOT NULL,
-                    products JSON NOT NULL,
-                    FOREIGN KEY (client_id) REFERENCES clients(id)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
-            """))
-            # Adicione mais tabelas conforme necessário
-            print("Tabelas criadas/verificadas com sucesso!")
+        # O schema (tabelas e índices) é versionado em app.repository.migrations
+        applied = run_migrations(app_engine)
+        print(f"Tabelas criadas/verificadas com sucesso! Migrações aplicadas: {applied}")
     except ProgrammingError as e:
         print(f"Erro SQL ao criar tabelas: {e}")
         raise
     except OperationalError as e:
         print(f"Erro de conexão com o banco: {e}")
         raise
-    finally:
-        if 'engine' in locals():
-            engine.dispose()
 
 def insert_initial_data():
     """Insere dados iniciais nas tabelas se estiverem vazias"""
-    db_url = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    
     try:
-        engine = create_engine(db_url, echo=SQL_ECHO)
-        with engine.connect() as conn:
+        with app_engine.connect() as conn:
             # Verificar se a tabela de produtos está vazia
             result = conn.execute(text("SELECT COUNT(*) FROM products"))
             if result.scalar() == 0:
@@ -119,23 +81,20 @@ def insert_initial_data():
             if result.scalar() == 0:
                 # Inserir clientes
                 conn.execute(text("""
-                    INSERT INTO clients (name, cpf)
-                    VALUES ('Client 1', '620.546.640-65');
+                    INSERT INTO clients (name, cpf, cpf_digits)
+                    VALUES ('Client 1', '620.546.640-65', '62054664065');
                 """))
                 conn.execute(text("""
-                    INSERT INTO clients (name, cpf)
-                    VALUES ('Client 2', '927.437.110-19');
+                    INSERT INTO clients (name, cpf, cpf_digits)
+                    VALUES ('Client 2', '927.437.110-19', '92743711019');
                 """))
                 conn.execute(text("""
-                    INSERT INTO clients (name, cpf)
-                    VALUES ('Client 3', '495.585.060-01');
+                    INSERT INTO clients (name, cpf, cpf_digits)
+                    VALUES ('Client 3', '495.585.060-01', '49558506001');
                 """))
                 print("Clientes iniciais inseridos com sucesso!")
             
             # Commit das transações
             conn.commit()
     except Exception as e:
-        print(f"Erro ao inserir dados iniciais: {e}")
-    finally:
-        if 'engine' in locals():
-            engine.dispose()
\ No newline at end of file
+        print(f"Erro ao inserir dados iniciais: {e}")
\ No newline at end of file
@@ -0,0 +1,119 @@
+import time
+from typing import Optional
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.idempotency import IDEMPOTENCY_LEASE, IDEMPOTENCY_TTL, StoredResponse
+from app.core.mysql_connection import get_db_session
+from app.domain.idempotency_model import IdempotencyKeyDB
+
+class IdempotencyRepository:
+    def __init__(self, db_session: Session):
+        self.db_session = db_session
+    
+    def get(self, key: str, now: float) -> Optional[StoredResponse]:
+        """
+        Return the completed, unexpired response stored for the key
+        """
+        row = self.db_session.execute(
+            select(IdempotencyKeyDB.fingerprint, IdempotencyKeyDB.status_code, IdempotencyKeyDB.body)
+            .where(IdempotencyKeyDB.idempotency_key == key)
+            .where(IdempotencyKeyDB.status_code.is_not(None))
+            .where(IdempotencyKeyDB.expires_at > now)
+        ).first()
+        if row is None:
+            return None
+        return StoredResponse(row.fingerprint, row.status_code, row.body.encode("utf-8"))
+    
+    def reserve(self, key: str, fingerprint: str, lease_until: float, now: float) -> bool:
+        """
+        Insert the key as in progress. Returns False when another request
+        holds it; an expired row (old response or abandoned lease) is
+        replaced.
+        """
+        for _ in range(2):
+            try:
+                self.db_session.execute(insert(IdempotencyKeyDB).values(
+                    idempotency_key=key, fingerprint=fingerprint, status_code=None, body=None, expires_at=lease_until
+                ))
+                self.db_session.commit()
+                return True
+            except IntegrityError:
+                self.db_session.rollback()
+            result = self.db_session.execute(
+                delete(IdempotencyKeyDB)
+                .where(IdempotencyKeyDB.idempotency_key == key)
+                .where(IdempotencyKeyDB.expires_at <= now)
+            )
+            self.db_session.commit()
+            if result.rowcount == 0:
+                return False
+        return False
+    
+    def complete(self, key: str, response: StoredResponse, expires_at: float) -> None:
+        """
+        Store the response of the request holding the key
+        """
+        self.db_session.execute(
+            update(IdempotencyKeyDB)
+            .where(IdempotencyKeyDB.idempotency_key == key)
+            .values(status_code=response.status_code, body=response.body.decode("utf-8"), expires_at=expires_at)
+        )
+        self.db_session.commit()
+    
+    def release(self, key: str) -> None:
+        """
+        Drop an in-progress key whose request failed, so it can be retried
+        """
+        self.db_session.execute(
+            delete(IdempotencyKeyDB)
+            .where(IdempotencyKeyDB.idempotency_key == key)
+            .where(IdempotencyKeyDB.status_code.is_(None))
+        )
+        self.db_session.commit()
+    
+    def purge_expired(self, now: float) -> int:
+        """
+        Delete the expired keys and return how many were removed
+        """
+        result = self.db_session.execute(delete(IdempotencyKeyDB).where(IdempotencyKeyDB.expires_at <= now))
+        self.db_session.commit()
+        return result.rowcount
+
+class DatabaseIdempotencyStore:
+    """
+    Idempotency store shared by every replica through the idempotency_keys
+    table. The primary key serializes requests with the same key across
+    processes; a lease lets a key held by a crashed replica be taken over.
+    """
+    blocking = True
+    
+    # Expired keys are purged once every this many completed requests
+    PURGE_EVERY = 100
+    
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL, lease: float = IDEMPOTENCY_LEASE):
+        self.ttl = ttl
+        self.lease = lease
+        self._completed = 0
+    
+    def get(self, key: str) -> Optional[StoredResponse]:
+        with get_db_session() as db:
+            return IdempotencyRepository(db).get(key, time.time())
+    
+    def reserve(self, key: str, fingerprint: str) -> bool:
+        now = time.time()
+        with get_db_session() as db:
+            return IdempotencyRepository(db).reserve(key, fingerprint, now + self.lease, now)
+    
+    def complete(self, key: str, response: StoredResponse) -> None:
+        now = time.time()
+        self._completed += 1
+        with get_db_session() as db:
+            repository = IdempotencyRepository(db)
+            repository.complete(key, response, now + self.ttl)
+            if self._completed % self.PURGE_EVERY == 0:
+                repository.purge_expired(now)
+    
+    def release(self, key: str) -> None:
+        with get_db_session() as db:
+            IdempotencyRepository(db).release(key)
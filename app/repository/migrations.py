@@ -0,0 +1,359 @@
+import argparse
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Mapping, Optional, Sequence, Set, Union
+from sqlalchemy import Connection, Engine, insert, inspect, select, text
+from app.core import mysql_connection
+from app.domain.client_model import normalize_cpf
+from app.domain.order_model import OrderDB, OrderItemDB, build_order_item_rows
+
+logger = logging.getLogger(__name__)
+
+# Table recording the applied schema versions
+MIGRATIONS_TABLE = "schema_migrations"
+
+# Named lock serializing replicas that migrate at the same time
+MIGRATION_LOCK_NAME = "fastfood_schema_migrations"
+MIGRATION_LOCK_TIMEOUT = 60
+
+# A migration step is a SQL statement or a function receiving the connection
+Step = Union[str, Callable[[Connection], None]]
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    steps: Sequence[Step]
+    # Replacement steps for other backends (e.g. "sqlite") whose DDL differs
+    dialect_steps: Mapping[str, Sequence[Step]] = field(default_factory=dict)
+    
+    def steps_for(self, dialect: str) -> Sequence[Step]:
+        return self.dialect_steps.get(dialect, self.steps)
+
+def create_index(name: str, table: str, columns: Sequence[str], unique: bool = False) -> Callable[[Connection], None]:
+    """
+    Step creating an index unless it already exists. MySQL has no
+    CREATE INDEX IF NOT EXISTS, and indexes added by hand are adopted
+    instead of failing the migration. Other backends are asked through
+    the SQLAlchemy inspector.
+    """
+    def step(conn: Connection) -> None:
+        if conn.dialect.name == "mysql":
+            exists = conn.execute(text(
+                "SELECT 1 FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :name LIMIT 1"
+            ), {"table": table, "name": name}).first()
+        else:
+            indexes = inspect(conn).get_indexes(table)
+            if unique:
+                indexes += inspect(conn).get_unique_constraints(table)
+            exists = any(index["name"] == name for index in indexes)
+        if not exists:
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            conn.execute(text(f"CREATE {kind} {name} ON {table} ({', '.join(columns)})"))
+    return step
+
+def add_column(table: str, column: str, definition: str) -> Callable[[Connection], None]:
+    """
+    Step adding a column unless it already exists, so a migration stopped
+    after the ALTER can run again (MySQL has no ADD COLUMN IF NOT EXISTS)
+    """
+    def step(conn: Connection) -> None:
+        if not any(existing["name"] == column for existing in inspect(conn).get_columns(table)):
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+    return step
+
+def backfill_cpf_digits(conn: Connection) -> None:
+    """
+    Fill clients.cpf_digits from the formatted CPF with the same
+    normalization the application uses for lookups
+    """
+    rows = conn.execute(text("SELECT id, cpf FROM clients WHERE cpf_digits IS NULL")).all()
+    if rows:
+        conn.execute(
+            text("UPDATE clients SET cpf_digits = :cpf_digits WHERE id = :id"),
+            [{"id": row.id, "cpf_digits": normalize_cpf(row.cpf)} for row in rows]
+        )
+
+# Orders read per round trip by the order_items backfill
+BACKFILL_BATCH_SIZE = 500
+
+def backfill_order_items(conn: Connection) -> None:
+    """
+    Write the order_items rows of the orders that have none yet from their
+    products JSON. Items that cannot be mapped (no or non-numeric product ID,
+    fractional quantity) stay only in the JSON rather than being truncated.
+    """
+    has_items = select(OrderItemDB.order_id).where(OrderItemDB.order_id == OrderDB.id).exists()
+    last_id = 0
+    while True:
+        orders = conn.execute(
+            select(OrderDB.id, OrderDB.products)
+            .where(OrderDB.id > last_id, ~has_items)
+            .order_by(OrderDB.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not orders:
+            return
+        rows = [
+            row
+            for order in orders
+            for row in build_order_item_rows(order.id, order.products or [], skip_invalid=True)
+        ]
+        if rows:
+            conn.execute(insert(OrderItemDB), rows)
+        last_id = orders[-1].id
+
+# Baseline schema, as created by the original migrations/03_create_tables.sql
+# and the Kubernetes init script. Databases created from those files already
+# match it, so its IF NOT EXISTS statements only build new databases.
+INITIAL_SCHEMA: List[Step] = [
+    """
+    CREATE TABLE IF NOT EXISTS products (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        category VARCHAR(100) NOT NULL,
+        price FLOAT NOT NULL,
+        description TEXT
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS clients (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        cpf VARCHAR(14) NOT NULL UNIQUE
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS orders (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        client_id INT NOT NULL,
+        total_price FLOAT NOT NULL,
+        status VARCHAR(50) NOT NULL,
+        products JSON NOT NULL,
+        FOREIGN KEY (client_id) REFERENCES clients(id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+]
+
+# Portable version of the baseline schema, for the SQLite profile
+SQLITE_INITIAL_SCHEMA: List[Step] = [
+    """
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name VARCHAR(255) NOT NULL,
+        category VARCHAR(100) NOT NULL,
+        price FLOAT NOT NULL,
+        description TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS clients (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name VARCHAR(255) NOT NULL,
+        cpf VARCHAR(14) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_id INTEGER NOT NULL,
+        total_price FLOAT NOT NULL,
+        status VARCHAR(50) NOT NULL,
+        products JSON NOT NULL,
+        FOREIGN KEY (client_id) REFERENCES clients(id)
+    )
+    """,
+]
+
+# Ordered schema history. Never edit an applied migration: append a new one.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial_schema", INITIAL_SCHEMA, {"sqlite": SQLITE_INITIAL_SCHEMA}),
+    # Canonical CPF (digits only) used by the identification lookup. SQLite
+    # cannot tighten a column in place, so it stays nullable there.
+    Migration(2, "clients_cpf_digits", [
+        add_column("clients", "cpf_digits", "CHAR(11) NULL"),
+        backfill_cpf_digits,
+        "ALTER TABLE clients MODIFY cpf_digits CHAR(11) NOT NULL",
+        create_index("ux_clients_cpf_digits", "clients", ["cpf_digits"], unique=True),
+    ], {"sqlite": [
+        add_column("clients", "cpf_digits", "CHAR(11) NULL"),
+        backfill_cpf_digits,
+        create_index("ux_clients_cpf_digits", "clients", ["cpf_digits"], unique=True),
+    ]}),
+    # Normalized line items of each order (the JSON column is kept for responses)
+    Migration(3, "order_items", [
+        """
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            order_id INT NOT NULL,
+            product_id INT NOT NULL,
+            quantity INT NOT NULL DEFAULT 1,
+            unit_price FLOAT NOT NULL DEFAULT 0,
+            KEY ix_order_items_order_id (order_id),
+            KEY ix_order_items_product_id_order_id (product_id, order_id),
+            FOREIGN KEY (order_id) REFERENCES orders(id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+        backfill_order_items,
+    ], {"sqlite": [
+        """
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 1,
+            unit_price FLOAT NOT NULL DEFAULT 0,
+            FOREIGN KEY (order_id) REFERENCES orders(id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_order_items_order_id ON order_items (order_id)",
+        "CREATE INDEX IF NOT EXISTS ix_order_items_product_id_order_id ON order_items (product_id, order_id)",
+        backfill_order_items,
+    ]}),
+    # Status filter and kitchen board: WHERE status = ? ORDER BY id
+    Migration(4, "orders_status_id_index", [
+        create_index("ix_orders_status_id", "orders", ["status", "id"]),
+    ]),
+    # Orders of a client, paginated by id; also serves the client_id foreign key
+    Migration(5, "orders_client_id_id_index", [
+        create_index("ix_orders_client_id_id", "orders", ["client_id", "id"]),
+    ]),
+    # Stored responses of POST /orders/ per Idempotency-Key (IDEMPOTENCY_STORE=database)
+    Migration(6, "idempotency_keys", [
+        """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            idempotency_key VARCHAR(255) PRIMARY KEY,
+            fingerprint CHAR(64) NOT NULL,
+            status_code INT NULL,
+            body MEDIUMTEXT NULL,
+            expires_at DOUBLE NOT NULL,
+            KEY ix_idempotency_keys_expires_at (expires_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """,
+    ], {"sqlite": [
+        """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            idempotency_key VARCHAR(255) PRIMARY KEY,
+            fingerprint CHAR(64) NOT NULL,
+            status_code INTEGER NULL,
+            body TEXT NULL,
+            expires_at DOUBLE NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at)",
+    ]}),
+    # Optimistic concurrency of status updates: UPDATE ... WHERE version = ?
+    Migration(7, "orders_version", [
+        add_column("orders", "version", "INT NOT NULL DEFAULT 0"),
+    ]),
+]
+
+def ensure_migrations_table(conn: Connection) -> None:
+    table_options = " ENGINE=InnoDB" if conn.dialect.name == "mysql" else ""
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ){table_options}
+    """))
+    conn.commit()
+
+def applied_versions(conn: Connection) -> Set[int]:
+    """
+    Return the schema versions already applied to the database
+    """
+    return set(conn.execute(text(f"SELECT version FROM {MIGRATIONS_TABLE}")).scalars())
+
+def pending_migrations(conn: Connection, migrations: Sequence[Migration] = MIGRATIONS) -> List[Migration]:
+    """
+    Return the migrations not applied yet, in version order
+    """
+    applied = applied_versions(conn)
+    return sorted((m for m in migrations if m.version not in applied), key=lambda m: m.version)
+
+def apply_migration(conn: Connection, migration: Migration) -> None:
+    """
+    Run the steps of a migration and record its version. MySQL commits DDL
+    implicitly, so steps must be safe to re-run if a migration stops halfway.
+    """
+    for step in migration.steps_for(conn.dialect.name):
+        if callable(step):
+            step(conn)
+        else:
+            conn.execute(text(step))
+    conn.execute(
+        text(f"INSERT INTO {MIGRATIONS_TABLE} (version, name) VALUES (:version, :name)"),
+        {"version": migration.version, "name": migration.name}
+    )
+    conn.commit()
+
+@contextmanager
+def migration_lock(conn: Connection) -> Iterator[None]:
+    """
+    Hold the MySQL named lock for the block. SQLite serializes writers on
+    its own and has no named locks.
+    """
+    if conn.dialect.name != "mysql":
+        yield
+        return
+    locked = conn.execute(
+        text("SELECT GET_LOCK(:name, :timeout)"),
+        {"name": MIGRATION_LOCK_NAME, "timeout": MIGRATION_LOCK_TIMEOUT}
+    ).scalar()
+    if locked != 1:
+        raise RuntimeError("Timed out waiting for the schema migration lock")
+    try:
+        yield
+    finally:
+        conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATION_LOCK_NAME})
+
+def run_migrations(engine: Optional[Engine] = None, migrations: Sequence[Migration] = MIGRATIONS) -> List[int]:
+    """
+    Apply the pending migrations and return their versions. A named lock
+    keeps replicas starting together from applying the same version twice.
+    Defaults to the application engine, which is also the only way to reach
+    an in-memory SQLite database.
+    """
+    engine = engine or mysql_connection.engine
+    applied = []
+    with engine.connect() as conn:
+        ensure_migrations_table(conn)
+        with migration_lock(conn):
+            for migration in pending_migrations(conn, migrations):
+                logger.info("Applying migration %s (%s)", migration.version, migration.name)
+                apply_migration(conn, migration)
+                applied.append(migration.version)
+    return applied
+
+def migration_status(engine: Optional[Engine] = None, migrations: Sequence[Migration] = MIGRATIONS) -> List[tuple]:
+    """
+    Return (version, name, applied) for every known migration
+    """
+    engine = engine or mysql_connection.engine
+    with engine.connect() as conn:
+        ensure_migrations_table(conn)
+        applied = applied_versions(conn)
+    return [(m.version, m.name, m.version in applied) for m in migrations]
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Command line entry point: python -m app.repository.migrations [upgrade|status]
+    """
+    parser = argparse.ArgumentParser(description="Manage the database schema version")
+    parser.add_argument("command", nargs="?", choices=["upgrade", "status"], default="upgrade")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "status":
+        for version, name, applied in migration_status():
+            print(f"{version:>4}  {'applied' if applied else 'pending':<8} {name}")
+        return
+    
+    versions = run_migrations()
+    print(f"Applied migrations: {versions}" if versions else "Schema is up to date")
+
+if __name__ == "__main__":
+    main()
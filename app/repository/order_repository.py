@@ -1,28 +1,91 @@
+from sqlalchemy import Row, select, insert, update, func
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
-from app.domain.order_model import OrderDB
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Dict, Any, Iterator, AsyncIterator
+from app.domain.order_model import OrderDB, OrderItemDB, OrderStatus, build_order_item_rows
+from app.core.pagination import keyset
+from app.exceptions import OrderStatusConflict
+
+# Read queries select plain columns instead of loading OrderDB entities: the
+# rows only feed response models, so identity-map tracking is wasted work.
+# The products JSON is the heavy column and is only read when asked for.
+ORDER_SUMMARY_COLUMNS = (OrderDB.id, OrderDB.client_id, OrderDB.total_price, OrderDB.status, OrderDB.version)
+ORDER_COLUMNS = ORDER_SUMMARY_COLUMNS + (OrderDB.products,)
+
+def _order_columns(include_products: bool) -> tuple:
+    return ORDER_COLUMNS if include_products else ORDER_SUMMARY_COLUMNS
+
+def _status_update(order_id: int, new_status: str, expected_version: Optional[int]):
+    """
+    Build the conditional UPDATE of a status change: it only matches while
+    the order is in a status allowed to move to new_status (and still at
+    expected_version when given), and bumps the version. A concurrent update
+    makes it match no row instead of being overwritten, without holding a
+    row lock between the read and the write.
+    """
+    allowed = [status.value for status in OrderStatus(new_status).previous_statuses()]
+    statement = update(OrderDB).where(OrderDB.id == order_id, OrderDB.status.in_(allowed))
+    if expected_version is not None:
+        statement = statement.where(OrderDB.version == expected_version)
+    return statement.values(status=new_status, version=OrderDB.version + 1)
+
+def _status_conflict(order_id: int, current: Optional[Row], new_status: str) -> Exception:
+    """
+    Explain why a status UPDATE matched no row: the order is gone, or it is
+    not in a status (or version) the change applies to
+    """
+    if current is None:
+        return ValueError(f"Order with ID {order_id} not found")
+    return OrderStatusConflict(order_id, current.status, current.version, OrderStatus(new_status).value)
 
 class OrderRepository:
     def __init__(self, db_session: Session):
         self.db_session = db_session
     
-    def get_all_orders(self) -> List[OrderDB]:
+    def get_all_orders(self, limit: Optional[int] = None, after_id: Optional[int] = None,
+                       include_products: bool = True) -> List[Row]:
         """
-        Retrieve all orders from the database
+        Retrieve order rows ordered by ID, after the given ID and up to limit rows
         """
-        return self.db_session.query(OrderDB).all()
+        query = self.db_session.query(*_order_columns(include_products))
+        return keyset(query, OrderDB.id, limit, after_id).all()
     
-    def get_orders_by_status(self, status: str) -> List[OrderDB]:
+    def get_orders_by_status(self, status: str, limit: Optional[int] = None, after_id: Optional[int] = None,
+                             include_products: bool = True) -> List[Row]:
         """
-        Retrieve orders filtered by status
+        Retrieve order rows filtered by status, ordered by ID and paginated like get_all_orders
         """
-        return self.db_session.query(OrderDB).filter(OrderDB.status == status).all()
+        query = self.db_session.query(*_order_columns(include_products)).filter(OrderDB.status == status)
+        return keyset(query, OrderDB.id, limit, after_id).all()
     
-    def get_order_by_id(self, order_id: int) -> Optional[OrderDB]:
+    def get_orders_by_statuses(self, statuses: List[str]) -> List[Row]:
         """
-        Retrieve an order by its ID
+        Retrieve every order row whose status is one of the given statuses
         """
-        return self.db_session.query(OrderDB).filter(OrderDB.id == order_id).first()
+        return self.db_session.query(*ORDER_COLUMNS).filter(OrderDB.status.in_(statuses)).order_by(OrderDB.id).all()
+    
+    def get_product_sales(self) -> List[Any]:
+        """
+        Aggregate the quantity and revenue sold per product from order_items
+        """
+        return self.db_session.query(
+            OrderItemDB.product_id,
+            func.sum(OrderItemDB.quantity).label("quantity"),
+            func.sum(OrderItemDB.quantity * OrderItemDB.unit_price).label("revenue")
+        ).group_by(OrderItemDB.product_id).order_by(OrderItemDB.product_id).all()
+    
+    def stream_orders(self, batch_size: int = 500) -> Iterator[Row]:
+        """
+        Stream every order row ordered by ID through a server-side cursor,
+        fetching batch_size rows at a time
+        """
+        yield from self.db_session.query(*ORDER_COLUMNS).order_by(OrderDB.id).yield_per(batch_size)
+    
+    def get_order_by_id(self, order_id: int) -> Optional[Row]:
+        """
+        Retrieve an order row by its ID
+        """
+        return self.db_session.query(*ORDER_COLUMNS).filter(OrderDB.id == order_id).first()
     
     def create_order(self, order_data: Dict[str, Any]) -> OrderDB:
         """
@@ -30,22 +93,165 @@ class OrderRepository:
         """
         new_order = OrderDB(**order_data)
         self.db_session.add(new_order)
+        
+        # Flush to get the order ID, then write its line items in one multi-row INSERT
+        self.db_session.flush()
+        item_rows = build_order_item_rows(new_order.id, order_data["products"])
+        if item_rows:
+            self.db_session.execute(insert(OrderItemDB).values(item_rows))
+        
         self.db_session.commit()
-        self.db_session.refresh(new_order)
         return new_order
     
-    def update_order_status(self, order_id: int, new_status: str) -> OrderDB:
+    def create_orders(self, orders_data: List[Dict[str, Any]]) -> List[int]:
         """
-        Update an order's status
+        Create several orders and their line items in a single transaction,
+        returning the generated IDs in the same order
         """
-        order = self.db_session.query(OrderDB).filter(OrderDB.id == order_id).first()
-        if not order:
-            raise ValueError(f"Order with ID {order_id} not found")
+        new_orders = [OrderDB(**order_data) for order_data in orders_data]
+        self.db_session.add_all(new_orders)
+        self.db_session.flush()
         
-        # Update status
-        order.status = new_status
+        # Line items of the whole batch go in one multi-row INSERT
+        item_rows = [
+            row
+            for order, order_data in zip(new_orders, orders_data)
+            for row in build_order_item_rows(order.id, order_data["products"])
+        ]
+        if item_rows:
+            self.db_session.execute(insert(OrderItemDB).values(item_rows))
         
-        # Commit changes
+        order_ids = [order.id for order in new_orders]
         self.db_session.commit()
-        self.db_session.refresh(order)
+        return order_ids
+    
+    def update_order_status(self, order_id: int, new_status: str, expected_version: Optional[int] = None) -> Row:
+        """
+        Update an order's status with a single conditional UPDATE, then read
+        the order back once for the response. Raises ValueError when the order
+        does not exist and OrderStatusConflict when the transition is not
+        allowed or the version moved on.
+        """
+        result = self.db_session.execute(_status_update(order_id, new_status, expected_version))
+        if result.rowcount == 0:
+            current = self.get_order_by_id(order_id)
+            self.db_session.rollback()
+            raise _status_conflict(order_id, current, new_status)
+        
+        order = self.get_order_by_id(order_id)
+        self.db_session.commit()
+        return order
+
+class AsyncOrderRepository:
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+    
+    async def get_all_orders(self, limit: Optional[int] = None, after_id: Optional[int] = None,
+                             include_products: bool = True) -> List[Row]:
+        """
+        Retrieve order rows ordered by ID, after the given ID and up to limit rows
+        """
+        query = select(*_order_columns(include_products))
+        result = await self.db_session.execute(keyset(query, OrderDB.id, limit, after_id))
+        return list(result.all())
+    
+    async def get_orders_by_status(self, status: str, limit: Optional[int] = None, after_id: Optional[int] = None,
+                                   include_products: bool = True) -> List[Row]:
+        """
+        Retrieve order rows filtered by status, ordered by ID and paginated like get_all_orders
+        """
+        query = select(*_order_columns(include_products)).where(OrderDB.status == status)
+        result = await self.db_session.execute(keyset(query, OrderDB.id, limit, after_id))
+        return list(result.all())
+    
+    async def get_orders_by_statuses(self, statuses: List[str]) -> List[Row]:
+        """
+        Retrieve every order row whose status is one of the given statuses
+        """
+        query = select(*ORDER_COLUMNS).where(OrderDB.status.in_(statuses)).order_by(OrderDB.id)
+        result = await self.db_session.execute(query)
+        return list(result.all())
+    
+    async def get_product_sales(self) -> List[Any]:
+        """
+        Aggregate the quantity and revenue sold per product from order_items
+        """
+        query = select(
+            OrderItemDB.product_id,
+            func.sum(OrderItemDB.quantity).label("quantity"),
+            func.sum(OrderItemDB.quantity * OrderItemDB.unit_price).label("revenue")
+        ).group_by(OrderItemDB.product_id).order_by(OrderItemDB.product_id)
+        result = await self.db_session.execute(query)
+        return list(result.all())
+    
+    async def stream_orders(self, batch_size: int = 500) -> AsyncIterator[Row]:
+        """
+        Stream every order row ordered by ID through a server-side cursor,
+        fetching batch_size rows at a time
+        """
+        query = select(*ORDER_COLUMNS).order_by(OrderDB.id).execution_options(yield_per=batch_size)
+        result = await self.db_session.stream(query)
+        async for order in result:
+            yield order
+    
+    async def get_order_by_id(self, order_id: int) -> Optional[Row]:
+        """
+        Retrieve an order row by its ID
+        """
+        result = await self.db_session.execute(select(*ORDER_COLUMNS).where(OrderDB.id == order_id))
+        return result.first()
+    
+    async def create_order(self, order_data: Dict[str, Any]) -> OrderDB:
+        """
+        Create a new order in the database
+        """
+        new_order = OrderDB(**order_data)
+        self.db_session.add(new_order)
+        
+        # Flush to get the order ID, then write its line items in one multi-row INSERT
+        await self.db_session.flush()
+        item_rows = build_order_item_rows(new_order.id, order_data["products"])
+        if item_rows:
+            await self.db_session.execute(insert(OrderItemDB).values(item_rows))
+        
+        await self.db_session.commit()
+        return new_order
+    
+    async def create_orders(self, orders_data: List[Dict[str, Any]]) -> List[int]:
+        """
+        Create several orders and their line items in a single transaction,
+        returning the generated IDs in the same order
+        """
+        new_orders = [OrderDB(**order_data) for order_data in orders_data]
+        self.db_session.add_all(new_orders)
+        await self.db_session.flush()
+        
+        # Line items of the whole batch go in one multi-row INSERT
+        item_rows = [
+            row
+            for order, order_data in zip(new_orders, orders_data)
+            for row in build_order_item_rows(order.id, order_data["products"])
+        ]
+        if item_rows:
+            await self.db_session.execute(insert(OrderItemDB).values(item_rows))
+        
+        order_ids = [order.id for order in new_orders]
+        await self.db_session.commit()
+        return order_ids
+    
+    async def update_order_status(self, order_id: int, new_status: str, expected_version: Optional[int] = None) -> Row:
+        """
+        Update an order's status with a single conditional UPDATE, then read
+        the order back once for the response. Raises ValueError when the order
+        does not exist and OrderStatusConflict when the transition is not
+        allowed or the version moved on.
+        """
+        result = await self.db_session.execute(_status_update(order_id, new_status, expected_version))
+        if result.rowcount == 0:
+            current = await self.get_order_by_id(order_id)
+            await self.db_session.rollback()
+            raise _status_conflict(order_id, current, new_status)
+        
+        order = await self.get_order_by_id(order_id)
+        await self.db_session.commit()
         return order
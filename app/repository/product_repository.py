@@ -1,22 +1,64 @@
+from sqlalchemy import Row, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
 from app.domain.product_model import ProductDB
+from app.core.pagination import keyset
+from app.core.mysql_connection import PRIMARY_READ
+
+# Columns overwritten when an imported product already exists
+UPSERT_COLUMNS = ("name", "category", "price", "description")
+
+def upsert_products_statement(rows: List[Dict[str, Any]], dialect: str = "mysql"):
+    """
+    Build a multi-row INSERT ... ON DUPLICATE KEY UPDATE for the given rows
+    (INSERT ... ON CONFLICT DO UPDATE on SQLite). Rows with a NULL ID get a
+    new auto-increment ID; the others overwrite the product with that ID.
+    """
+    if dialect == "sqlite":
+        statement = sqlite_insert(ProductDB).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=[ProductDB.id],
+            set_={column: statement.excluded[column] for column in UPSERT_COLUMNS}
+        )
+    statement = mysql_insert(ProductDB).values(rows)
+    return statement.on_duplicate_key_update({
+        column: statement.inserted[column]
+        for column in UPSERT_COLUMNS
+    })
+
+# Columns selected by the read queries, returned as plain rows instead of
+# tracked ProductDB entities
+PRODUCT_COLUMNS = (ProductDB.id, ProductDB.name, ProductDB.category, ProductDB.price, ProductDB.description)
+
+def _on_primary(query: Any, primary: bool) -> Any:
+    """
+    Keep a Query or select() statement on the primary when primary is set
+    """
+    return query.execution_options(**{PRIMARY_READ: True}) if primary else query
 
 class ProductRepository:
     def __init__(self, db_session: Session):
         self.db_session = db_session
     
-    def get_all_products(self) -> List[ProductDB]:
+    def get_all_products(self, limit: Optional[int] = None, after_id: Optional[int] = None,
+                         primary: bool = False) -> List[Row]:
         """
-        Retrieve all products from the database
+        Retrieve product rows ordered by ID, after the given ID and up to limit
+        rows. With primary, read them from the primary, never the replica.
         """
-        return self.db_session.query(ProductDB).all()
+        query = keyset(self.db_session.query(*PRODUCT_COLUMNS), ProductDB.id, limit, after_id)
+        return _on_primary(query, primary).all()
     
-    def get_product_by_id(self, product_id: int) -> Optional[ProductDB]:
+    def get_product_by_id(self, product_id: int, primary: bool = False) -> Optional[Row]:
         """
-        Retrieve a product by its ID
+        Retrieve a product row by its ID. With primary, read it from the
+        primary, never the replica.
         """
-        return self.db_session.query(ProductDB).filter(ProductDB.id == product_id).first()
+        query = self.db_session.query(*PRODUCT_COLUMNS).filter(ProductDB.id == product_id)
+        return _on_primary(query, primary).first()
     
     def create_product(self, product_data: dict) -> ProductDB:
         """
@@ -25,22 +67,84 @@ class ProductRepository:
         new_product = ProductDB(**product_data)
         self.db_session.add(new_product)
         self.db_session.commit()
-        self.db_session.refresh(new_product)
         return new_product
         
+    def upsert_products(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert or update a batch of products with a single statement
+        """
+        self.db_session.execute(upsert_products_statement(rows, self.db_session.get_bind().dialect.name))
+        self.db_session.commit()
+    
     def update_product(self, product_id: int, product_data: dict) -> ProductDB:
         """
-        Update an existing product in the database
+        Update an existing product with a single conditional UPDATE. When
+        every column is written the product is built from the data; a partial
+        update reads the product back for the columns it left unchanged.
         """
-        product = self.db_session.query(ProductDB).filter(ProductDB.id == product_id).first()
-        if not product:
+        result = self.db_session.execute(
+            update(ProductDB).where(ProductDB.id == product_id).values(**product_data)
+        )
+        if result.rowcount == 0:
             raise ValueError(f"Product with ID {product_id} not found")
         
-        # Update product attributes
-        for key, value in product_data.items():
-            setattr(product, key, value)
-        
-        # Commit changes
         self.db_session.commit()
-        self.db_session.refresh(product)
-        return product
+        if set(UPSERT_COLUMNS) <= product_data.keys():
+            return ProductDB(id=product_id, **product_data)
+        return self.db_session.get(ProductDB, product_id)
+
+class AsyncProductRepository:
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+    
+    async def get_all_products(self, limit: Optional[int] = None, after_id: Optional[int] = None,
+                               primary: bool = False) -> List[Row]:
+        """
+        Retrieve product rows ordered by ID, after the given ID and up to limit
+        rows. With primary, read them from the primary, never the replica.
+        """
+        statement = keyset(select(*PRODUCT_COLUMNS), ProductDB.id, limit, after_id)
+        result = await self.db_session.execute(_on_primary(statement, primary))
+        return list(result.all())
+    
+    async def get_product_by_id(self, product_id: int, primary: bool = False) -> Optional[Row]:
+        """
+        Retrieve a product row by its ID. With primary, read it from the
+        primary, never the replica.
+        """
+        statement = select(*PRODUCT_COLUMNS).where(ProductDB.id == product_id)
+        result = await self.db_session.execute(_on_primary(statement, primary))
+        return result.first()
+    
+    async def create_product(self, product_data: dict) -> ProductDB:
+        """
+        Create a new product in the database
+        """
+        new_product = ProductDB(**product_data)
+        self.db_session.add(new_product)
+        await self.db_session.commit()
+        return new_product
+        
+    async def upsert_products(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert or update a batch of products with a single statement
+        """
+        await self.db_session.execute(upsert_products_statement(rows, self.db_session.get_bind().dialect.name))
+        await self.db_session.commit()
+    
+    async def update_product(self, product_id: int, product_data: dict) -> ProductDB:
+        """
+        Update an existing product with a single conditional UPDATE. When
+        every column is written the product is built from the data; a partial
+        update reads the product back for the columns it left unchanged.
+        """
+        result = await self.db_session.execute(
+            update(ProductDB).where(ProductDB.id == product_id).values(**product_data)
+        )
+        if result.rowcount == 0:
+            raise ValueError(f"Product with ID {product_id} not found")
+        
+        await self.db_session.commit()
+        if set(UPSERT_COLUMNS) <= product_data.keys():
+            return ProductDB(id=product_id, **product_data)
+        return await self.db_session.get(ProductDB, product_id)
@@ -1,20 +1,48 @@
 from sqlalchemy.orm import Session
-from typing import List
-from app.repository.client_repository import ClientRepository
-from app.domain.client_model import ClientResponse, ClientListResponse, ClientCreate, ClientUpdate, ClientTokenResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.repository.client_repository import ClientRepository, AsyncClientRepository
+from app.core.codec import from_row
+from app.core.pagination import DEFAULT_PAGE_SIZE, split_page
+from app.domain.client_model import ClientDB, ClientResponse, ClientListResponse, ClientCreate, ClientUpdate, ClientTokenResponse
 from app.core.jwt import create_access_token
 
+def build_client_token_response(client: ClientDB) -> ClientTokenResponse:
+    """
+    Generate a JWT token for the client and return it with the client data
+    """
+    # Create token data with client information
+    token_data = {
+        "sub": str(client.id),
+        "cpf": client.cpf,
+        "name": client.name,
+        "role": "client"  # Assuming default role for clients
+    }
+    
+    # Generate JWT token
+    token = create_access_token(token_data)
+    
+    # Create response with client data and token
+    client_response = from_row(ClientResponse, client)
+    return ClientTokenResponse(
+        **client_response.model_dump(),
+        token=token
+    )
+
 class ClientService:
     def __init__(self, db_session: Session):
         self.repository = ClientRepository(db_session)
     
-    def get_all_clients(self) -> ClientListResponse:
+    def get_all_clients(self, limit: int = DEFAULT_PAGE_SIZE, after_id: Optional[int] = None) -> ClientListResponse:
         """
-        Get all clients and return them as a response model
+        Get a page of clients and return them as a response model
         """
-        clients = self.repository.get_all_clients()
+        # Fetch one extra row to know whether there is a next page
+        rows = self.repository.get_all_clients(limit + 1, after_id)
+        clients, next_cursor = split_page(rows, limit)
         return ClientListResponse(
-            clients=[ClientResponse.model_validate(client) for client in clients]
+            clients=[from_row(ClientResponse, client) for client in clients],
+            next_cursor=next_cursor
         )
     
     def get_client_by_id(self, client_id: int) -> ClientResponse:
@@ -24,7 +52,7 @@ class ClientService:
         client = self.repository.get_client_by_id(client_id)
         if not client:
             raise ValueError(f"Client with ID {client_id} not found")
-        return ClientResponse.model_validate(client)
+        return from_row(ClientResponse, client)
     
     def get_client_by_cpf(self, cpf: str) -> ClientTokenResponse:
         """
@@ -33,24 +61,7 @@ class ClientService:
         client = self.repository.get_client_by_cpf(cpf)
         if not client:
             raise ValueError(f"Client with CPF {cpf} not found")
-        
-        # Create token data with client information
-        token_data = {
-            "sub": str(client.id),
-            "cpf": client.cpf,
-            "name": client.name,
-            "role": "client"  # Assuming default role for clients
-        }
-        
-        # Generate JWT token
-        token = create_access_token(token_data)
-        
-        # Create response with client data and token
-        client_response = ClientResponse.model_validate(client)
-        return ClientTokenResponse(
-            **client_response.model_dump(),
-            token=token
-        )
+        return build_client_token_response(client)
     
     def create_client(self, client_data: ClientCreate) -> ClientResponse:
         """
@@ -59,20 +70,65 @@ class ClientService:
         # Convert Pydantic model to dict for the repository
         client_dict = client_data.model_dump()
         client = self.repository.create_client(client_dict)
-        return ClientResponse.model_validate(client)
+        return from_row(ClientResponse, client)
         
     def update_client(self, client_id: int, client_data: ClientUpdate) -> ClientResponse:
         """
         Update an existing client's name
         """
-        # Check if the client exists
-        existing_client = self.repository.get_client_by_id(client_id)
-        if not existing_client:
+        # The repository raises ValueError when the client does not exist
+        client_dict = client_data.model_dump()
+        updated_client = self.repository.update_client(client_id, client_dict)
+        return from_row(ClientResponse, updated_client)
+
+class AsyncClientService:
+    def __init__(self, db_session: AsyncSession):
+        self.repository = AsyncClientRepository(db_session)
+    
+    async def get_all_clients(self, limit: int = DEFAULT_PAGE_SIZE, after_id: Optional[int] = None) -> ClientListResponse:
+        """
+        Get a page of clients and return them as a response model
+        """
+        # Fetch one extra row to know whether there is a next page
+        rows = await self.repository.get_all_clients(limit + 1, after_id)
+        clients, next_cursor = split_page(rows, limit)
+        return ClientListResponse(
+            clients=[from_row(ClientResponse, client) for client in clients],
+            next_cursor=next_cursor
+        )
+    
+    async def get_client_by_id(self, client_id: int) -> ClientResponse:
+        """
+        Get a client by its ID
+        """
+        client = await self.repository.get_client_by_id(client_id)
+        if not client:
             raise ValueError(f"Client with ID {client_id} not found")
-        
+        return from_row(ClientResponse, client)
+    
+    async def get_client_by_cpf(self, cpf: str) -> ClientTokenResponse:
+        """
+        Get a client by CPF and generate a JWT token
+        """
+        client = await self.repository.get_client_by_cpf(cpf)
+        if not client:
+            raise ValueError(f"Client with CPF {cpf} not found")
+        return build_client_token_response(client)
+    
+    async def create_client(self, client_data: ClientCreate) -> ClientResponse:
+        """
+        Create a new client
+        """
         # Convert Pydantic model to dict for the repository
         client_dict = client_data.model_dump()
+        client = await self.repository.create_client(client_dict)
+        return from_row(ClientResponse, client)
         
-        # Update the client
-        updated_client = self.repository.update_client(client_id, client_dict)
-        return ClientResponse.model_validate(updated_client)
+    async def update_client(self, client_id: int, client_data: ClientUpdate) -> ClientResponse:
+        """
+        Update an existing client's name
+        """
+        # The repository raises ValueError when the client does not exist
+        client_dict = client_data.model_dump()
+        updated_client = await self.repository.update_client(client_id, client_dict)
+        return from_row(ClientResponse, updated_client)
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+from app.domain.order_model import OrderResponse, OrderStatus
+
+# Load environment variables
+load_dotenv()
+
+# Orders shown on the kitchen board, in display priority
+KITCHEN_STATUS_PRIORITY = {
+    OrderStatus.READY.value: 0,
+    OrderStatus.PREPARING.value: 1,
+    OrderStatus.RECEIVED.value: 2,
+}
+ACTIVE_STATUSES = list(KITCHEN_STATUS_PRIORITY)
+
+class KitchenQueue:
+    """
+    In-memory board of active orders, ordered by status priority and then by
+    age (order ID).
+
+    It is loaded from the database once and then kept current by the order
+    service writes of this process. Writes made by other replicas are picked up
+    by reloading when the board is older than max_age seconds (0 disables it).
+
+    Updates of one order may reach the board out of commit order, so each
+    order's last applied version is kept, also after the order left the
+    kitchen, and an update with a lower version is ignored. A reload resets
+    those versions to the loaded orders.
+    """
+    def __init__(self, max_age: float = 0):
+        self.max_age = max_age
+        self._orders: Dict[int, OrderResponse] = {}
+        self._versions: Dict[int, int] = {}
+        self._snapshot: Optional[List[OrderResponse]] = None
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+    
+    def needs_reload(self) -> bool:
+        """
+        True when the board was never loaded or is older than max_age
+        """
+        if self._loaded_at is None:
+            return True
+        return self.max_age > 0 and time.monotonic() - self._loaded_at > self.max_age
+    
+    def load(self, orders: Iterable[OrderResponse]) -> None:
+        """
+        Replace the board with the given orders
+        """
+        active = {order.id: order for order in orders if order.status in KITCHEN_STATUS_PRIORITY}
+        with self._lock:
+            self._orders = active
+            self._versions = {order.id: order.version for order in active.values() if order.version is not None}
+            self._snapshot = None
+            self._loaded_at = time.monotonic()
+    
+    def upsert(self, order: OrderResponse) -> None:
+        """
+        Apply a created or updated order, dropping it once it leaves the kitchen.
+        An update older than the one already applied is ignored.
+        """
+        with self._lock:
+            if order.version is not None:
+                if order.version < self._versions.get(order.id, order.version):
+                    return
+                self._versions[order.id] = order.version
+            if order.status in KITCHEN_STATUS_PRIORITY:
+                self._orders[order.id] = order
+            else:
+                self._orders.pop(order.id, None)
+            self._snapshot = None
+    
+    def snapshot(self) -> List[OrderResponse]:
+        """
+        Return the active orders sorted for display
+        """
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = sorted(
+                    self._orders.values(),
+                    key=lambda order: (KITCHEN_STATUS_PRIORITY[order.status], order.id)
+                )
+            return self._snapshot
+    
+    def clear(self) -> None:
+        """
+        Forget every order and mark the board as not loaded
+        """
+        with self._lock:
+            self._orders = {}
+            self._versions = {}
+            self._snapshot = None
+            self._loaded_at = None
+
+kitchen_queue = KitchenQueue(max_age=float(os.getenv("KITCHEN_QUEUE_MAX_AGE", "5")))
@@ -1,30 +1,178 @@
+import csv
+import io
+import json
+import os
 from sqlalchemy.orm import Session
-from typing import Optional
-from app.repository.order_repository import OrderRepository
-from app.domain.order_model import OrderResponse, OrderListResponse, OrderCreate, OrderStatusUpdate
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional, Iterator, AsyncIterator, Set, Tuple
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from app.core.broadcaster import Broadcaster, Event
+from app.core.mysql_connection import get_db_session, AsyncSessionLocal, DB_ASYNC
+from app.repository.order_repository import OrderRepository, AsyncOrderRepository
+from app.repository.client_repository import ClientRepository, AsyncClientRepository
+from app.exceptions import OrderBatchError
+from app.service.kitchen_queue import kitchen_queue, ACTIVE_STATUSES
+from app.core.codec import from_row
+from app.core.pagination import DEFAULT_PAGE_SIZE, split_page
+from app.core.validation import validation_message
+from app.domain.order_model import OrderDB, OrderResponse, OrderListResponse, OrderCreate, OrderStatusUpdate, OrderExportFormat, ProductSales, ProductSalesResponse, OrderBatchCreate, OrderBatchItemResult, OrderBatchResponse
+
+# Load environment variables
+load_dotenv()
+
+# Pushes order creations and status changes to the subscribed screens
+order_events = Broadcaster(queue_size=int(os.getenv("ORDER_EVENTS_QUEUE_SIZE", "100")))
+
+# Number of rows fetched per round trip and written per chunk by the exports
+EXPORT_BATCH_SIZE = 500
+
+CSV_EXPORT_HEADER = "id,client_id,total_price,status,products\r\n"
+
+def serialize_order(order: OrderDB, export_format: OrderExportFormat) -> str:
+    """
+    Serialize a single order as an NDJSON line or a CSV row
+    """
+    response = from_row(OrderResponse, order)
+    if export_format == OrderExportFormat.CSV:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow([
+            response.id,
+            response.client_id,
+            response.total_price,
+            response.status,
+            json.dumps(response.products, ensure_ascii=False)
+        ])
+        return buffer.getvalue()
+    return response.model_dump_json() + "\n"
+
+def _order_committed(event_name: str, order: OrderResponse) -> None:
+    """
+    Propagate a committed order to the kitchen board and the event subscribers
+    """
+    kitchen_queue.upsert(order)
+    order_events.publish(Event(event_name, order.model_dump(mode="json")))
+
+def _validate_batch_items(raw_orders: List[Dict[str, Any]]) -> Tuple[List[Tuple[int, OrderCreate]], Dict[int, OrderBatchItemResult]]:
+    """
+    Validate each batch item against OrderCreate, keeping the valid ones with
+    their position and a failed result for the others. OrderCreate also
+    checks the line items map to order_items rows, so a bad product id fails
+    its own item here instead of the whole insert.
+    """
+    valid = []
+    failed = {}
+    for index, raw_order in enumerate(raw_orders):
+        try:
+            valid.append((index, OrderCreate.model_validate(raw_order)))
+        except ValidationError as e:
+            failed[index] = OrderBatchItemResult(index=index, error=validation_message(e))
+    return valid, failed
+
+def _reject_unknown_clients(valid: List[Tuple[int, OrderCreate]], existing_client_ids: Set[int],
+                            failed: Dict[int, OrderBatchItemResult]) -> List[Tuple[int, OrderCreate]]:
+    """
+    Move the items whose client does not exist to the failed results
+    """
+    accepted = []
+    for index, order in valid:
+        if order.client_id in existing_client_ids:
+            accepted.append((index, order))
+        else:
+            failed[index] = OrderBatchItemResult(index=index, error=f"Client with ID {order.client_id} not found")
+    return accepted
+
+def _batch_response(accepted: List[Tuple[int, OrderCreate]], order_ids: List[int],
+                    failed: Dict[int, OrderBatchItemResult]) -> OrderBatchResponse:
+    """
+    Announce the created orders and build the per-item batch results
+    """
+    results = dict(failed)
+    for (index, order), order_id in zip(accepted, order_ids):
+        # New rows start at version 0 (the column default)
+        _order_committed("order_created", OrderResponse(id=order_id, version=0, **order.model_dump()))
+        results[index] = OrderBatchItemResult(index=index, id=order_id)
+    return OrderBatchResponse(
+        created=len(order_ids),
+        failed=len(failed),
+        results=[results[index] for index in sorted(results)]
+    )
 
 class OrderService:
     def __init__(self, db_session: Session):
         self.repository = OrderRepository(db_session)
+        self.client_repository = ClientRepository(db_session)
     
-    def get_all_orders(self) -> OrderListResponse:
+    def get_all_orders(self, limit: int = DEFAULT_PAGE_SIZE, after_id: Optional[int] = None,
+                       include_products: bool = True) -> OrderListResponse:
         """
-        Get all orders and return them as a response model
+        Get a page of orders and return them as a response model, leaving
+        out the products of each order unless include_products is set
         """
-        orders = self.repository.get_all_orders()
+        # Fetch one extra row to know whether there is a next page
+        rows = self.repository.get_all_orders(limit + 1, after_id, include_products)
+        orders, next_cursor = split_page(rows, limit)
         return OrderListResponse(
-            orders=[OrderResponse.model_validate(order) for order in orders]
+            orders=[from_row(OrderResponse, order) for order in orders],
+            next_cursor=next_cursor
         )
     
-    def get_orders_by_status(self, status: str) -> OrderListResponse:
+    def get_orders_by_status(self, status: str, limit: int = DEFAULT_PAGE_SIZE, after_id: Optional[int] = None,
+                             include_products: bool = True) -> OrderListResponse:
         """
-        Get orders filtered by status
+        Get a page of orders filtered by status
         """
-        orders = self.repository.get_orders_by_status(status)
+        # Fetch one extra row to know whether there is a next page
+        rows = self.repository.get_orders_by_status(status, limit + 1, after_id, include_products)
+        orders, next_cursor = split_page(rows, limit)
         return OrderListResponse(
-            orders=[OrderResponse.model_validate(order) for order in orders]
+            orders=[from_row(OrderResponse, order) for order in orders],
+            next_cursor=next_cursor
         )
     
+    def export_orders(self, export_format: OrderExportFormat) -> Iterator[str]:
+        """
+        Export every order row by row, yielding chunks of EXPORT_BATCH_SIZE rows
+        """
+        if export_format == OrderExportFormat.CSV:
+            yield CSV_EXPORT_HEADER
+        
+        chunk = []
+        for order in self.repository.stream_orders(EXPORT_BATCH_SIZE):
+            chunk.append(serialize_order(order, export_format))
+            if len(chunk) >= EXPORT_BATCH_SIZE:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+    
+    def get_product_sales(self) -> ProductSalesResponse:
+        """
+        Get the quantity and revenue sold per product
+        """
+        rows = self.repository.get_product_sales()
+        return ProductSalesResponse(products=[
+            ProductSales(product_id=row.product_id, quantity=row.quantity, revenue=row.revenue)
+            for row in rows
+        ])
+    
+    def get_kitchen_queue(self) -> OrderListResponse:
+        """
+        Get the active orders for the kitchen board from memory, reloading
+        them from the database only when the board is missing or too old
+        """
+        if kitchen_queue.needs_reload():
+            self.refresh_kitchen_queue()
+        return OrderListResponse(orders=kitchen_queue.snapshot())
+    
+    def refresh_kitchen_queue(self) -> None:
+        """
+        Load the active orders into the kitchen board
+        """
+        orders = self.repository.get_orders_by_statuses(ACTIVE_STATUSES)
+        kitchen_queue.load(from_row(OrderResponse, order) for order in orders)
+    
     def get_order_by_id(self, order_id: int) -> OrderResponse:
         """
         Get an order by its ID
@@ -32,7 +180,7 @@ class OrderService:
         order = self.repository.get_order_by_id(order_id)
         if not order:
             raise ValueError(f"Order with ID {order_id} not found")
-        return OrderResponse.model_validate(order)
+        return from_row(OrderResponse, order)
     
     def create_order(self, order_data: OrderCreate) -> OrderResponse:
         """
@@ -41,17 +189,174 @@ class OrderService:
         # Convert Pydantic model to dict for the repository
         order_dict = order_data.model_dump()
         order = self.repository.create_order(order_dict)
-        return OrderResponse.model_validate(order)
+        response = from_row(OrderResponse, order)
+        _order_committed("order_created", response)
+        return response
+    
+    def create_orders_batch(self, batch: OrderBatchCreate) -> OrderBatchResponse:
+        """
+        Validate a batch of orders together and insert the valid ones in a
+        single transaction. With batch.atomic, any invalid item rejects the
+        whole batch and nothing is inserted.
+        """
+        valid, failed = _validate_batch_items(batch.orders)
+        
+        # Check every referenced client with one query
+        client_ids = {order.client_id for _, order in valid}
+        existing_client_ids = self.client_repository.get_existing_client_ids(client_ids) if client_ids else set()
+        accepted = _reject_unknown_clients(valid, existing_client_ids, failed)
+        
+        if failed and batch.atomic:
+            raise OrderBatchError([failed[index] for index in sorted(failed)])
+        
+        order_ids = self.repository.create_orders([order.model_dump() for _, order in accepted]) if accepted else []
+        return _batch_response(accepted, order_ids, failed)
     
     def update_order_status(self, order_id: int, status_data: OrderStatusUpdate) -> OrderResponse:
         """
         Update an order's status
         """
-        # Check if the order exists
-        existing_order = self.repository.get_order_by_id(order_id)
-        if not existing_order:
+        # The repository raises ValueError when the order does not exist and
+        # OrderStatusConflict when another update got there first
+        updated_order = self.repository.update_order_status(order_id, status_data.status, status_data.version)
+        response = from_row(OrderResponse, updated_order)
+        _order_committed("order_status_updated", response)
+        return response
+
+class AsyncOrderService:
+    def __init__(self, db_session: AsyncSession):
+        self.repository = AsyncOrderRepository(db_session)
+        self.client_repository = AsyncClientRepository(db_session)
+    
+    async def get_all_orders(self, limit: int = DEFAULT_PAGE_SIZE, after_id: Optional[int] = None,
+                             include_products: bool = True) -> OrderListResponse:
+        """
+        Get a page of orders and return them as a response model, leaving
+        out the products of each order unless include_products is set
+        """
+        # Fetch one extra row to know whether there is a next page
+        rows = await self.repository.get_all_orders(limit + 1, after_id, include_products)
+        orders, next_cursor = split_page(rows, limit)
+        return OrderListResponse(
+            orders=[from_row(OrderResponse, order) for order in orders],
+            next_cursor=next_cursor
+        )
+    
+    async def get_orders_by_status(self, status: str, limit: int = DEFAULT_PAGE_SIZE, after_id: Optional[int] = None,
+                                   include_products: bool = True) -> OrderListResponse:
+        """
+        Get a page of orders filtered by status
+        """
+        # Fetch one extra row to know whether there is a next page
+        rows = await self.repository.get_orders_by_status(status, limit + 1, after_id, include_products)
+        orders, next_cursor = split_page(rows, limit)
+        return OrderListResponse(
+            orders=[from_row(OrderResponse, order) for order in orders],
+            next_cursor=next_cursor
+        )
+    
+    async def export_orders(self, export_format: OrderExportFormat) -> AsyncIterator[str]:
+        """
+        Export every order row by row, yielding chunks of EXPORT_BATCH_SIZE rows
+        """
+        if export_format == OrderExportFormat.CSV:
+            yield CSV_EXPORT_HEADER
+        
+        chunk = []
+        async for order in self.repository.stream_orders(EXPORT_BATCH_SIZE):
+            chunk.append(serialize_order(order, export_format))
+            if len(chunk) >= EXPORT_BATCH_SIZE:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+    
+    async def get_product_sales(self) -> ProductSalesResponse:
+        """
+        Get the quantity and revenue sold per product
+        """
+        rows = await self.repository.get_product_sales()
+        return ProductSalesResponse(products=[
+            ProductSales(product_id=row.product_id, quantity=row.quantity, revenue=row.revenue)
+            for row in rows
+        ])
+    
+    async def get_kitchen_queue(self) -> OrderListResponse:
+        """
+        Get the active orders for the kitchen board from memory, reloading
+        them from the database only when the board is missing or too old
+        """
+        if kitchen_queue.needs_reload():
+            await self.refresh_kitchen_queue()
+        return OrderListResponse(orders=kitchen_queue.snapshot())
+    
+    async def refresh_kitchen_queue(self) -> None:
+        """
+        Load the active orders into the kitchen board
+        """
+        orders = await self.repository.get_orders_by_statuses(ACTIVE_STATUSES)
+        kitchen_queue.load(from_row(OrderResponse, order) for order in orders)
+    
+    async def get_order_by_id(self, order_id: int) -> OrderResponse:
+        """
+        Get an order by its ID
+        """
+        order = await self.repository.get_order_by_id(order_id)
+        if not order:
             raise ValueError(f"Order with ID {order_id} not found")
+        return from_row(OrderResponse, order)
+    
+    async def create_order(self, order_data: OrderCreate) -> OrderResponse:
+        """
+        Create a new order
+        """
+        # Convert Pydantic model to dict for the repository
+        order_dict = order_data.model_dump()
+        order = await self.repository.create_order(order_dict)
+        response = from_row(OrderResponse, order)
+        _order_committed("order_created", response)
+        return response
+    
+    async def create_orders_batch(self, batch: OrderBatchCreate) -> OrderBatchResponse:
+        """
+        Validate a batch of orders together and insert the valid ones in a
+        single transaction. With batch.atomic, any invalid item rejects the
+        whole batch and nothing is inserted.
+        """
+        valid, failed = _validate_batch_items(batch.orders)
+        
+        # Check every referenced client with one query
+        client_ids = {order.client_id for _, order in valid}
+        existing_client_ids = await self.client_repository.get_existing_client_ids(client_ids) if client_ids else set()
+        accepted = _reject_unknown_clients(valid, existing_client_ids, failed)
+        
+        if failed and batch.atomic:
+            raise OrderBatchError([failed[index] for index in sorted(failed)])
         
-        # Update the order's status
-        updated_order = self.repository.update_order_status(order_id, status_data.status)
-        return OrderResponse.model_validate(updated_order)
+        order_ids = await self.repository.create_orders([order.model_dump() for _, order in accepted]) if accepted else []
+        return _batch_response(accepted, order_ids, failed)
+    
+    async def update_order_status(self, order_id: int, status_data: OrderStatusUpdate) -> OrderResponse:
+        """
+        Update an order's status
+        """
+        # The repository raises ValueError when the order does not exist and
+        # OrderStatusConflict when another update got there first
+        updated_order = await self.repository.update_order_status(order_id, status_data.status, status_data.version)
+        response = from_row(OrderResponse, updated_order)
+        _order_committed("order_status_updated", response)
+        return response
+
+async def warm_kitchen_queue() -> None:
+    """
+    Load the kitchen board at startup so the first poll does not hit the database
+    """
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            await AsyncOrderService(db).refresh_kitchen_queue()
+        return
+    
+    def load():
+        with get_db_session() as db:
+            OrderService(db).refresh_kitchen_queue()
+    await run_in_threadpool(load)
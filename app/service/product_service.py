@@ -1,29 +1,194 @@
+import codecs
+import csv
+import logging
+import os
+from itertools import islice
 from sqlalchemy.orm import Session
-from typing import List
-from app.repository.product_repository import ProductRepository
-from app.domain.product_model import ProductResponse, ProductListResponse, ProductCreate
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import BinaryIO, Iterator, List, Optional, Set, Tuple, Union
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from app.repository.product_repository import ProductRepository, AsyncProductRepository
+from app.core.cache import TTLCache
+from app.core.etag import compute_etag
+from app.core.codec import from_row
+from app.core.pagination import DEFAULT_PAGE_SIZE, split_page
+from app.core.validation import validation_message
+from app.exceptions import ProductImportAborted
+from app.domain.product_model import ProductResponse, ProductListResponse, ProductCreate, ProductImportFormat, ProductImportRow, ProductImportError, ProductImportResponse
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Catalog cache shared by every request of the worker, holding each response
+# with its ETag. Writes in this process invalidate it right away; writes from
+# other replicas show up after the TTL. Cache misses read from the primary,
+# so a lagging read replica is never cached for the whole TTL.
+product_cache = TTLCache(
+    maxsize=int(os.getenv("PRODUCT_CACHE_MAXSIZE", "1024")),
+    ttl=float(os.getenv("PRODUCT_CACHE_TTL", "60"))
+)
+
+def _list_key(limit: int, after_id: Optional[int]) -> tuple:
+    return ("list", limit, after_id)
+
+def _product_key(product_id: int) -> tuple:
+    return ("product", product_id)
+
+def _cache_response(key: tuple, response, generation: Optional[int] = None):
+    """
+    Compute the ETag once and cache it together with the response. Reads
+    pass the cache generation taken before their query, so a response read
+    before a concurrent write is returned but not cached over its
+    invalidation.
+    """
+    entry = (response, compute_etag(response))
+    product_cache.set(key, entry, generation=generation)
+    return entry
+
+def _store_written_product(product: ProductResponse) -> None:
+    """
+    Drop every cached page and write the new product state through
+    """
+    product_cache.clear()
+    _cache_response(_product_key(product.id), product)
+
+# Rows validated and upserted per statement by the product import
+IMPORT_BATCH_SIZE = 500
+
+# Rejected rows listed in the import summary; the rest are only counted
+IMPORT_MAX_ERRORS = 100
+
+# Row error of a line that is not valid UTF-8
+INVALID_ENCODING = "Line is not valid UTF-8"
+
+def _validate_import_row(validate, value) -> Union[ProductImportRow, str]:
+    try:
+        return validate(value)
+    except ValidationError as e:
+        return validation_message(e)
+
+def _decode_lines(stream: BinaryIO, bad_lines: Set[int]) -> Iterator[str]:
+    """
+    Decode the upload line by line, so a line that is not valid UTF-8 is
+    recorded in bad_lines and reported as a row error instead of failing the
+    whole file. Such lines are still yielded, with replacement characters, to
+    keep the CSV records in step.
+    """
+    for line_number, raw in enumerate(stream, start=1):
+        if line_number == 1 and raw.startswith(codecs.BOM_UTF8):
+            raw = raw[len(codecs.BOM_UTF8):]
+        try:
+            yield raw.decode("utf-8")
+        except UnicodeDecodeError:
+            bad_lines.add(line_number)
+            yield raw.decode("utf-8", errors="replace")
+
+def parse_import_rows(stream: BinaryIO, import_format: ProductImportFormat) -> Iterator[Tuple[int, Union[ProductImportRow, str]]]:
+    """
+    Read an uploaded file row by row, yielding each line number with the
+    validated row or its validation error
+    """
+    bad_lines: Set[int] = set()
+    lines = _decode_lines(stream, bad_lines)
+    if import_format == ProductImportFormat.CSV:
+        reader = csv.DictReader(lines)
+        first_line = 1
+        for row in reader:
+            # A quoted value may span several lines
+            if bad_lines.intersection(range(first_line, reader.line_num + 1)):
+                yield reader.line_num, INVALID_ENCODING
+            else:
+                # Empty cells mean the field was not given
+                values = {key: value for key, value in row.items() if key is not None and value != ""}
+                yield reader.line_num, _validate_import_row(ProductImportRow.model_validate, values)
+            first_line = reader.line_num + 1
+    else:
+        for line_number, line in enumerate(lines, start=1):
+            if line_number in bad_lines:
+                yield line_number, INVALID_ENCODING
+            elif line.strip():
+                yield line_number, _validate_import_row(ProductImportRow.model_validate_json, line)
+
+def _next_chunk(rows: Iterator) -> list:
+    return list(islice(rows, IMPORT_BATCH_SIZE))
+
+def _split_import_chunk(chunk: list, errors: List[ProductImportError]) -> List[dict]:
+    """
+    Keep the valid rows of a chunk for the upsert and record the others
+    """
+    valid = []
+    for line, row in chunk:
+        if isinstance(row, str):
+            errors.append(ProductImportError(line=line, error=row))
+        else:
+            valid.append(row.model_dump())
+    return valid
+
+def _import_summary(imported: int, errors: List[ProductImportError]) -> ProductImportResponse:
+    return ProductImportResponse(imported=imported, failed=len(errors), errors=errors[:IMPORT_MAX_ERRORS])
+
+def _import_aborted(imported: int, errors: List[ProductImportError], error: Exception) -> ProductImportAborted:
+    """
+    Log a failed chunk write and build the error carrying the summary of the
+    chunks already committed
+    """
+    logger.exception("Product import stopped after %d imported rows", imported)
+    return ProductImportAborted(_import_summary(imported, errors), error)
 
 class ProductService:
     def __init__(self, db_session: Session):
         self.repository = ProductRepository(db_session)
     
-    def get_all_products(self) -> ProductListResponse:
+    def get_all_products(self, limit: int = DEFAULT_PAGE_SIZE, after_id: Optional[int] = None) -> ProductListResponse:
+        """
+        Get a page of products and return them as a response model
+        """
+        response, _ = self.get_all_products_with_etag(limit, after_id)
+        return response
+    
+    def get_all_products_with_etag(self, limit: int = DEFAULT_PAGE_SIZE, after_id: Optional[int] = None) -> Tuple[ProductListResponse, str]:
         """
-        Get all products and return them as a response model
+        Get a page of products together with its ETag
         """
-        products = self.repository.get_all_products()
-        return ProductListResponse(
-            products=[ProductResponse.model_validate(product) for product in products]
+        generation = product_cache.generation
+        cached = product_cache.get(_list_key(limit, after_id))
+        if cached is not None:
+            return cached
+        
+        # Fetch one extra row to know whether there is a next page
+        rows = self.repository.get_all_products(limit + 1, after_id, primary=True)
+        products, next_cursor = split_page(rows, limit)
+        response = ProductListResponse(
+            products=[from_row(ProductResponse, product) for product in products],
+            next_cursor=next_cursor
         )
+        return _cache_response(_list_key(limit, after_id), response, generation)
     
     def get_product_by_id(self, product_id: int) -> ProductResponse:
         """
         Get a product by its ID
         """
-        product = self.repository.get_product_by_id(product_id)
+        response, _ = self.get_product_by_id_with_etag(product_id)
+        return response
+    
+    def get_product_by_id_with_etag(self, product_id: int) -> Tuple[ProductResponse, str]:
+        """
+        Get a product by its ID together with its ETag
+        """
+        generation = product_cache.generation
+        cached = product_cache.get(_product_key(product_id))
+        if cached is not None:
+            return cached
+        
+        product = self.repository.get_product_by_id(product_id, primary=True)
         if not product:
             raise ValueError(f"Product with ID {product_id} not found")
-        return ProductResponse.model_validate(product)
+        response = from_row(ProductResponse, product)
+        return _cache_response(_product_key(product_id), response, generation)
     
     def create_product(self, product_data: ProductCreate) -> ProductResponse:
         """
@@ -32,20 +197,137 @@ class ProductService:
         # Convert Pydantic model to dict for the repository
         product_dict = product_data.model_dump()
         product = self.repository.create_product(product_dict)
-        return ProductResponse.model_validate(product)
+        response = from_row(ProductResponse, product)
+        _store_written_product(response)
+        return response
         
     def update_product(self, product_id: int, product_data: ProductCreate) -> ProductResponse:
         """
         Update an existing product
         """
-        # Check if the product exists
-        existing_product = self.repository.get_product_by_id(product_id)
-        if not existing_product:
-            raise ValueError(f"Product with ID {product_id} not found")
+        # The repository raises ValueError when the product does not exist
+        product_dict = product_data.model_dump()
+        updated_product = self.repository.update_product(product_id, product_dict)
+        response = from_row(ProductResponse, updated_product)
+        _store_written_product(response)
+        return response
+    
+    def import_products(self, stream: BinaryIO, import_format: ProductImportFormat) -> ProductImportResponse:
+        """
+        Import products from a CSV or NDJSON file, validating and upserting
+        them in chunks of IMPORT_BATCH_SIZE rows
+        """
+        rows = parse_import_rows(stream, import_format)
+        imported = 0
+        errors = []
+        try:
+            while chunk := _next_chunk(rows):
+                valid = _split_import_chunk(chunk, errors)
+                if valid:
+                    try:
+                        self.repository.upsert_products(valid)
+                    except Exception as e:
+                        # Earlier chunks stay committed; report how many
+                        raise _import_aborted(imported, errors, e) from e
+                    imported += len(valid)
+        finally:
+            # Invalidate once for the whole file, also when a later chunk fails
+            product_cache.clear()
+        return _import_summary(imported, errors)
+
+class AsyncProductService:
+    def __init__(self, db_session: AsyncSession):
+        self.repository = AsyncProductRepository(db_session)
+    
+    async def get_all_products(self, limit: int = DEFAULT_PAGE_SIZE, after_id: Optional[int] = None) -> ProductListResponse:
+        """
+        Get a page of products and return them as a response model
+        """
+        response, _ = await self.get_all_products_with_etag(limit, after_id)
+        return response
+    
+    async def get_all_products_with_etag(self, limit: int = DEFAULT_PAGE_SIZE, after_id: Optional[int] = None) -> Tuple[ProductListResponse, str]:
+        """
+        Get a page of products together with its ETag
+        """
+        generation = product_cache.generation
+        cached = product_cache.get(_list_key(limit, after_id))
+        if cached is not None:
+            return cached
+        
+        # Fetch one extra row to know whether there is a next page
+        rows = await self.repository.get_all_products(limit + 1, after_id, primary=True)
+        products, next_cursor = split_page(rows, limit)
+        response = ProductListResponse(
+            products=[from_row(ProductResponse, product) for product in products],
+            next_cursor=next_cursor
+        )
+        return _cache_response(_list_key(limit, after_id), response, generation)
+    
+    async def get_product_by_id(self, product_id: int) -> ProductResponse:
+        """
+        Get a product by its ID
+        """
+        response, _ = await self.get_product_by_id_with_etag(product_id)
+        return response
+    
+    async def get_product_by_id_with_etag(self, product_id: int) -> Tuple[ProductResponse, str]:
+        """
+        Get a product by its ID together with its ETag
+        """
+        generation = product_cache.generation
+        cached = product_cache.get(_product_key(product_id))
+        if cached is not None:
+            return cached
         
+        product = await self.repository.get_product_by_id(product_id, primary=True)
+        if not product:
+            raise ValueError(f"Product with ID {product_id} not found")
+        response = from_row(ProductResponse, product)
+        return _cache_response(_product_key(product_id), response, generation)
+    
+    async def create_product(self, product_data: ProductCreate) -> ProductResponse:
+        """
+        Create a new product
+        """
         # Convert Pydantic model to dict for the repository
         product_dict = product_data.model_dump()
+        product = await self.repository.create_product(product_dict)
+        response = from_row(ProductResponse, product)
+        _store_written_product(response)
+        return response
         
-        # Update the product
-        updated_product = self.repository.update_product(product_id, product_dict)
-        return ProductResponse.model_validate(updated_product)
+    async def update_product(self, product_id: int, product_data: ProductCreate) -> ProductResponse:
+        """
+        Update an existing product
+        """
+        # The repository raises ValueError when the product does not exist
+        product_dict = product_data.model_dump()
+        updated_product = await self.repository.update_product(product_id, product_dict)
+        response = from_row(ProductResponse, updated_product)
+        _store_written_product(response)
+        return response
+    
+    async def import_products(self, stream: BinaryIO, import_format: ProductImportFormat) -> ProductImportResponse:
+        """
+        Import products from a CSV or NDJSON file, validating and upserting
+        them in chunks of IMPORT_BATCH_SIZE rows
+        """
+        rows = parse_import_rows(stream, import_format)
+        imported = 0
+        errors = []
+        try:
+            # Reading and validating the file is blocking work, keep it off the event loop
+            while chunk := await run_in_threadpool(_next_chunk, rows):
+                valid = _split_import_chunk(chunk, errors)
+                if valid:
+                    try:
+                        await self.repository.upsert_products(valid)
+                    except Exception as e:
+                        # Earlier chunks stay committed; report how many
+                        raise _import_aborted(imported, errors, e) from e
+                    imported += len(valid)
+        finally:
+            # Invalidate once for the whole file, also when a later chunk fails
+            product_cache.clear()
+        return _import_summary(imported, errors)
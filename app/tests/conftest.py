@@ -1,8 +1,16 @@
 import pytest
+from contextlib import contextmanager
 from unittest.mock import patch
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from app.main import app
 from app.core.jwt import create_access_token
+from app.core.instrumentation import instrument_queries
+from app.core.mysql_connection import get_session
+from app.repository.migrations import run_migrations
+from app.service.product_service import product_cache
 
 @pytest.fixture
 def auth_token():
@@ -48,3 +56,58 @@ def auth_bypass():
     """Bypasses the authentication for route testing"""
     with patch('app.core.auth.get_current_user', return_value={"sub": "test@example.com", "role": "administrator"}):
         yield
+
+
+@pytest.fixture
+def sqlite_engine():
+    """In-memory SQLite database migrated to the current schema, instrumented for query counting"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    run_migrations(engine)
+    instrument_queries(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def sqlite_client(authenticated_client, sqlite_engine):
+    """Authenticated client whose routes run against the SQLite database"""
+    session_factory = sessionmaker(autoflush=False, expire_on_commit=False, bind=sqlite_engine)
+    
+    def get_sqlite_session():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+    
+    app.dependency_overrides[get_session] = get_sqlite_session
+    product_cache.clear()
+    yield authenticated_client
+    app.dependency_overrides.pop(get_session, None)
+    product_cache.clear()
+
+@pytest.fixture
+def assert_max_queries(sqlite_engine):
+    """
+    Context manager failing the test when the block runs more statements on
+    the SQLite database than allowed. Statements are collected from engine
+    events, so requests served by the TestClient thread are counted too.
+    Usage:
+        with assert_max_queries(1):
+            sqlite_client.get("/api/orders/")
+    """
+    @contextmanager
+    def check(limit: int):
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(sqlite_engine, "after_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(sqlite_engine, "after_cursor_execute", record)
+        assert len(statements) <= limit, (
+            f"{len(statements)} queries, expected at most {limit}:\n" + "\n".join(statements)
+        )
+    return check
@@ -0,0 +1,190 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.admission import AdmissionController, AdmissionMiddleware, Priority, request_priority
+
+class TestRequestPriority:
+    def test_kitchen_status_update_is_high(self):
+        # Act & Assert
+        assert request_priority("PATCH", "/api/orders/42/status") == Priority.HIGH
+        assert request_priority("GET", "/api/orders/kitchen") == Priority.HIGH
+    
+    def test_listing_and_reports_are_low(self):
+        # Act & Assert
+        assert request_priority("GET", "/api/orders/") == Priority.LOW
+        assert request_priority("GET", "/api/orders/export") == Priority.LOW
+        assert request_priority("GET", "/api/orders/reports/product-sales") == Priority.LOW
+        assert request_priority("GET", "/api/clients/") == Priority.LOW
+    
+    def test_other_requests_are_normal(self):
+        # Act & Assert
+        assert request_priority("POST", "/api/orders/") == Priority.NORMAL
+        assert request_priority("GET", "/api/orders/42") == Priority.NORMAL
+        assert request_priority("GET", "/api/products/") == Priority.NORMAL
+    
+    def test_probes_and_streams_are_exempt(self):
+        # Act & Assert
+        assert request_priority("GET", "/api/health_check") is None
+        assert request_priority("GET", "/metrics") is None
+        assert request_priority("GET", "/api/orders/events") is None
+
+class TestAdmissionController:
+    @pytest.mark.asyncio
+    async def test_admits_up_to_the_limit(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=2, max_queue=0, queue_timeout=1)
+        
+        # Act
+        results = [await controller.acquire(Priority.NORMAL) for _ in range(3)]
+        
+        # Assert
+        assert results == [True, True, False]
+        assert controller.in_flight == 2
+    
+    @pytest.mark.asyncio
+    async def test_waiter_gets_the_released_slot(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=1, max_queue=5, queue_timeout=1)
+        await controller.acquire(Priority.NORMAL)
+        waiting = asyncio.create_task(controller.acquire(Priority.NORMAL))
+        await asyncio.sleep(0)
+        
+        # Act
+        controller.release()
+        
+        # Assert
+        assert await waiting is True
+        assert controller.in_flight == 1
+        assert controller.queued == 0
+    
+    @pytest.mark.asyncio
+    async def test_waiter_is_shed_after_the_queue_timeout(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=1, max_queue=5, queue_timeout=0.02)
+        await controller.acquire(Priority.NORMAL)
+        
+        # Act
+        admitted = await controller.acquire(Priority.NORMAL)
+        
+        # Assert
+        assert admitted is False
+        assert controller.queued == 0
+        assert controller.in_flight == 1
+    
+    @pytest.mark.asyncio
+    async def test_released_slots_go_to_higher_priority_first(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=1, max_queue=5, queue_timeout=1)
+        await controller.acquire(Priority.NORMAL)
+        low = asyncio.create_task(controller.acquire(Priority.LOW))
+        await asyncio.sleep(0)
+        high = asyncio.create_task(controller.acquire(Priority.HIGH))
+        await asyncio.sleep(0)
+        
+        # Act
+        controller.release()
+        admitted = await high
+        
+        # Assert
+        assert admitted is True
+        assert not low.done()
+        controller.release()
+        assert await low is True
+    
+    @pytest.mark.asyncio
+    async def test_reserved_slots_only_admit_high_priority(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=3, max_queue=0, queue_timeout=1, priority_reserve=1)
+        await controller.acquire(Priority.NORMAL)
+        await controller.acquire(Priority.NORMAL)
+        
+        # Act
+        normal = await controller.acquire(Priority.NORMAL)
+        high = await controller.acquire(Priority.HIGH)
+        
+        # Assert
+        assert normal is False
+        assert high is True
+    
+    @pytest.mark.asyncio
+    async def test_full_queue_evicts_lower_priority(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1)
+        await controller.acquire(Priority.NORMAL)
+        low = asyncio.create_task(controller.acquire(Priority.LOW))
+        await asyncio.sleep(0)
+        
+        # Act
+        high = asyncio.create_task(controller.acquire(Priority.HIGH))
+        await asyncio.sleep(0)
+        rejected = await controller.acquire(Priority.NORMAL)
+        
+        # Assert
+        assert await low is False
+        assert rejected is False
+        controller.release()
+        assert await high is True
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_the_queue(self):
+        # Arrange
+        controller = AdmissionController(max_in_flight=1, max_queue=5, queue_timeout=1)
+        await controller.acquire(Priority.NORMAL)
+        waiting = asyncio.create_task(controller.acquire(Priority.NORMAL))
+        await asyncio.sleep(0)
+        
+        # Act
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        
+        # Assert
+        assert controller.queued == 0
+        assert controller.in_flight == 1
+
+class TestAdmissionMiddleware:
+    def setup_method(self):
+        self.controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=1)
+        app = FastAPI()
+        app.add_middleware(AdmissionMiddleware, controller=self.controller, retry_after=3)
+        
+        @app.get("/api/products/")
+        async def products():
+            return {"products": []}
+        
+        @app.get("/api/health_check")
+        async def health_check():
+            return {"status": "ok"}
+        
+        self.client = TestClient(app)
+    
+    def test_admitted_request_releases_its_slot(self):
+        # Act
+        response = self.client.get("/api/products/")
+        
+        # Assert
+        assert response.status_code == 200
+        assert self.controller.in_flight == 0
+    
+    def test_request_over_the_limit_gets_503_with_retry_after(self):
+        # Arrange
+        self.controller.in_flight = 1
+        
+        # Act
+        response = self.client.get("/api/products/")
+        
+        # Assert
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+        assert response.json() == {"detail": "Service overloaded, retry later"}
+    
+    def test_health_check_is_never_shed(self):
+        # Arrange
+        self.controller.in_flight = 1
+        
+        # Act
+        response = self.client.get("/api/health_check")
+        
+        # Assert
+        assert response.status_code == 200
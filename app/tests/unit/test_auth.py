@@ -1,9 +1,14 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from fastapi import HTTPException
-from app.core.auth import get_current_user, get_admin_user
+import time
+from app.core.auth import get_current_user, get_admin_user, token_cache
 
 class TestAuth:
+    def setup_method(self):
+        # Start every test with an empty token cache
+        token_cache.clear()
+    
     @patch('app.core.auth.verify_access_token')
     def test_get_current_user_valid(self, mock_verify_token):
         # Arrange
@@ -51,3 +56,47 @@ class TestAuth:
         
         assert exc_info.value.status_code == 403
         assert "Acesso não permitido" in exc_info.value.detail
+    
+    @patch('app.core.auth.verify_access_token')
+    def test_get_current_user_cached(self, mock_verify_token):
+        # Arrange
+        mock_payload = {"sub": "test@example.com", "role": "user", "exp": time.time() + 60}
+        mock_verify_token.return_value = mock_payload
+        
+        # Act
+        first = get_current_user("cached_token")
+        second = get_current_user("cached_token")
+        
+        # Assert
+        mock_verify_token.assert_called_once_with("cached_token")
+        assert first == second == mock_payload
+    
+    @patch('app.core.auth.verify_access_token')
+    def test_get_current_user_invalid_not_cached(self, mock_verify_token):
+        # Arrange
+        mock_verify_token.return_value = None
+        
+        # Act
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                get_current_user("tampered_token")
+        
+        # Assert
+        assert mock_verify_token.call_count == 2
+        assert token_cache.stats()["size"] == 0
+    
+    @patch('app.core.auth.time')
+    @patch('app.core.auth.verify_access_token')
+    def test_cached_token_expires_at_exp(self, mock_verify_token, mock_time):
+        # Arrange
+        mock_time.time.return_value = 1000.0
+        mock_verify_token.return_value = {"sub": "test@example.com", "exp": 1060}
+        with patch.object(token_cache, "_clock", return_value=0.0):
+            get_current_user("short_lived_token")
+        
+        # Act
+        with patch.object(token_cache, "_clock", return_value=61.0):
+            get_current_user("short_lived_token")
+        
+        # Assert
+        assert mock_verify_token.call_count == 2
@@ -0,0 +1,73 @@
+import json
+import threading
+import pytest
+from app.core.broadcaster import Broadcaster, Event
+
+class TestBroadcaster:
+    @pytest.mark.asyncio
+    async def test_publish_fans_out_to_every_subscriber(self):
+        # Arrange
+        broadcaster = Broadcaster()
+        first = broadcaster.subscribe()
+        second = broadcaster.subscribe()
+        
+        # Act
+        broadcaster.publish(Event("order_created", {"id": 1}))
+        
+        # Assert
+        assert (await first.get(timeout=1)).data == {"id": 1}
+        assert (await second.get(timeout=1)).data == {"id": 1}
+    
+    @pytest.mark.asyncio
+    async def test_publish_from_another_thread(self):
+        # Arrange
+        broadcaster = Broadcaster()
+        subscription = broadcaster.subscribe()
+        
+        # Act
+        thread = threading.Thread(target=broadcaster.publish, args=(Event("order_status_updated", {"id": 2}),))
+        thread.start()
+        thread.join()
+        event = await subscription.get(timeout=1)
+        
+        # Assert
+        assert event.name == "order_status_updated"
+    
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_drops_oldest_events(self):
+        # Arrange
+        broadcaster = Broadcaster(queue_size=2)
+        subscription = broadcaster.subscribe()
+        
+        # Act
+        for order_id in range(1, 4):
+            broadcaster.publish(Event("order_created", {"id": order_id}))
+        
+        # Assert
+        assert subscription.dropped == 1
+        assert (await subscription.get(timeout=1)).data["id"] == 2
+        assert (await subscription.get(timeout=1)).data["id"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_get_times_out_and_close_unsubscribes(self):
+        # Arrange
+        broadcaster = Broadcaster()
+        
+        # Act
+        with broadcaster.subscribe() as subscription:
+            event = await subscription.get(timeout=0.01)
+            count_while_open = broadcaster.subscriber_count
+        
+        # Assert
+        assert event is None
+        assert count_while_open == 1
+        assert broadcaster.subscriber_count == 0
+    
+    def test_event_sse_encoding(self):
+        # Act
+        event = Event("order_created", {"id": 1, "status": "Recebido"})
+        
+        # Assert
+        name, data = event.sse.strip().split("\n")
+        assert name == "event: order_created"
+        assert json.loads(data.removeprefix("data: ")) == {"id": 1, "status": "Recebido"}
@@ -0,0 +1,89 @@
+from app.core.cache import TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class TestTTLCache:
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.cache = TTLCache(maxsize=2, ttl=10, clock=self.clock)
+    
+    def test_hit_and_miss_counters(self):
+        # Act
+        self.cache.set("a", 1)
+        hit = self.cache.get("a")
+        miss = self.cache.get("b")
+        
+        # Assert
+        assert hit == 1
+        assert miss is None
+        assert self.cache.stats()["hits"] == 1
+        assert self.cache.stats()["misses"] == 1
+    
+    def test_entries_expire_after_ttl(self):
+        # Arrange
+        self.cache.set("a", 1)
+        
+        # Act
+        self.clock.now = 10
+        
+        # Assert
+        assert self.cache.get("a") is None
+        assert self.cache.stats()["expirations"] == 1
+        assert self.cache.stats()["size"] == 0
+    
+    def test_per_entry_ttl(self):
+        # Arrange
+        self.cache.set("a", 1, ttl=1)
+        
+        # Act
+        self.clock.now = 2
+        
+        # Assert
+        assert self.cache.get("a") is None
+    
+    def test_least_recently_used_entry_is_evicted(self):
+        # Arrange
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        
+        # Act
+        self.cache.set("c", 3)
+        
+        # Assert
+        assert self.cache.get("b") is None
+        assert self.cache.get("a") == 1
+        assert self.cache.get("c") == 3
+        assert self.cache.stats()["evictions"] == 1
+    
+    def test_clear_and_delete(self):
+        # Arrange
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        
+        # Act
+        self.cache.delete("a")
+        
+        # Assert
+        assert self.cache.get("a") is None
+        self.cache.clear()
+        assert self.cache.stats()["size"] == 0
+    
+    def test_set_skipped_after_clear_since_generation(self):
+        # Arrange: a reader takes the generation, then a writer clears
+        generation = self.cache.generation
+        self.cache.clear()
+        
+        # Act
+        stored = self.cache.set("a", "stale", generation=generation)
+        
+        # Assert
+        assert stored is False
+        assert self.cache.get("a") is None
+        assert self.cache.set("a", "fresh", generation=self.cache.generation) is True
+        assert self.cache.get("a") == "fresh"
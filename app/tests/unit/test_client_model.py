@@ -1,6 +1,6 @@
 import pytest
 from pydantic import ValidationError
-from app.domain.client_model import ClientCreate, ClientResponse, ClientDB, ClientUpdate
+from app.domain.client_model import ClientCreate, ClientResponse, ClientDB, ClientUpdate, normalize_cpf
 
 class TestClientModel:
     def test_client_create_valid(self):
@@ -62,3 +62,14 @@ class TestClientModel:
         # you would need to add a validator to your model
         client_update = ClientUpdate(**update_data)
         assert client_update.name == ""
+    
+    def test_normalize_cpf(self):
+        # Every accepted format resolves to the same digits
+        assert normalize_cpf("620.546.640-65") == "62054664065"
+        assert normalize_cpf("62054664065") == "62054664065"
+        assert normalize_cpf(" 620 546 640 65 ") == "62054664065"
+    
+    def test_client_create_invalid_cpf(self):
+        # CPFs without exactly 11 digits are rejected
+        with pytest.raises(ValidationError, match="CPF must contain 11 digits"):
+            ClientCreate(name="John Doe", cpf="123.456")
@@ -1,7 +1,8 @@
 import pytest
 from sqlalchemy.orm import Session
-from unittest.mock import MagicMock, patch
-from app.repository.client_repository import ClientRepository
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repository.client_repository import ClientRepository, AsyncClientRepository, CLIENT_COLUMNS
 from app.domain.client_model import ClientDB
 
 class TestClientRepository:
@@ -19,13 +20,13 @@ class TestClientRepository:
     
     def test_get_all_clients(self):
         # Arrange
-        self.mock_session.query.return_value.all.return_value = [self.sample_client]
+        self.mock_session.query.return_value.order_by.return_value.all.return_value = [self.sample_client]
         
         # Act
         clients = self.repository.get_all_clients()
         
         # Assert
-        self.mock_session.query.assert_called_once_with(ClientDB)
+        self.mock_session.query.assert_called_once_with(*CLIENT_COLUMNS)
         assert len(clients) == 1
         assert clients[0].id == 1
         assert clients[0].name == "John Doe"
@@ -38,7 +39,7 @@ class TestClientRepository:
         client = self.repository.get_client_by_id(1)
         
         # Assert
-        self.mock_session.query.assert_called_once_with(ClientDB)
+        self.mock_session.query.assert_called_once_with(*CLIENT_COLUMNS)
         self.mock_session.query.return_value.filter.assert_called_once()
         assert client.id == 1
         assert client.name == "John Doe"
@@ -53,6 +54,19 @@ class TestClientRepository:
         # Assert
         assert client is None
     
+    def test_get_client_by_cpf_normalizes_input(self):
+        # Arrange
+        self.mock_session.query.return_value.filter.return_value.first.return_value = self.sample_client
+        
+        # Act
+        client = self.repository.get_client_by_cpf("12345678910")
+        
+        # Assert
+        criterion = self.mock_session.query.return_value.filter.call_args[0][0]
+        assert criterion.left.name == "cpf_digits"
+        assert criterion.right.value == "12345678910"
+        assert client.id == 1
+    
     def test_create_client(self):
         # Arrange
         client_data = {
@@ -68,27 +82,29 @@ class TestClientRepository:
         # Mock the behavior of creating a new client
         with patch('app.repository.client_repository.ClientDB', return_value=ClientDB(
             id=2, **client_data
-        )):
+        )) as mock_client_db:
             # Act
             new_client = self.repository.create_client(client_data)
             
             # Assert
             self.mock_session.add.assert_called_once()
             self.mock_session.commit.assert_called_once()
-            self.mock_session.refresh.assert_called_once()
+            self.mock_session.refresh.assert_not_called()
             assert new_client.id == 2
             assert new_client.name == "Jane Doe"
             assert new_client.cpf == "987.654.321-00"
+            assert mock_client_db.call_args.kwargs["cpf_digits"] == "98765432100"
     
     def test_update_client_found(self):
         # Arrange
-        client_to_update = ClientDB(
+        updated_row = ClientDB(
             id=1, 
-            name="Original Name", 
+            name="Updated Name", 
             cpf="123.456.789-10"
         )
         
-        self.mock_session.query.return_value.filter.return_value.first.return_value = client_to_update
+        self.mock_session.execute.return_value.rowcount = 1
+        self.mock_session.query.return_value.filter.return_value.first.return_value = updated_row
         
         update_data = {
             "name": "Updated Name"
@@ -97,9 +113,12 @@ class TestClientRepository:
         # Act
         updated_client = self.repository.update_client(1, update_data)
         
-        # Assert
+        # Assert: one UPDATE, one read back for the CPF and the commit
+        self.mock_session.execute.assert_called_once()
+        assert self.mock_session.execute.call_args[0][0].is_update
+        self.mock_session.query.assert_called_once()
         self.mock_session.commit.assert_called_once()
-        self.mock_session.refresh.assert_called_once()
+        self.mock_session.refresh.assert_not_called()
         assert updated_client.id == 1
         assert updated_client.name == "Updated Name"
         # CPF should remain unchanged
@@ -107,7 +126,7 @@ class TestClientRepository:
     
     def test_update_client_not_found(self):
         # Arrange
-        self.mock_session.query.return_value.filter.return_value.first.return_value = None
+        self.mock_session.execute.return_value.rowcount = 0
         
         update_data = {
             "name": "Updated Name"
@@ -116,3 +135,59 @@ class TestClientRepository:
         # Act & Assert
         with pytest.raises(ValueError, match="Client with ID 999 not found"):
             self.repository.update_client(999, update_data)
+        self.mock_session.query.assert_not_called()
+        self.mock_session.commit.assert_not_called()
+
+class TestAsyncClientRepository:
+    def setup_method(self):
+        # Create a mock async session for each test
+        self.mock_session = AsyncMock(spec=AsyncSession)
+        self.repository = AsyncClientRepository(self.mock_session)
+        
+        # Sample client data
+        self.sample_client = ClientDB(
+            id=1, 
+            name="John Doe", 
+            cpf="123.456.789-10"
+        )
+    
+    def _mock_result(self, rows):
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = rows
+        result.scalars.return_value.first.return_value = rows[0] if rows else None
+        result.all.return_value = rows
+        result.first.return_value = rows[0] if rows else None
+        self.mock_session.execute.return_value = result
+    
+    @pytest.mark.asyncio
+    async def test_get_client_by_cpf_found(self):
+        # Arrange
+        self._mock_result([self.sample_client])
+        
+        # Act
+        client = await self.repository.get_client_by_cpf("123.456.789-10")
+        
+        # Assert
+        self.mock_session.execute.assert_awaited_once()
+        assert client.id == 1
+    
+    @pytest.mark.asyncio
+    async def test_create_client(self):
+        # Act
+        new_client = await self.repository.create_client({"name": "Jane Doe", "cpf": "987.654.321-00"})
+        
+        # Assert
+        self.mock_session.add.assert_called_once()
+        self.mock_session.commit.assert_awaited_once()
+        self.mock_session.refresh.assert_not_awaited()
+        assert new_client.name == "Jane Doe"
+    
+    @pytest.mark.asyncio
+    async def test_update_client_not_found(self):
+        # Arrange
+        self._mock_result([])
+        self.mock_session.execute.return_value.rowcount = 0
+        
+        # Act & Assert
+        with pytest.raises(ValueError, match="Client with ID 999 not found"):
+            await self.repository.update_client(999, {"name": "Updated Name"})
@@ -37,7 +37,7 @@ class TestClientRoutes:
         
         # Assert
         assert response.status_code == status.HTTP_200_OK
-        assert response.json() == {"clients": [self.sample_client]}
+        assert response.json() == {"clients": [self.sample_client], "next_cursor": None}
         mock_service.get_all_clients.assert_called_once()
     
     @patch('app.api.client_routes.ClientService')
@@ -1,6 +1,6 @@
 import pytest
-from unittest.mock import MagicMock, patch
-from app.service.client_service import ClientService
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.service.client_service import ClientService, AsyncClientService
 from app.domain.client_model import ClientCreate, ClientResponse, ClientListResponse, ClientDB, ClientUpdate
 
 class TestClientService:
@@ -89,8 +89,6 @@ class TestClientService:
     
     def test_update_client_found(self):
         # Arrange
-        self.mock_repository.get_client_by_id.return_value = self.sample_client_db
-        
         updated_client = ClientDB(
             id=1, 
             name="Updated Name",
@@ -102,7 +100,7 @@ class TestClientService:
         result = self.service.update_client(1, self.sample_client_update)
         
         # Assert
-        self.mock_repository.get_client_by_id.assert_called_once_with(1)
+        self.mock_repository.get_client_by_id.assert_not_called()
         self.mock_repository.update_client.assert_called_once()
         assert isinstance(result, ClientResponse)
         assert result.id == 1
@@ -112,8 +110,45 @@ class TestClientService:
     
     def test_update_client_not_found(self):
         # Arrange
-        self.mock_repository.get_client_by_id.return_value = None
+        self.mock_repository.update_client.side_effect = ValueError("Client with ID 999 not found")
         
         # Act & Assert
         with pytest.raises(ValueError, match="Client with ID 999 not found"):
             self.service.update_client(999, self.sample_client_update)
+
+class TestAsyncClientService:
+    def setup_method(self):
+        # Create a mock async repository for each test
+        self.mock_repository = AsyncMock()
+        
+        # Create the service with the mock repository
+        with patch('app.service.client_service.AsyncClientRepository', return_value=self.mock_repository):
+            self.service = AsyncClientService(AsyncMock())
+        
+        self.sample_client_db = ClientDB(
+            id=1, 
+            name="John Doe", 
+            cpf="123.456.789-10"
+        )
+    
+    @pytest.mark.asyncio
+    async def test_get_client_by_cpf_found(self):
+        # Arrange
+        self.mock_repository.get_client_by_cpf.return_value = self.sample_client_db
+        
+        # Act
+        result = await self.service.get_client_by_cpf("123.456.789-10")
+        
+        # Assert
+        self.mock_repository.get_client_by_cpf.assert_awaited_once_with("123.456.789-10")
+        assert result.id == 1
+        assert result.token
+    
+    @pytest.mark.asyncio
+    async def test_update_client_not_found(self):
+        # Arrange
+        self.mock_repository.update_client.side_effect = ValueError("Client with ID 999 not found")
+        
+        # Act & Assert
+        with pytest.raises(ValueError, match="Client with ID 999 not found"):
+            await self.service.update_client(999, ClientUpdate(name="Updated Name"))
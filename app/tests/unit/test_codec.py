@@ -0,0 +1,44 @@
+import json
+from app.core.codec import ModelJSONResponse, from_row, json_body_openapi
+from app.domain.order_model import OrderDB, OrderResponse, OrderListResponse, OrderCreate, OrderStatus
+
+class TestCodec:
+    def setup_method(self):
+        # Sample order row as read from the database
+        self.sample_order_db = OrderDB(
+            id=1,
+            client_id=1,
+            total_price=25.99,
+            status=OrderStatus.RECEIVED.value,
+            products=[{"id": 1, "name": "Product 1", "quantity": 2, "price": 10.99}]
+        )
+    
+    def test_from_row_matches_validated_model(self):
+        # Act
+        result = from_row(OrderResponse, self.sample_order_db)
+        
+        # Assert
+        assert isinstance(result, OrderResponse)
+        assert result == OrderResponse.model_validate(self.sample_order_db)
+    
+    def test_model_json_response_renders_model(self):
+        # Arrange
+        content = OrderListResponse(orders=[from_row(OrderResponse, self.sample_order_db)])
+        
+        # Act
+        response = ModelJSONResponse(content, headers={"ETag": 'W/"1"'})
+        
+        # Assert
+        assert response.media_type == "application/json"
+        assert response.headers["ETag"] == 'W/"1"'
+        assert json.loads(response.body) == content.model_dump(mode="json")
+    
+    def test_json_body_openapi_inlines_definitions(self):
+        # Act
+        extra = json_body_openapi(OrderCreate)
+        
+        # Assert
+        schema = extra["requestBody"]["content"]["application/json"]["schema"]
+        assert "$ref" not in json.dumps(schema)
+        assert "$defs" not in schema
+        assert schema["properties"]["status"]["enum"] == [status.value for status in OrderStatus]
@@ -0,0 +1,31 @@
+import threading
+import pytest
+from app.core.concurrency import run_service
+
+class TestRunService:
+    @pytest.mark.asyncio
+    async def test_awaits_async_methods(self):
+        # Arrange
+        async def method(value):
+            return value * 2
+        
+        # Act
+        result = await run_service(method, 21)
+        
+        # Assert
+        assert result == 42
+    
+    @pytest.mark.asyncio
+    async def test_runs_sync_methods_in_threadpool(self):
+        # Arrange
+        loop_thread = threading.get_ident()
+        
+        def method(value):
+            return value, threading.get_ident()
+        
+        # Act
+        result, worker_thread = await run_service(method, "ok")
+        
+        # Assert
+        assert result == "ok"
+        assert worker_thread != loop_thread
@@ -0,0 +1,34 @@
+from app.core.etag import compute_etag, etag_matches
+from app.domain.product_model import ProductResponse
+
+class TestETag:
+    def setup_method(self):
+        self.product = ProductResponse(id=1, name="Test Product", category="Lanche", price=10.99)
+    
+    def test_compute_etag_is_stable(self):
+        # Act
+        first = compute_etag(self.product)
+        second = compute_etag(ProductResponse(**self.product.model_dump()))
+        
+        # Assert
+        assert first == second
+        assert first.startswith('W/"')
+    
+    def test_compute_etag_changes_with_content(self):
+        # Arrange
+        changed = self.product.model_copy(update={"price": 11.99})
+        
+        # Assert
+        assert compute_etag(changed) != compute_etag(self.product)
+    
+    def test_etag_matches(self):
+        # Arrange
+        etag = compute_etag(self.product)
+        
+        # Assert
+        assert etag_matches(etag, etag)
+        assert etag_matches(etag.removeprefix("W/"), etag)
+        assert etag_matches(f'"other", {etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from fastapi.responses import Response
+from app.core.idempotency import IdempotencyCoordinator, MemoryIdempotencyStore, StoredResponse, request_fingerprint
+from app.exceptions import IdempotencyKeyInProgress, IdempotencyKeyReused
+
+class BusyStore(MemoryIdempotencyStore):
+    """Store whose keys are always held by another replica"""
+    def reserve(self, key, fingerprint):
+        return False
+
+class TestIdempotencyCoordinator:
+    def setup_method(self):
+        self.store = MemoryIdempotencyStore(maxsize=10, ttl=60)
+        self.coordinator = IdempotencyCoordinator(self.store, wait_timeout=1)
+        self.fingerprint = request_fingerprint('{"client_id":1}')
+        self.calls = 0
+    
+    async def handler(self, status_code=201, delay=0):
+        self.calls += 1
+        await asyncio.sleep(delay)
+        return Response(content=f'{{"id":{self.calls}}}', status_code=status_code, media_type="application/json")
+    
+    @pytest.mark.asyncio
+    async def test_replays_the_first_response(self):
+        # Act
+        first = await self.coordinator.run("k", self.fingerprint, self.handler)
+        replay = await self.coordinator.run("k", self.fingerprint, self.handler)
+        
+        # Assert
+        assert self.calls == 1
+        assert replay.status_code == 201
+        assert replay.body == first.body == b'{"id":1}'
+        assert replay.headers["Idempotent-Replayed"] == "true"
+    
+    @pytest.mark.asyncio
+    async def test_rejects_a_key_reused_for_another_request(self):
+        # Arrange
+        await self.coordinator.run("k", self.fingerprint, self.handler)
+        
+        # Act & Assert
+        with pytest.raises(IdempotencyKeyReused):
+            await self.coordinator.run("k", request_fingerprint('{"client_id":2}'), self.handler)
+        assert self.calls == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_wait_for_the_first(self):
+        # Act
+        responses = await asyncio.gather(*(
+            self.coordinator.run("k", self.fingerprint, lambda: self.handler(delay=0.05)) for _ in range(5)
+        ))
+        
+        # Assert
+        assert self.calls == 1
+        assert {response.body for response in responses} == {b'{"id":1}'}
+        assert sum(1 for response in responses if "Idempotent-Replayed" in response.headers) == 4
+    
+    @pytest.mark.asyncio
+    async def test_failed_attempts_are_not_stored(self):
+        # Arrange
+        async def failing():
+            raise RuntimeError("database down")
+        
+        # Act
+        with pytest.raises(RuntimeError):
+            await self.coordinator.run("k", self.fingerprint, failing)
+        server_error = await self.coordinator.run("k", self.fingerprint, lambda: self.handler(status_code=500))
+        created = await self.coordinator.run("k", self.fingerprint, self.handler)
+        
+        # Assert
+        assert server_error.status_code == 500
+        assert created.status_code == 201
+        assert self.calls == 2
+    
+    @pytest.mark.asyncio
+    async def test_key_held_elsewhere_times_out(self):
+        # Arrange
+        coordinator = IdempotencyCoordinator(BusyStore(), wait_timeout=0.05, poll_interval=0.01)
+        
+        # Act & Assert
+        with pytest.raises(IdempotencyKeyInProgress):
+            await coordinator.run("k", self.fingerprint, self.handler)
+        assert self.calls == 0
+    
+    @pytest.mark.asyncio
+    async def test_key_completed_elsewhere_is_replayed(self):
+        # Arrange
+        store = BusyStore()
+        coordinator = IdempotencyCoordinator(store, wait_timeout=1, poll_interval=0.01)
+        
+        async def complete_elsewhere():
+            await asyncio.sleep(0.03)
+            store.complete("k", StoredResponse(self.fingerprint, 201, b'{"id":42}'))
+        
+        # Act
+        response, _ = await asyncio.gather(coordinator.run("k", self.fingerprint, self.handler), complete_elsewhere())
+        
+        # Assert
+        assert response.body == b'{"id":42}'
+        assert self.calls == 0
@@ -0,0 +1,86 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from app.core.idempotency import StoredResponse
+from app.repository.idempotency_repository import IdempotencyRepository
+from app.repository.migrations import run_migrations
+
+class TestIdempotencyRepository:
+    def setup_method(self):
+        # SQLite stand-in migrated to the current schema
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+        run_migrations(self.engine)
+        self.session = Session(self.engine)
+        self.repository = IdempotencyRepository(self.session)
+        self.response = StoredResponse("f" * 64, 201, b'{"id":1}')
+    
+    def teardown_method(self):
+        self.session.close()
+        self.engine.dispose()
+    
+    def test_reserve_complete_and_get(self):
+        # Act
+        reserved = self.repository.reserve("k", "f" * 64, lease_until=160, now=100)
+        in_progress = self.repository.get("k", now=101)
+        self.repository.complete("k", self.response, expires_at=200)
+        stored = self.repository.get("k", now=150)
+        
+        # Assert
+        assert reserved is True
+        assert in_progress is None
+        assert stored == self.response
+    
+    def test_reserve_fails_while_the_key_is_held(self):
+        # Arrange
+        self.repository.reserve("k", "f" * 64, lease_until=160, now=100)
+        
+        # Act
+        reserved = self.repository.reserve("k", "f" * 64, lease_until=170, now=110)
+        
+        # Assert
+        assert reserved is False
+    
+    def test_expired_lease_is_taken_over(self):
+        # Arrange
+        self.repository.reserve("k", "f" * 64, lease_until=160, now=100)
+        
+        # Act
+        reserved = self.repository.reserve("k", "f" * 64, lease_until=260, now=200)
+        
+        # Assert
+        assert reserved is True
+    
+    def test_expired_response_is_not_replayed(self):
+        # Arrange
+        self.repository.reserve("k", "f" * 64, lease_until=160, now=100)
+        self.repository.complete("k", self.response, expires_at=200)
+        
+        # Act
+        stored = self.repository.get("k", now=250)
+        
+        # Assert
+        assert stored is None
+    
+    def test_release_frees_an_in_progress_key(self):
+        # Arrange
+        self.repository.reserve("k", "f" * 64, lease_until=160, now=100)
+        
+        # Act
+        self.repository.release("k")
+        
+        # Assert
+        assert self.repository.reserve("k", "f" * 64, lease_until=170, now=110) is True
+    
+    def test_purge_expired(self):
+        # Arrange
+        self.repository.reserve("old", "f" * 64, lease_until=160, now=100)
+        self.repository.complete("old", self.response, expires_at=200)
+        self.repository.reserve("new", "f" * 64, lease_until=160, now=100)
+        self.repository.complete("new", self.response, expires_at=400)
+        
+        # Act
+        purged = self.repository.purge_expired(now=300)
+        
+        # Assert
+        assert purged == 1
+        assert self.repository.get("new", now=300) == self.response
@@ -0,0 +1,169 @@
+import json
+import logging
+from unittest.mock import patch
+from sqlalchemy import create_engine, text
+from app.core.cache import TTLCache
+from app.core.instrumentation import (
+    DB_QUERY_DURATION, HTTP_REQUESTS, HTTP_REQUESTS_IN_FLIGHT, QueryStats, cache_collector, count_queries,
+    instrument_queries, statement_operation
+)
+
+class TestMetricsMiddleware:
+    def test_counts_requests_by_route_template(self, client):
+        # Arrange
+        before = HTTP_REQUESTS.value("GET", "/api/health_check", "200")
+        
+        # Act
+        response = client.get("/api/health_check")
+        
+        # Assert
+        assert response.status_code == 200
+        assert HTTP_REQUESTS.value("GET", "/api/health_check", "200") == before + 1
+        assert HTTP_REQUESTS_IN_FLIGHT.value("GET") == 0
+    
+    def test_unmatched_paths_share_one_label(self, client):
+        # Arrange
+        before = HTTP_REQUESTS.value("GET", "unmatched", "404")
+        
+        # Act
+        client.get("/does-not-exist/1")
+        client.get("/does-not-exist/2")
+        
+        # Assert
+        assert HTTP_REQUESTS.value("GET", "unmatched", "404") == before + 2
+    
+    def test_path_parameters_use_the_template(self, client):
+        # Act
+        client.get("/api/orders/123")
+        
+        # Assert
+        assert HTTP_REQUESTS.value("GET", "/api/orders/{order_id}", "401") >= 1
+    
+    def test_metrics_endpoint_serves_text_format(self, client):
+        # Arrange
+        client.get("/api/health_check")
+        
+        # Act
+        response = client.get("/metrics")
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'http_requests_total{method="GET",route="/api/health_check",status="200"}' in response.text
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+        assert "db_pool_checkout_wait_seconds_count" in response.text
+        assert 'cache_hits_total{cache="product"}' in response.text
+
+class TestQueryInstrumentation:
+    def test_statement_operation(self):
+        # Assert
+        assert statement_operation("  SELECT 1") == "select"
+        assert statement_operation("update orders set status = 1") == "update"
+        assert statement_operation("SHOW TABLES") == "other"
+    
+    def test_records_query_duration(self):
+        # Arrange
+        engine = create_engine("sqlite://")
+        instrument_queries(engine)
+        before = DB_QUERY_DURATION.child("select").snapshot()["count"]
+        
+        # Act
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        
+        # Assert
+        assert DB_QUERY_DURATION.child("select").snapshot()["count"] == before + 1
+
+class TestQueryAccounting:
+    def setup_method(self):
+        self.engine = create_engine("sqlite://")
+        instrument_queries(self.engine)
+    
+    def teardown_method(self):
+        self.engine.dispose()
+    
+    def test_count_queries(self):
+        # Act
+        with count_queries() as stats:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 3"))
+        
+        # Assert
+        assert stats.count == 2
+        assert stats.statements == ["SELECT 1", "SELECT 2"]
+        assert stats.total_time >= stats.slowest_time > 0
+    
+    def test_headers_report_the_slowest_statement(self):
+        # Arrange
+        stats = QueryStats()
+        stats.record("SELECT 1", 0.002)
+        stats.record("SELECT *\n  FROM orders", 0.010)
+        
+        # Act
+        headers = stats.headers()
+        
+        # Assert
+        assert headers == {
+            "X-DB-Query-Count": "2",
+            "X-DB-Query-Time-Ms": "12.00",
+            "X-DB-Slowest-Query": "10.00ms SELECT * FROM orders"
+        }
+    
+    @patch("app.core.instrumentation.DB_SLOW_QUERY_MS", 0.000001)
+    def test_slow_queries_are_logged(self, caplog):
+        # Act
+        with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT :value"), {"value": "12345678909"})
+        
+        # Assert
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record["event"] == "slow_query"
+        assert record["route"] == "-"
+        assert record["statement"] == "SELECT ?"
+        assert "12345678909" not in caplog.text
+    
+    @patch("app.core.instrumentation.DB_SLOW_QUERY_MS", 0)
+    def test_slow_query_log_disabled(self, caplog):
+        # Act
+        with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        
+        # Assert
+        assert caplog.records == []
+    
+    @patch("app.core.instrumentation.DB_QUERY_HEADERS", True)
+    def test_debug_headers_count_the_request_queries(self, sqlite_client):
+        # Act
+        response = sqlite_client.get("/api/orders/")
+        
+        # Assert
+        assert response.headers["X-DB-Query-Count"] == "1"
+        assert response.headers["X-DB-Slowest-Query"].split(" ", 2)[1] == "SELECT"
+    
+    def test_debug_headers_off_by_default(self, sqlite_client):
+        # Act
+        response = sqlite_client.get("/api/orders/")
+        
+        # Assert
+        assert "X-DB-Query-Count" not in response.headers
+
+class TestCacheCollector:
+    def test_exposes_cache_counters(self):
+        # Arrange
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+        
+        # Act
+        lines = cache_collector({"test": cache})()
+        
+        # Assert
+        assert 'cache_entries{cache="test"} 1' in lines
+        assert 'cache_hits_total{cache="test"} 1' in lines
+        assert 'cache_misses_total{cache="test"} 1' in lines
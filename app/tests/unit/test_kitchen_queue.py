@@ -0,0 +1,89 @@
+from unittest.mock import patch
+from app.domain.order_model import OrderResponse, OrderStatus
+from app.service.kitchen_queue import KitchenQueue
+
+def make_order(order_id, status, version=None):
+    return OrderResponse(id=order_id, client_id=1, total_price=10.0, status=status, products=[], version=version)
+
+class TestKitchenQueue:
+    def setup_method(self):
+        self.queue = KitchenQueue()
+    
+    def test_snapshot_orders_by_priority_then_age(self):
+        # Arrange
+        self.queue.load([
+            make_order(1, OrderStatus.RECEIVED),
+            make_order(2, OrderStatus.READY),
+            make_order(3, OrderStatus.PREPARING),
+            make_order(4, OrderStatus.READY),
+            make_order(5, OrderStatus.FINISHED),
+        ])
+        
+        # Act
+        board = self.queue.snapshot()
+        
+        # Assert
+        assert [order.id for order in board] == [2, 4, 3, 1]
+    
+    def test_upsert_moves_and_removes_orders(self):
+        # Arrange
+        self.queue.load([make_order(1, OrderStatus.RECEIVED), make_order(2, OrderStatus.RECEIVED)])
+        
+        # Act
+        self.queue.upsert(make_order(2, OrderStatus.PREPARING))
+        self.queue.upsert(make_order(1, OrderStatus.FINISHED))
+        self.queue.upsert(make_order(3, OrderStatus.RECEIVED))
+        
+        # Assert
+        assert [(order.id, order.status) for order in self.queue.snapshot()] == [
+            (2, OrderStatus.PREPARING),
+            (3, OrderStatus.RECEIVED),
+        ]
+    
+    def test_upsert_ignores_an_older_version(self):
+        # Arrange
+        self.queue.load([make_order(1, OrderStatus.RECEIVED, version=0)])
+        
+        # Act: v2 is applied before v1
+        self.queue.upsert(make_order(1, OrderStatus.READY, version=2))
+        self.queue.upsert(make_order(1, OrderStatus.PREPARING, version=1))
+        
+        # Assert
+        assert [(order.id, order.status, order.version) for order in self.queue.snapshot()] == [
+            (1, OrderStatus.READY, 2),
+        ]
+    
+    def test_upsert_does_not_readd_a_removed_order(self):
+        # Arrange
+        self.queue.load([make_order(1, OrderStatus.READY, version=2)])
+        
+        # Act: the order finishes before an older update arrives
+        self.queue.upsert(make_order(1, OrderStatus.FINISHED, version=3))
+        self.queue.upsert(make_order(1, OrderStatus.READY, version=2))
+        
+        # Assert
+        assert self.queue.snapshot() == []
+    
+    def test_needs_reload(self):
+        # Arrange
+        queue = KitchenQueue(max_age=5)
+        
+        # Assert
+        assert queue.needs_reload()
+        with patch('app.service.kitchen_queue.time.monotonic', return_value=100.0):
+            queue.load([])
+        with patch('app.service.kitchen_queue.time.monotonic', return_value=104.0):
+            assert not queue.needs_reload()
+        with patch('app.service.kitchen_queue.time.monotonic', return_value=106.0):
+            assert queue.needs_reload()
+    
+    def test_clear(self):
+        # Arrange
+        self.queue.load([make_order(1, OrderStatus.RECEIVED)])
+        
+        # Act
+        self.queue.clear()
+        
+        # Assert
+        assert not self.queue.loaded
+        assert self.queue.snapshot() == []
@@ -0,0 +1,158 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from app.core.metrics import Counter, Gauge, Histogram, HistogramVec, MetricsRegistry, PoolMetrics, collect_pools, instrumented_pool_class
+
+class TestHistogram:
+    def test_snapshot_is_cumulative(self):
+        # Arrange
+        histogram = Histogram([0.1, 1])
+        
+        # Act
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        
+        # Assert
+        assert snapshot["buckets"] == [(0.1, 2), (1, 3), (float("inf"), 4)]
+        assert snapshot["count"] == 4
+        assert snapshot["sum"] == pytest.approx(3.65)
+
+class TestPoolMetrics:
+    def setup_method(self):
+        # Real pool over in-memory SQLite: one connection, no overflow
+        self.metrics = PoolMetrics()
+        self.engine = create_engine(
+            "sqlite://",
+            poolclass=instrumented_pool_class(QueuePool, self.metrics),
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.01
+        )
+    
+    def teardown_method(self):
+        self.engine.dispose()
+    
+    def test_records_checkouts_and_gauges(self):
+        # Act
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            during = self.metrics.stats()
+        after = self.metrics.stats()
+        
+        # Assert
+        assert during["checked_out"] == 1
+        assert after["checked_out"] == 0
+        assert after["checkouts"] == 1
+        assert after["connects"] == 1
+        assert after["checkout_wait_seconds"]["count"] == 1
+        assert after["checkout_wait_seconds"]["buckets"]["+Inf"] == 1
+    
+    def test_records_timeouts(self):
+        # Act
+        with self.engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                self.engine.connect()
+        stats = self.metrics.stats()
+        
+        # Assert
+        assert stats["timeouts"] == 1
+        assert stats["checkout_wait_seconds"]["count"] == 2
+    
+    def test_records_recycles(self):
+        # Arrange
+        self.metrics.recycle = 3600
+        self.engine.pool._recycle = 3600
+        with self.engine.connect() as conn:
+            record = conn.connection._connection_record
+        record.starttime -= 7200
+        
+        # Act
+        with self.engine.connect():
+            pass
+        
+        # Assert
+        assert self.metrics.stats()["recycles"] == 1
+        assert self.metrics.stats()["connects"] == 2
+    
+    def test_metrics_follow_pool_after_dispose(self):
+        # Act
+        self.engine.dispose()
+        with self.engine.connect():
+            stats = self.metrics.stats()
+        
+        # Assert
+        assert self.metrics.pool is self.engine.pool
+        assert stats["checked_out"] == 1
+        assert stats["checkouts"] == 1
+
+class TestExposition:
+    def test_counter_renders_labelled_samples(self):
+        # Arrange
+        counter = Counter("requests", "Requests handled", ("method", "status"))
+        
+        # Act
+        counter.inc("GET", "200")
+        counter.inc("GET", "200")
+        counter.inc("POST", "201")
+        
+        # Assert
+        assert counter.collect() == [
+            "# HELP requests Requests handled",
+            "# TYPE requests counter",
+            'requests_total{method="GET",status="200"} 2',
+            'requests_total{method="POST",status="201"} 1'
+        ]
+    
+    def test_histogram_vec_renders_buckets_sum_and_count(self):
+        # Arrange
+        histogram = HistogramVec("latency_seconds", "Latency", ("route",), buckets=[0.5])
+        
+        # Act
+        histogram.observe(0.25, "/a")
+        histogram.observe(2, "/a")
+        
+        # Assert
+        assert histogram.collect()[2:] == [
+            'latency_seconds_bucket{route="/a",le="0.5"} 1',
+            'latency_seconds_bucket{route="/a",le="+Inf"} 2',
+            'latency_seconds_sum{route="/a"} 2.25',
+            'latency_seconds_count{route="/a"} 2'
+        ]
+    
+    def test_label_values_are_escaped(self):
+        # Arrange
+        gauge = Gauge("value", "Value", ("name",))
+        
+        # Act
+        gauge.inc('a"b\\c')
+        
+        # Assert
+        assert gauge.collect()[-1] == 'value{name="a\\"b\\\\c"} 1'
+    
+    def test_registry_renders_families_and_collectors(self):
+        # Arrange
+        registry = MetricsRegistry()
+        registry.register(Gauge("up", "Up")).inc()
+        registry.add_collector(lambda: ["extra 1"])
+        
+        # Act
+        text_output = registry.render()
+        
+        # Assert
+        assert text_output == "# HELP up Up\n# TYPE up gauge\nup 1\nextra 1\n"
+    
+    def test_collect_pools_labels_each_pool(self):
+        # Arrange
+        pools = [PoolMetrics(), PoolMetrics(name="replica")]
+        pools[1].record_wait(0.002, timed_out=True)
+        
+        # Act
+        lines = collect_pools(pools)
+        
+        # Assert
+        assert lines.count("# TYPE db_pool_timeouts counter") == 1
+        assert 'db_pool_timeouts_total{pool="primary"} 0' in lines
+        assert 'db_pool_timeouts_total{pool="replica"} 1' in lines
+        assert 'db_pool_checkout_wait_seconds_count{pool="replica"} 1' in lines
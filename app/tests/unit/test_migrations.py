@@ -0,0 +1,210 @@
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, insert, inspect, select, text
+from sqlalchemy.pool import StaticPool
+from app.domain.client_model import ClientDB
+from app.domain.order_model import OrderDB, OrderItemDB
+from app.repository.migrations import Migration, MIGRATIONS, SQLITE_INITIAL_SCHEMA, add_column, backfill_order_items, create_index, run_migrations, migration_status
+
+class TestMigrations:
+    def setup_method(self):
+        # Mock engine whose connection answers the runner's bookkeeping queries
+        self.applied = set()
+        self.lock_result = 1
+        self.index_exists = False
+        self.statements = []
+        
+        self.mock_conn = MagicMock()
+        self.mock_conn.execute.side_effect = self._execute
+        self.mock_conn.dialect.name = "mysql"
+        self.mock_engine = MagicMock()
+        self.mock_engine.connect.return_value.__enter__.return_value = self.mock_conn
+    
+    def _execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        result = MagicMock()
+        if sql.startswith("SELECT version FROM schema_migrations"):
+            result.scalars.return_value = list(self.applied)
+        elif sql.startswith("SELECT GET_LOCK"):
+            result.scalar.return_value = self.lock_result
+        elif "information_schema.statistics" in sql:
+            result.first.return_value = (1,) if self.index_exists else None
+        elif sql.startswith("INSERT INTO schema_migrations"):
+            self.applied.add(params["version"])
+        return result
+    
+    def test_versions_are_unique_and_ordered(self):
+        # Assert
+        versions = [migration.version for migration in MIGRATIONS]
+        assert versions == sorted(set(versions))
+    
+    def test_run_migrations_applies_pending_in_order(self):
+        # Arrange
+        self.applied = {1}
+        migrations = [
+            Migration(3, "third", ["CREATE TABLE c (id INT)"]),
+            Migration(1, "first", ["CREATE TABLE a (id INT)"]),
+            Migration(2, "second", ["CREATE TABLE b (id INT)"])
+        ]
+        
+        # Act
+        applied = run_migrations(self.mock_engine, migrations)
+        
+        # Assert
+        assert applied == [2, 3]
+        assert "CREATE TABLE a (id INT)" not in self.statements
+        assert self.statements.index("CREATE TABLE b (id INT)") < self.statements.index("CREATE TABLE c (id INT)")
+        assert self.statements[-1].startswith("SELECT RELEASE_LOCK")
+        self.mock_engine.dispose.assert_not_called()
+    
+    def test_run_migrations_up_to_date(self):
+        # Arrange
+        self.applied = {migration.version for migration in MIGRATIONS}
+        
+        # Act
+        applied = run_migrations(self.mock_engine)
+        
+        # Assert
+        assert applied == []
+        assert not any(sql.startswith("CREATE INDEX") for sql in self.statements)
+    
+    def test_run_migrations_lock_timeout(self):
+        # Arrange
+        self.lock_result = 0
+        
+        # Act & Assert
+        with pytest.raises(RuntimeError, match="schema migration lock"):
+            run_migrations(self.mock_engine)
+        assert not any(sql.startswith("INSERT INTO schema_migrations") for sql in self.statements)
+    
+    def test_create_index_skips_existing_index(self):
+        # Arrange
+        step = create_index("ix_orders_status_id", "orders", ["status", "id"])
+        
+        # Act
+        step(self.mock_conn)
+        self.index_exists = True
+        step(self.mock_conn)
+        
+        # Assert
+        created = [sql for sql in self.statements if sql.startswith("CREATE INDEX")]
+        assert created == ["CREATE INDEX ix_orders_status_id ON orders (status, id)"]
+    
+    def test_migration_status(self):
+        # Arrange
+        self.applied = {1}
+        
+        # Act
+        status = migration_status(self.mock_engine)
+        
+        # Assert
+        assert status[0] == (1, "initial_schema", True)
+        assert all(not applied for _, _, applied in status[1:])
+
+class TestMigrationsOnSQLite:
+    def setup_method(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+    
+    def teardown_method(self):
+        self.engine.dispose()
+    
+    def test_run_migrations_builds_the_schema(self):
+        # Act
+        applied = run_migrations(self.engine)
+        
+        # Assert
+        assert applied == [migration.version for migration in MIGRATIONS]
+        inspector = inspect(self.engine)
+        assert {"products", "clients", "orders", "order_items", "schema_migrations"} <= set(inspector.get_table_names())
+        index_names = {index["name"] for index in inspector.get_indexes("orders")}
+        assert {"ix_orders_status_id", "ix_orders_client_id_id"} <= index_names
+    
+    def test_run_migrations_is_idempotent(self):
+        # Arrange
+        run_migrations(self.engine)
+        
+        # Act
+        applied = run_migrations(self.engine)
+        
+        # Assert
+        assert applied == []
+        assert all(applied for _, _, applied in migration_status(self.engine))
+    
+    def test_schema_matches_the_models(self):
+        # Arrange
+        run_migrations(self.engine)
+        
+        # Act
+        with self.engine.begin() as conn:
+            client_id = conn.execute(insert(ClientDB).values(name="Ana", cpf="123.456.789-09", cpf_digits="12345678909")).inserted_primary_key[0]
+            conn.execute(insert(OrderDB).values(client_id=client_id, total_price=10.0, status="Recebido", products=[{"id": 1}]))
+            order = conn.execute(select(OrderDB.client_id, OrderDB.products)).one()
+        
+        # Assert
+        assert order.client_id == client_id
+        assert order.products == [{"id": 1}]
+    
+    def test_upgrades_a_baseline_database(self):
+        # Arrange: tables created by the original 03_create_tables.sql, with data
+        with self.engine.begin() as conn:
+            for statement in SQLITE_INITIAL_SCHEMA:
+                conn.execute(text(statement))
+            conn.execute(text("INSERT INTO clients (id, name, cpf) VALUES (1, 'Ana', '620.546.640-65')"))
+            conn.execute(text(
+                "INSERT INTO orders (id, client_id, total_price, status, products) VALUES "
+                "(1, 1, 20.0, 'Recebido', '[{\"id\": 1, \"quantity\": 2, \"price\": 5.0}, {\"id\": \"X1\"}]')"
+            ))
+        
+        # Act
+        applied = run_migrations(self.engine)
+        
+        # Assert
+        assert applied == [migration.version for migration in MIGRATIONS]
+        with self.engine.connect() as conn:
+            assert conn.execute(select(ClientDB.cpf_digits)).scalar_one() == "62054664065"
+            items = conn.execute(select(OrderItemDB.order_id, OrderItemDB.product_id, OrderItemDB.quantity, OrderItemDB.unit_price)).all()
+        assert [tuple(item) for item in items] == [(1, 1, 2, 5.0)]
+        unique_names = {constraint["name"] for constraint in inspect(self.engine).get_unique_constraints("clients")}
+        unique_names |= {index["name"] for index in inspect(self.engine).get_indexes("clients") if index["unique"]}
+        assert "ux_clients_cpf_digits" in unique_names
+    
+    def test_order_items_backfill_skips_orders_with_items(self):
+        # Arrange
+        run_migrations(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(insert(ClientDB).values(id=1, name="Ana", cpf="123.456.789-09", cpf_digits="12345678909"))
+            conn.execute(insert(OrderDB).values(id=1, client_id=1, total_price=10.0, status="Recebido", products=[{"id": 1}]))
+            conn.execute(insert(OrderItemDB).values(order_id=1, product_id=1, quantity=1, unit_price=10.0))
+        
+        # Act
+        with self.engine.begin() as conn:
+            backfill_order_items(conn)
+            items = conn.execute(select(OrderItemDB.id)).all()
+        
+        # Assert
+        assert len(items) == 1
+    
+    def test_orders_version_backfills_existing_rows(self):
+        # Arrange: a database migrated up to the version before it, with an order
+        run_migrations(self.engine, [m for m in MIGRATIONS if m.name != "orders_version"])
+        with self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO clients (id, name, cpf, cpf_digits) VALUES (1, 'Ana', '123.456.789-09', '12345678909')"))
+            conn.execute(text("INSERT INTO orders (id, client_id, total_price, status, products) VALUES (1, 1, 10.0, 'Recebido', '[]')"))
+        
+        # Act
+        applied = run_migrations(self.engine)
+        
+        # Assert
+        assert applied == [7]
+        with self.engine.connect() as conn:
+            assert conn.execute(select(OrderDB.version)).scalar_one() == 0
+    
+    def test_add_column_skips_an_existing_column(self):
+        # Arrange
+        run_migrations(self.engine)
+        step = add_column("orders", "version", "INT NOT NULL DEFAULT 0")
+        
+        # Act & Assert: a second ALTER would fail with a duplicate column
+        with self.engine.begin() as conn:
+            step(conn)
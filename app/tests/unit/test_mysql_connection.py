@@ -0,0 +1,241 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, insert, select, text, update
+from sqlalchemy.pool import QueuePool, StaticPool
+from app.core import mysql_connection
+from app.core.metrics import PoolMetrics
+from app.core.mysql_connection import PRIMARY_READ, RoutingSession, get_connection_url, get_engine, get_engine_options
+from app.domain.product_model import ProductCreate, ProductDB
+from app.repository.migrations import run_migrations
+from app.service.product_service import ProductService, product_cache
+
+class TestConnectionProfile:
+    def test_mysql_url_by_default(self):
+        # Act
+        with patch.object(mysql_connection, "DATABASE_URL", ""):
+            url = get_connection_url()
+            async_url = get_connection_url("aiomysql")
+        
+        # Assert
+        assert url.startswith("mysql+pymysql://")
+        assert async_url.startswith("mysql+aiomysql://")
+    
+    def test_database_url_overrides_mysql(self):
+        # Act
+        with patch.object(mysql_connection, "DATABASE_URL", "sqlite:///./fastfood.db"):
+            url = get_connection_url()
+        
+        # Assert
+        assert url == "sqlite:///./fastfood.db"
+    
+    def test_async_database_url_uses_the_async_driver(self):
+        # Act
+        with patch.object(mysql_connection, "DATABASE_URL", "mysql+pymysql://user:pass@db:3306/fastfood"):
+            url = get_connection_url("aiomysql")
+        
+        # Assert
+        assert url == "mysql+aiomysql://user:pass@db:3306/fastfood"
+    
+    def test_async_sqlite_is_rejected(self):
+        # Act & Assert
+        with patch.object(mysql_connection, "DATABASE_URL", "sqlite:///./fastfood.db"):
+            with pytest.raises(ValueError, match="DB_ASYNC=true has no async driver for a sqlite"):
+                get_connection_url("aiomysql")
+    
+    def test_memory_sqlite_shares_one_connection(self):
+        # Act
+        options = get_engine_options("sqlite://")
+        
+        # Assert
+        assert options["poolclass"] is StaticPool
+        assert options["connect_args"] == {"check_same_thread": False}
+        assert "pool_size" not in options
+    
+    def test_file_sqlite_keeps_the_pool_settings(self):
+        # Act
+        options = get_engine_options("sqlite:///./fastfood.db")
+        
+        # Assert
+        assert "poolclass" not in options
+        assert options["pool_size"] == mysql_connection.DB_POOL_SIZE
+    
+    def test_memory_engine_is_shared_and_enforces_foreign_keys(self):
+        # Arrange
+        with patch.object(mysql_connection, "DATABASE_URL", "sqlite://"):
+            engine = get_engine(PoolMetrics())
+        
+        # Act
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+        with engine.connect() as conn:
+            tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars().all()
+            foreign_keys = conn.execute(text("PRAGMA foreign_keys")).scalar()
+        engine.dispose()
+        
+        # Assert
+        assert tables == ["t"]
+        assert foreign_keys == 1
+    
+    def test_file_engine_is_instrumented(self, tmp_path):
+        # Arrange
+        metrics = PoolMetrics()
+        
+        # Act
+        with patch.object(mysql_connection, "DATABASE_URL", f"sqlite:///{tmp_path / 'fastfood.db'}"):
+            engine = get_engine(metrics)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        engine.dispose()
+        
+        # Assert
+        assert isinstance(engine.pool, QueuePool)
+        assert metrics.stats()["checkouts"] == 1
+    
+    def test_replica_url(self):
+        # Act
+        with patch.object(mysql_connection, "DATABASE_URL", ""), \
+             patch.object(mysql_connection, "DATABASE_READ_URL", ""), \
+             patch.object(mysql_connection, "DB_READ_HOST", "db-fastfood-replica"):
+            url = get_connection_url(replica=True)
+        
+        # Assert
+        assert url.startswith("mysql+pymysql://")
+        assert "@db-fastfood-replica:" in url
+    
+    def test_replica_database_url(self):
+        # Act
+        with patch.object(mysql_connection, "DATABASE_READ_URL", "sqlite:///./replica.db"):
+            url = get_connection_url(replica=True)
+        
+        # Assert
+        assert url == "sqlite:///./replica.db"
+
+class TestRoutingSession:
+    def setup_method(self):
+        # Primary and replica are separate databases holding a different name
+        # for the same product, so each read shows which engine served it
+        self.writer = create_engine("sqlite://", poolclass=StaticPool)
+        self.reader = create_engine("sqlite://", poolclass=StaticPool)
+        for engine, name in ((self.writer, "primary"), (self.reader, "replica")):
+            run_migrations(engine)
+            with engine.begin() as conn:
+                conn.execute(insert(ProductDB).values(id=1, name=name, category="Lanche", price=10.0))
+    
+    def teardown_method(self):
+        self.writer.dispose()
+        self.reader.dispose()
+    
+    def read_name(self, session, **options):
+        return session.execute(select(ProductDB.name).where(ProductDB.id == 1), **options).scalar()
+    
+    def test_reads_go_to_the_replica(self):
+        # Arrange
+        session = RoutingSession(writer=self.writer, reader=self.reader)
+        
+        # Act
+        name = self.read_name(session)
+        
+        # Assert
+        assert name == "replica"
+        session.close()
+    
+    def test_locking_reads_go_to_the_primary(self):
+        # Arrange
+        session = RoutingSession(writer=self.writer, reader=self.reader)
+        
+        # Act
+        name = session.execute(select(ProductDB.name).where(ProductDB.id == 1).with_for_update()).scalar()
+        
+        # Assert
+        assert name == "primary"
+        session.close()
+    
+    def test_reads_after_a_write_go_to_the_primary(self):
+        # Arrange
+        session = RoutingSession(writer=self.writer, reader=self.reader)
+        
+        # Act
+        session.execute(update(ProductDB).where(ProductDB.id == 1).values(price=12.0))
+        in_transaction = self.read_name(session)
+        session.commit()
+        after_commit = self.read_name(session)
+        
+        # Assert
+        assert in_transaction == "primary"
+        assert after_commit == "primary"
+        session.close()
+    
+    def test_flushes_go_to_the_primary(self):
+        # Arrange
+        session = RoutingSession(writer=self.writer, reader=self.reader)
+        
+        # Act
+        session.add(ProductDB(name="New", category="Bebida", price=5.0))
+        session.commit()
+        
+        # Assert
+        with self.writer.connect() as conn:
+            assert conn.execute(select(ProductDB.id).where(ProductDB.name == "New")).scalar() == 2
+        assert self.read_name(session) == "primary"
+        session.close()
+    
+    def test_without_read_your_writes_reads_return_to_the_replica(self):
+        # Arrange
+        session = RoutingSession(writer=self.writer, reader=self.reader, read_your_writes=False)
+        
+        # Act
+        session.execute(update(ProductDB).where(ProductDB.id == 1).values(price=12.0))
+        in_transaction = self.read_name(session)
+        session.commit()
+        after_commit = self.read_name(session)
+        
+        # Assert
+        assert in_transaction == "primary"
+        assert after_commit == "replica"
+        session.close()
+    
+    def test_without_reader_everything_goes_to_the_writer(self):
+        # Arrange
+        session = RoutingSession(writer=self.writer)
+        
+        # Act
+        name = self.read_name(session)
+        
+        # Assert
+        assert name == "primary"
+        assert session.get_bind() is self.writer
+        session.close()
+    
+    def test_primary_reads_go_to_the_primary(self):
+        # Arrange
+        session = RoutingSession(writer=self.writer, reader=self.reader)
+        
+        # Act
+        name = session.execute(
+            select(ProductDB.name).where(ProductDB.id == 1).execution_options(**{PRIMARY_READ: True})
+        ).scalar()
+        
+        # Assert
+        assert name == "primary"
+        assert not session.wrote
+        session.close()
+    
+    def test_product_cache_is_filled_from_the_primary(self):
+        # Arrange: the replica has not applied the write yet
+        product_cache.clear()
+        writing = RoutingSession(writer=self.writer, reader=self.reader)
+        changes = ProductCreate(name="Updated", category="Lanche", price=12.0)
+        ProductService(writing).update_product(1, changes)
+        writing.close()
+        
+        # Act: the next request reads through a fresh session
+        reading = RoutingSession(writer=self.writer, reader=self.reader)
+        product = ProductService(reading).get_product_by_id(1)
+        page = ProductService(reading).get_all_products()
+        reading.close()
+        
+        # Assert
+        assert product.name == "Updated"
+        assert [p.name for p in page.products] == ["Updated"]
+        assert product_cache.get(("product", 1))[0].name == "Updated"
+        product_cache.clear()
@@ -1,6 +1,6 @@
 import pytest
 from pydantic import ValidationError
-from app.domain.order_model import OrderCreate, OrderResponse, OrderStatus, OrderDB, OrderStatusUpdate
+from app.domain.order_model import OrderCreate, OrderResponse, OrderStatus, OrderDB, OrderStatusUpdate, build_order_item_rows
 
 class TestOrderModel:
     def test_order_create_valid(self):
@@ -88,3 +88,55 @@ class TestOrderModel:
         
         with pytest.raises(ValidationError):
             OrderStatusUpdate(**status_data)
+    
+    def test_order_create_invalid_line_items(self):
+        # Test line items that cannot be written to order_items
+        for item in ({"id": "X1"}, {"id": 1, "quantity": 1.5}, {"id": 1, "price": "free"}, {"id": True}):
+            with pytest.raises(ValidationError):
+                OrderCreate(client_id=1, total_price=10.0, products=[item])
+    
+    def test_order_create_numeric_strings_in_line_items(self):
+        # Test line items whose numbers arrive as strings or whole floats
+        order = OrderCreate(client_id=1, total_price=10.0, products=[{"id": "3", "quantity": 2.0, "price": "4.5"}])
+        
+        assert build_order_item_rows(1, order.products) == [
+            {"order_id": 1, "product_id": 3, "quantity": 2, "unit_price": 4.5}
+        ]
+    
+    def test_build_order_item_rows_skip_invalid(self):
+        # Test skipping malformed items of rows stored before validation
+        products = [{"id": "X1"}, {"id": 2, "quantity": 1.5}, {"id": 3, "quantity": 1, "price": 5}]
+        
+        rows = build_order_item_rows(9, products, skip_invalid=True)
+        
+        assert rows == [{"order_id": 9, "product_id": 3, "quantity": 1, "unit_price": 5.0}]
+        with pytest.raises(ValueError, match=r"products\[0\]: quantity must be a whole number"):
+            build_order_item_rows(9, products[1:])
+    
+    def test_order_status_transitions_only_move_forward(self):
+        # Test the transition graph of the kitchen
+        assert OrderStatus.RECEIVED.can_transition_to(OrderStatus.PREPARING)
+        assert OrderStatus.READY.can_transition_to(OrderStatus.FINISHED)
+        assert not OrderStatus.RECEIVED.can_transition_to(OrderStatus.READY)
+        assert not OrderStatus.FINISHED.can_transition_to(OrderStatus.RECEIVED)
+        assert not OrderStatus.PREPARING.can_transition_to(OrderStatus.PREPARING)
+    
+    def test_order_status_previous_statuses(self):
+        # Test the statuses an update may start from
+        assert OrderStatus.PREPARING.previous_statuses() == [OrderStatus.RECEIVED]
+        assert OrderStatus.RECEIVED.previous_statuses() == []
+    
+    def test_build_order_item_rows(self):
+        # Test mapping the products JSON to order_items rows
+        products = [
+            {"id": 1, "name": "Product 1", "quantity": 2, "price": 10.99},
+            {"product_id": "2", "unit_price": 4.01},
+            {"name": "Item without product ID"}
+        ]
+        
+        rows = build_order_item_rows(7, products)
+        
+        assert rows == [
+            {"order_id": 7, "product_id": 1, "quantity": 2, "unit_price": 10.99},
+            {"order_id": 7, "product_id": 2, "quantity": 1, "unit_price": 4.01}
+        ]
@@ -1,8 +1,12 @@
 import pytest
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from unittest.mock import MagicMock, patch
-from app.repository.order_repository import OrderRepository
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repository.order_repository import OrderRepository, AsyncOrderRepository, ORDER_COLUMNS, ORDER_SUMMARY_COLUMNS
+from app.domain.client_model import ClientDB
 from app.domain.order_model import OrderDB, OrderStatus
+from app.exceptions import OrderStatusConflict
 
 class TestOrderRepository:
     def setup_method(self):
@@ -24,30 +28,41 @@ class TestOrderRepository:
     
     def test_get_all_orders(self):
         # Arrange
-        self.mock_session.query.return_value.all.return_value = [self.sample_order]
+        self.mock_session.query.return_value.order_by.return_value.all.return_value = [self.sample_order]
         
         # Act
         orders = self.repository.get_all_orders()
         
         # Assert
-        self.mock_session.query.assert_called_once_with(OrderDB)
+        self.mock_session.query.assert_called_once_with(*ORDER_COLUMNS)
         assert len(orders) == 1
         assert orders[0].id == 1
         assert orders[0].status == OrderStatus.RECEIVED
     
     def test_get_orders_by_status(self):
         # Arrange
-        self.mock_session.query.return_value.filter.return_value.all.return_value = [self.sample_order]
+        self.mock_session.query.return_value.filter.return_value.order_by.return_value.all.return_value = [self.sample_order]
         
         # Act
         orders = self.repository.get_orders_by_status(OrderStatus.RECEIVED)
         
         # Assert
-        self.mock_session.query.assert_called_once_with(OrderDB)
+        self.mock_session.query.assert_called_once_with(*ORDER_COLUMNS)
         self.mock_session.query.return_value.filter.assert_called_once()
         assert len(orders) == 1
         assert orders[0].status == OrderStatus.RECEIVED
     
+    def test_get_all_orders_without_products(self):
+        # Arrange
+        self.mock_session.query.return_value.order_by.return_value.all.return_value = []
+        
+        # Act
+        self.repository.get_all_orders(include_products=False)
+        
+        # Assert: the products JSON column is not selected
+        self.mock_session.query.assert_called_once_with(*ORDER_SUMMARY_COLUMNS)
+        assert OrderDB.products not in ORDER_SUMMARY_COLUMNS
+    
     def test_get_order_by_id_found(self):
         # Arrange
         self.mock_session.query.return_value.filter.return_value.first.return_value = self.sample_order
@@ -56,7 +71,7 @@ class TestOrderRepository:
         order = self.repository.get_order_by_id(1)
         
         # Assert
-        self.mock_session.query.assert_called_once_with(OrderDB)
+        self.mock_session.query.assert_called_once_with(*ORDER_COLUMNS)
         self.mock_session.query.return_value.filter.assert_called_once()
         assert order.id == 1
         assert order.client_id == 1
@@ -96,40 +111,301 @@ class TestOrderRepository:
             
             # Assert
             self.mock_session.add.assert_called_once()
+            self.mock_session.flush.assert_called_once()
             self.mock_session.commit.assert_called_once()
-            self.mock_session.refresh.assert_called_once()
+            self.mock_session.refresh.assert_not_called()
+            
+            # Line items are written with a single multi-row INSERT
+            self.mock_session.execute.assert_called_once()
+            statement = self.mock_session.execute.call_args[0][0]
+            assert statement.table.name == "order_items"
             assert new_order.id == 2
             assert new_order.client_id == 2
             assert new_order.status == OrderStatus.RECEIVED
     
     def test_update_order_status_found(self):
         # Arrange
-        order_to_update = OrderDB(
+        updated_row = OrderDB(
             id=1, 
             client_id=1,
             total_price=25.99,
-            status=OrderStatus.RECEIVED,
+            status=OrderStatus.PREPARING,
             products=[
                 {"id": 1, "name": "Product 1", "quantity": 2, "price": 10.99},
                 {"id": 2, "name": "Product 2", "quantity": 1, "price": 4.01}
             ]
         )
         
-        self.mock_session.query.return_value.filter.return_value.first.return_value = order_to_update
+        self.mock_session.execute.return_value.rowcount = 1
+        self.mock_session.query.return_value.filter.return_value.first.return_value = updated_row
         
         # Act
         updated_order = self.repository.update_order_status(1, OrderStatus.PREPARING)
         
-        # Assert
+        # Assert: one UPDATE, one read back and the commit
+        self.mock_session.execute.assert_called_once()
+        statement = self.mock_session.execute.call_args[0][0]
+        assert statement.is_update
+        assert statement.compile().params["status"] == OrderStatus.PREPARING
+        self.mock_session.query.assert_called_once()
         self.mock_session.commit.assert_called_once()
-        self.mock_session.refresh.assert_called_once()
+        self.mock_session.refresh.assert_not_called()
         assert updated_order.id == 1
         assert updated_order.status == OrderStatus.PREPARING
     
     def test_update_order_status_not_found(self):
         # Arrange
+        self.mock_session.execute.return_value.rowcount = 0
         self.mock_session.query.return_value.filter.return_value.first.return_value = None
         
         # Act & Assert
         with pytest.raises(ValueError, match="Order with ID 999 not found"):
             self.repository.update_order_status(999, OrderStatus.PREPARING)
+        self.mock_session.commit.assert_not_called()
+        self.mock_session.rollback.assert_called_once()
+    
+    def test_update_order_status_conflict(self):
+        # Arrange
+        current = OrderDB(id=1, client_id=1, total_price=25.99, status=OrderStatus.READY.value, version=3, products=[])
+        self.mock_session.execute.return_value.rowcount = 0
+        self.mock_session.query.return_value.filter.return_value.first.return_value = current
+        
+        # Act & Assert
+        with pytest.raises(OrderStatusConflict) as conflict:
+            self.repository.update_order_status(1, OrderStatus.PREPARING, expected_version=2)
+        assert conflict.value.current_status == OrderStatus.READY.value
+        assert conflict.value.current_version == 3
+        self.mock_session.commit.assert_not_called()
+    
+    def test_update_order_status_statement_checks_transition_and_version(self):
+        # Arrange
+        self.mock_session.execute.return_value.rowcount = 1
+        
+        # Act
+        self.repository.update_order_status(1, OrderStatus.READY, expected_version=4)
+        
+        # Assert
+        statement = self.mock_session.execute.call_args[0][0]
+        sql = str(statement.compile(compile_kwargs={"literal_binds": True}))
+        assert "orders.status IN ('Em preparação')" in sql
+        assert "orders.version = 4" in sql
+        assert "version=(orders.version + 1)" in sql
+    
+    def test_stream_orders(self):
+        # Arrange
+        self.mock_session.query.return_value.order_by.return_value.yield_per.return_value = iter([self.sample_order])
+        
+        # Act
+        orders = list(self.repository.stream_orders(batch_size=100))
+        
+        # Assert
+        self.mock_session.query.return_value.order_by.return_value.yield_per.assert_called_once_with(100)
+        assert [order.id for order in orders] == [1]
+    
+    def test_create_order_without_product_ids_skips_items(self):
+        # Arrange
+        order_data = {
+            "client_id": 2,
+            "total_price": 15.50,
+            "status": OrderStatus.RECEIVED,
+            "products": [{"name": "Custom item", "quantity": 1}]
+        }
+        
+        # Act
+        self.repository.create_order(order_data)
+        
+        # Assert
+        self.mock_session.execute.assert_not_called()
+        self.mock_session.commit.assert_called_once()
+
+    def test_create_orders_single_transaction(self):
+        # Arrange
+        orders_data = [
+            {"client_id": 1, "total_price": 10.0, "status": OrderStatus.RECEIVED,
+             "products": [{"id": 1, "quantity": 1, "price": 10.0}]},
+            {"client_id": 2, "total_price": 8.0, "status": OrderStatus.RECEIVED,
+             "products": [{"id": 2, "quantity": 2, "price": 4.0}]}
+        ]
+        
+        # Simulate the database assigning IDs on flush
+        def assign_ids():
+            for order_id, order in enumerate(self.mock_session.add_all.call_args[0][0], start=10):
+                order.id = order_id
+        self.mock_session.flush.side_effect = assign_ids
+        
+        # Act
+        order_ids = self.repository.create_orders(orders_data)
+        
+        # Assert
+        assert order_ids == [10, 11]
+        self.mock_session.add_all.assert_called_once()
+        self.mock_session.flush.assert_called_once()
+        self.mock_session.commit.assert_called_once()
+        self.mock_session.refresh.assert_not_called()
+        
+        # The line items of every order go in one INSERT
+        self.mock_session.execute.assert_called_once()
+        statement = self.mock_session.execute.call_args[0][0]
+        assert statement.table.name == "order_items"
+
+
+class TestOrderStatusConcurrency:
+    """
+    Conditional status updates against SQLite, two kitchen terminals each
+    holding their own session
+    """
+    @pytest.fixture(autouse=True)
+    def seed(self, sqlite_engine):
+        with sqlite_engine.begin() as conn:
+            conn.execute(insert(ClientDB).values(id=1, name="Ana", cpf="123.456.789-09", cpf_digits="12345678909"))
+            conn.execute(insert(OrderDB).values(id=1, client_id=1, total_price=10.0, status=OrderStatus.RECEIVED.value, products=[]))
+        self.first = Session(sqlite_engine)
+        self.second = Session(sqlite_engine)
+        yield
+        self.first.close()
+        self.second.close()
+    
+    def test_update_bumps_the_version(self):
+        # Act
+        order = OrderRepository(self.first).update_order_status(1, OrderStatus.PREPARING, expected_version=0)
+        
+        # Assert
+        assert order.status == OrderStatus.PREPARING.value
+        assert order.version == 1
+    
+    def test_concurrent_update_with_the_same_version_conflicts(self):
+        # Arrange: both terminals read version 0
+        OrderRepository(self.first).update_order_status(1, OrderStatus.PREPARING, expected_version=0)
+        
+        # Act & Assert
+        with pytest.raises(OrderStatusConflict) as conflict:
+            OrderRepository(self.second).update_order_status(1, OrderStatus.PREPARING, expected_version=0)
+        assert conflict.value.current_status == OrderStatus.PREPARING.value
+        assert conflict.value.current_version == 1
+    
+    def test_concurrent_update_without_version_does_not_apply_twice(self):
+        # Arrange
+        OrderRepository(self.first).update_order_status(1, OrderStatus.PREPARING)
+        
+        # Act & Assert: the status is no longer Recebido
+        with pytest.raises(OrderStatusConflict):
+            OrderRepository(self.second).update_order_status(1, OrderStatus.PREPARING)
+    
+    def test_finished_order_cannot_go_back(self):
+        # Arrange
+        repository = OrderRepository(self.first)
+        for next_status in (OrderStatus.PREPARING, OrderStatus.READY, OrderStatus.FINISHED):
+            repository.update_order_status(1, next_status)
+        
+        # Act & Assert
+        with pytest.raises(OrderStatusConflict):
+            repository.update_order_status(1, OrderStatus.RECEIVED)
+        assert repository.get_order_by_id(1).status == OrderStatus.FINISHED.value
+
+class TestAsyncOrderRepository:
+    def setup_method(self):
+        # Create a mock async session for each test
+        self.mock_session = AsyncMock(spec=AsyncSession)
+        self.repository = AsyncOrderRepository(self.mock_session)
+        
+        # Sample order data
+        self.sample_order = OrderDB(
+            id=1, 
+            client_id=1,
+            total_price=25.99,
+            status=OrderStatus.RECEIVED,
+            products=[
+                {"id": 1, "name": "Product 1", "quantity": 2, "price": 10.99}
+            ]
+        )
+    
+    def _mock_result(self, rows):
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = rows
+        result.scalars.return_value.first.return_value = rows[0] if rows else None
+        result.all.return_value = rows
+        result.first.return_value = rows[0] if rows else None
+        self.mock_session.execute.return_value = result
+    
+    @pytest.mark.asyncio
+    async def test_get_all_orders(self):
+        # Arrange
+        self._mock_result([self.sample_order])
+        
+        # Act
+        orders = await self.repository.get_all_orders()
+        
+        # Assert
+        self.mock_session.execute.assert_awaited_once()
+        assert len(orders) == 1
+        assert orders[0].id == 1
+    
+    @pytest.mark.asyncio
+    async def test_get_order_by_id_not_found(self):
+        # Arrange
+        self._mock_result([])
+        
+        # Act
+        order = await self.repository.get_order_by_id(999)
+        
+        # Assert
+        assert order is None
+    
+    @pytest.mark.asyncio
+    async def test_create_order(self):
+        # Arrange
+        order_data = {
+            "client_id": 2,
+            "total_price": 15.50,
+            "status": OrderStatus.RECEIVED,
+            "products": [{"id": 3, "name": "Product 3", "quantity": 1, "price": 15.50}]
+        }
+        
+        # Act
+        new_order = await self.repository.create_order(order_data)
+        
+        # Assert
+        self.mock_session.add.assert_called_once()
+        self.mock_session.commit.assert_awaited_once()
+        self.mock_session.refresh.assert_not_awaited()
+        assert new_order.client_id == 2
+    
+    @pytest.mark.asyncio
+    async def test_update_order_status_found(self):
+        # Arrange
+        self.sample_order.status = OrderStatus.PREPARING
+        self._mock_result([self.sample_order])
+        self.mock_session.execute.return_value.rowcount = 1
+        
+        # Act
+        updated_order = await self.repository.update_order_status(1, OrderStatus.PREPARING)
+        
+        # Assert: the UPDATE and a single read back
+        assert self.mock_session.execute.await_count == 2
+        self.mock_session.commit.assert_awaited_once()
+        self.mock_session.refresh.assert_not_awaited()
+        assert updated_order.status == OrderStatus.PREPARING
+    
+    @pytest.mark.asyncio
+    async def test_update_order_status_not_found(self):
+        # Arrange
+        self._mock_result([])
+        self.mock_session.execute.return_value.rowcount = 0
+        
+        # Act & Assert
+        with pytest.raises(ValueError, match="Order with ID 999 not found"):
+            await self.repository.update_order_status(999, OrderStatus.PREPARING)
+    
+    @pytest.mark.asyncio
+    async def test_stream_orders(self):
+        # Arrange
+        async def rows():
+            yield self.sample_order
+        self.mock_session.stream.return_value = rows()
+        
+        # Act
+        orders = [order async for order in self.repository.stream_orders(batch_size=100)]
+        
+        # Assert
+        self.mock_session.stream.assert_awaited_once()
+        assert [order.id for order in orders] == [1]
@@ -1,7 +1,11 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from fastapi import status
-from app.domain.order_model import OrderResponse, OrderListResponse, OrderStatus
+from app.api.order_routes import order_event_stream
+from app.core.broadcaster import Broadcaster, Event
+from app.domain.order_model import OrderResponse, OrderListResponse, OrderStatus, OrderExportFormat, OrderBatchResponse, OrderBatchItemResult
+from app.core.idempotency import IdempotencyCoordinator, MemoryIdempotencyStore
+from app.exceptions import OrderBatchError, OrderStatusConflict
 
 class TestOrderRoutes:
     def setup_method(self):
@@ -14,7 +18,8 @@ class TestOrderRoutes:
             "products": [
                 {"id": 1, "name": "Product 1", "quantity": 2, "price": 10.99},
                 {"id": 2, "name": "Product 2", "quantity": 1, "price": 4.01}
-            ]
+            ],
+            "version": 0
         }
         
         self.sample_order_response = OrderResponse(**self.sample_order)
@@ -45,9 +50,25 @@ class TestOrderRoutes:
         
         # Assert
         assert response.status_code == status.HTTP_200_OK
-        assert response.json() == {"orders": [self.sample_order]}
+        assert response.json() == {"orders": [self.sample_order], "next_cursor": None}
         mock_service.get_all_orders.assert_called_once()
     
+    @patch('app.api.order_routes.OrderService')
+    def test_get_all_orders_without_products(self, mock_service_class, authenticated_client):
+        # Arrange
+        mock_service = MagicMock()
+        mock_service_class.return_value = mock_service
+        summary = OrderResponse(**{**self.sample_order, "products": None})
+        mock_service.get_all_orders.return_value = OrderListResponse(orders=[summary])
+        
+        # Act
+        response = authenticated_client.get("/api/orders/?include_products=false")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["orders"][0]["products"] is None
+        assert mock_service.get_all_orders.call_args[0][-1] is False
+    
     @patch('app.api.order_routes.OrderService')
     def test_get_orders_by_status(self, mock_service_class, authenticated_client):
         # Arrange
@@ -62,7 +83,7 @@ class TestOrderRoutes:
         
         # Assert
         assert response.status_code == status.HTTP_200_OK
-        assert response.json() == {"orders": [self.sample_order]}
+        assert response.json() == {"orders": [self.sample_order], "next_cursor": None}
         mock_service.get_orders_by_status.assert_called_once()
     
     @patch('app.api.order_routes.OrderService')
@@ -111,6 +132,107 @@ class TestOrderRoutes:
         # Verify service was called with correct data
         mock_service.create_order.assert_called_once()
         
+    @patch('app.api.order_routes.order_idempotency', IdempotencyCoordinator(MemoryIdempotencyStore()))
+    @patch('app.api.order_routes.OrderService')
+    def test_create_order_idempotency_key_replays(self, mock_service_class, authenticated_client):
+        # Arrange
+        mock_service = MagicMock()
+        mock_service_class.return_value = mock_service
+        mock_service.create_order.return_value = self.sample_order_response
+        headers = {"Idempotency-Key": "totem-7-0001"}
+        
+        # Act
+        first = authenticated_client.post("/api/orders/", json=self.sample_order_create, headers=headers)
+        retry = authenticated_client.post("/api/orders/", json=self.sample_order_create, headers=headers)
+        
+        # Assert
+        assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+        assert retry.json() == first.json() == self.sample_order
+        assert "idempotent-replayed" not in first.headers
+        assert retry.headers["idempotent-replayed"] == "true"
+        mock_service.create_order.assert_called_once()
+    
+    @patch('app.api.order_routes.order_idempotency', IdempotencyCoordinator(MemoryIdempotencyStore()))
+    @patch('app.api.order_routes.OrderService')
+    def test_create_order_idempotency_key_reused_for_other_body(self, mock_service_class, authenticated_client):
+        # Arrange
+        mock_service = MagicMock()
+        mock_service_class.return_value = mock_service
+        mock_service.create_order.return_value = self.sample_order_response
+        headers = {"Idempotency-Key": "totem-7-0002"}
+        authenticated_client.post("/api/orders/", json=self.sample_order_create, headers=headers)
+        
+        # Act
+        response = authenticated_client.post("/api/orders/", json={**self.sample_order_create, "total_price": 99.0}, headers=headers)
+        
+        # Assert
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        mock_service.create_order.assert_called_once()
+    
+    @patch('app.api.order_routes.OrderService')
+    def test_create_order_invalid_body(self, mock_service_class, authenticated_client):
+        # Act
+        response = authenticated_client.post("/api/orders/", json={"client_id": 2, "products": []})
+        
+        # Assert: reported like FastAPI's own body validation
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["detail"][0]["loc"] == ["body", "total_price"]
+        mock_service_class.return_value.create_order.assert_not_called()
+    
+    @patch('app.api.order_routes.OrderService')
+    def test_create_order_invalid_line_item(self, mock_service_class, authenticated_client):
+        # Act
+        response = authenticated_client.post("/api/orders/", json={**self.sample_order_create, "products": [{"id": "X1"}]})
+        
+        # Assert
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["detail"][0]["loc"] == ["body", "products"]
+        mock_service_class.return_value.create_order.assert_not_called()
+    
+    @patch('app.api.order_routes.OrderService')
+    def test_create_orders_batch(self, mock_service_class, authenticated_client):
+        # Arrange
+        mock_service = MagicMock()
+        mock_service_class.return_value = mock_service
+        mock_service.create_orders_batch.return_value = OrderBatchResponse(
+            created=1,
+            failed=1,
+            results=[
+                OrderBatchItemResult(index=0, id=10),
+                OrderBatchItemResult(index=1, error="Client with ID 99 not found")
+            ]
+        )
+        
+        # Act
+        response = authenticated_client.post("/api/orders/batch", json={
+            "orders": [self.sample_order_create, {**self.sample_order_create, "client_id": 99}]
+        })
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["created"] == 1
+        assert response.json()["results"][1]["error"] == "Client with ID 99 not found"
+        mock_service.create_orders_batch.assert_called_once()
+    
+    @patch('app.api.order_routes.OrderService')
+    def test_create_orders_batch_atomic_failure(self, mock_service_class, authenticated_client):
+        # Arrange
+        mock_service = MagicMock()
+        mock_service_class.return_value = mock_service
+        mock_service.create_orders_batch.side_effect = OrderBatchError([
+            OrderBatchItemResult(index=0, error="Client with ID 99 not found")
+        ])
+        
+        # Act
+        response = authenticated_client.post("/api/orders/batch", json={
+            "orders": [{**self.sample_order_create, "client_id": 99}],
+            "atomic": True
+        })
+        
+        # Assert
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["detail"] == [{"index": 0, "id": None, "error": "Client with ID 99 not found"}]
+    
     @patch('app.api.order_routes.OrderService')
     def test_update_order_status(self, mock_service_class, authenticated_client):
         # Arrange
@@ -150,3 +272,69 @@ class TestOrderRoutes:
         # Assert
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert "not found" in response.json()["detail"]
+    
+    @patch('app.api.order_routes.OrderService')
+    def test_update_order_status_conflict(self, mock_service_class, authenticated_client):
+        # Arrange
+        mock_service = MagicMock()
+        mock_service_class.return_value = mock_service
+        mock_service.update_order_status.side_effect = OrderStatusConflict(1, OrderStatus.PREPARING.value, 1, OrderStatus.PREPARING.value)
+        
+        # Act
+        response = authenticated_client.patch("/api/orders/1/status", json={**self.sample_status_update, "version": 0})
+        
+        # Assert
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert "version 1" in response.json()["detail"]
+        assert mock_service.update_order_status.call_args[0][1].version == 0
+    
+    @patch('app.api.order_routes.get_db_session')
+    @patch('app.api.order_routes.OrderService')
+    def test_export_orders_ndjson(self, mock_service_class, mock_db_session, authenticated_client):
+        # Arrange
+        mock_service = MagicMock()
+        mock_service_class.return_value = mock_service
+        mock_service.export_orders.return_value = iter(['{"id": 1}\n', '{"id": 2}\n'])
+        
+        # Act
+        response = authenticated_client.get("/api/orders/export?format=ndjson")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert response.text == '{"id": 1}\n{"id": 2}\n'
+        mock_service.export_orders.assert_called_once_with(OrderExportFormat.NDJSON)
+        mock_db_session.return_value.__exit__.assert_called_once()
+    
+    @patch('app.api.order_routes.OrderService')
+    def test_get_kitchen_queue(self, mock_service_class, authenticated_client):
+        # Arrange
+        mock_service = MagicMock()
+        mock_service_class.return_value = mock_service
+        mock_service.get_kitchen_queue.return_value = OrderListResponse(orders=[self.sample_order_response])
+        
+        # Act
+        response = authenticated_client.get("/api/orders/kitchen")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["orders"] == [self.sample_order]
+        mock_service.get_kitchen_queue.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_order_event_stream_filters_by_order(self):
+        # Arrange
+        broadcaster = Broadcaster()
+        stream = order_event_stream(broadcaster, order_id=2, keepalive=0.01)
+        assert await stream.__anext__() == "retry: 3000\n\n"
+        
+        # Act
+        broadcaster.publish(Event("order_status_updated", {"id": 1}))
+        broadcaster.publish(Event("order_status_updated", {"id": 2}))
+        chunk = await stream.__anext__()
+        await stream.aclose()
+        
+        # Assert
+        assert chunk.startswith("event: order_status_updated")
+        assert '"id": 2' in chunk
+        assert broadcaster.subscriber_count == 0
@@ -1,10 +1,23 @@
+import csv
+import io
+import json
 import pytest
-from unittest.mock import MagicMock, patch
-from app.service.order_service import OrderService
-from app.domain.order_model import OrderCreate, OrderResponse, OrderListResponse, OrderDB, OrderStatus, OrderStatusUpdate
+from types import SimpleNamespace
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.core.pagination import DEFAULT_PAGE_SIZE
+from app.domain.client_model import ClientDB
+from app.service.kitchen_queue import kitchen_queue
+from app.service.order_service import OrderService, AsyncOrderService, order_events, EXPORT_BATCH_SIZE, CSV_EXPORT_HEADER
+from app.domain.order_model import OrderCreate, OrderResponse, OrderListResponse, OrderDB, OrderStatus, OrderStatusUpdate, OrderExportFormat, OrderBatchCreate
+from app.exceptions import OrderBatchError
 
 class TestOrderService:
     def setup_method(self):
+        # Start every test with an empty kitchen board
+        kitchen_queue.clear()
+        
         # Create a mock repository for each test
         self.mock_repository = MagicMock()
         
@@ -59,7 +72,7 @@ class TestOrderService:
         result = self.service.get_orders_by_status(OrderStatus.RECEIVED)
         
         # Assert
-        self.mock_repository.get_orders_by_status.assert_called_once_with(OrderStatus.RECEIVED)
+        self.mock_repository.get_orders_by_status.assert_called_once_with(OrderStatus.RECEIVED, DEFAULT_PAGE_SIZE + 1, None, True)
         assert isinstance(result, OrderListResponse)
         assert len(result.orders) == 1
         assert result.orders[0].status == OrderStatus.RECEIVED
@@ -113,8 +126,6 @@ class TestOrderService:
     
     def test_update_order_status_found(self):
         # Arrange
-        self.mock_repository.get_order_by_id.return_value = self.sample_order_db
-        
         updated_order = OrderDB(
             id=1, 
             client_id=1,
@@ -131,16 +142,265 @@ class TestOrderService:
         result = self.service.update_order_status(1, self.sample_status_update)
         
         # Assert
-        self.mock_repository.get_order_by_id.assert_called_once_with(1)
-        self.mock_repository.update_order_status.assert_called_once_with(1, OrderStatus.PREPARING)
+        self.mock_repository.get_order_by_id.assert_not_called()
+        self.mock_repository.update_order_status.assert_called_once_with(1, OrderStatus.PREPARING, None)
         assert isinstance(result, OrderResponse)
         assert result.id == 1
         assert result.status == OrderStatus.PREPARING
     
     def test_update_order_status_not_found(self):
         # Arrange
-        self.mock_repository.get_order_by_id.return_value = None
+        self.mock_repository.update_order_status.side_effect = ValueError("Order with ID 999 not found")
         
         # Act & Assert
         with pytest.raises(ValueError, match="Order with ID 999 not found"):
             self.service.update_order_status(999, self.sample_status_update)
+    
+    def test_get_all_orders_without_products(self):
+        # Arrange: projected rows carry no products column
+        self.mock_repository.get_all_orders.return_value = [
+            SimpleNamespace(id=1, client_id=1, total_price=25.99, status=OrderStatus.RECEIVED.value)
+        ]
+        
+        # Act
+        result = self.service.get_all_orders(include_products=False)
+        
+        # Assert
+        self.mock_repository.get_all_orders.assert_called_once_with(DEFAULT_PAGE_SIZE + 1, None, False)
+        assert result.orders[0].id == 1
+        assert result.orders[0].products is None
+    
+    def test_get_all_orders_returns_next_cursor(self):
+        # Arrange
+        orders = [
+            OrderDB(id=i, client_id=1, total_price=10.0, status=OrderStatus.RECEIVED, products=[])
+            for i in range(1, 4)
+        ]
+        self.mock_repository.get_all_orders.return_value = orders
+        
+        # Act
+        result = self.service.get_all_orders(limit=2, after_id=None)
+        
+        # Assert
+        self.mock_repository.get_all_orders.assert_called_once_with(3, None, True)
+        assert [order.id for order in result.orders] == [1, 2]
+        assert result.next_cursor is not None
+    
+    def test_export_orders_ndjson(self):
+        # Arrange
+        self.mock_repository.stream_orders.return_value = iter([self.sample_order_db])
+        
+        # Act
+        body = "".join(self.service.export_orders(OrderExportFormat.NDJSON))
+        
+        # Assert
+        lines = body.splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["id"] == 1
+    
+    def test_export_orders_csv_chunks(self):
+        # Arrange
+        orders = [
+            OrderDB(id=i, client_id=1, total_price=10.0, status=OrderStatus.RECEIVED, products=[])
+            for i in range(1, EXPORT_BATCH_SIZE + 2)
+        ]
+        self.mock_repository.stream_orders.return_value = iter(orders)
+        
+        # Act
+        chunks = list(self.service.export_orders(OrderExportFormat.CSV))
+        
+        # Assert
+        assert chunks[0] == CSV_EXPORT_HEADER
+        assert len(chunks) == 3
+        rows = list(csv.reader(io.StringIO("".join(chunks))))
+        assert len(rows) == EXPORT_BATCH_SIZE + 2
+        assert rows[1][:4] == ["1", "1", "10.0", "Recebido"]
+    
+    def test_get_kitchen_queue_loads_once(self):
+        # Arrange
+        self.mock_repository.get_orders_by_statuses.return_value = [self.sample_order_db]
+        
+        # Act
+        with patch.object(kitchen_queue, "max_age", 0):
+            self.service.get_kitchen_queue()
+            result = self.service.get_kitchen_queue()
+        
+        # Assert
+        self.mock_repository.get_orders_by_statuses.assert_called_once()
+        assert [order.id for order in result.orders] == [1]
+    
+    def test_create_and_update_keep_kitchen_queue_current(self):
+        # Arrange
+        kitchen_queue.load([])
+        self.mock_repository.create_order.return_value = OrderDB(
+            id=2, client_id=2, total_price=15.50, status=OrderStatus.RECEIVED, products=[]
+        )
+        self.mock_repository.get_order_by_id.return_value = self.sample_order_db
+        self.mock_repository.update_order_status.return_value = OrderDB(
+            id=2, client_id=2, total_price=15.50, status=OrderStatus.FINISHED, products=[]
+        )
+        
+        # Act
+        self.service.create_order(self.sample_order_create)
+        board_after_create = kitchen_queue.snapshot()
+        self.service.update_order_status(2, OrderStatusUpdate(status=OrderStatus.FINISHED))
+        
+        # Assert
+        assert [order.id for order in board_after_create] == [2]
+        assert kitchen_queue.snapshot() == []
+    
+    def test_update_order_status_publishes_event(self):
+        # Arrange
+        self.mock_repository.get_order_by_id.return_value = self.sample_order_db
+        self.mock_repository.update_order_status.return_value = self.sample_order_db
+        
+        # Act
+        with patch.object(order_events, "publish") as mock_publish:
+            self.service.update_order_status(1, self.sample_status_update)
+        
+        # Assert
+        event = mock_publish.call_args[0][0]
+        assert event.name == "order_status_updated"
+        assert event.data["id"] == 1
+    
+    def test_get_product_sales(self):
+        # Arrange
+        self.mock_repository.get_product_sales.return_value = [
+            SimpleNamespace(product_id=1, quantity=3, revenue=32.97)
+        ]
+        
+        # Act
+        result = self.service.get_product_sales()
+        
+        # Assert
+        assert result.products[0].product_id == 1
+        assert result.products[0].quantity == 3
+        assert result.products[0].revenue == 32.97
+
+    def test_create_orders_batch_reports_invalid_items(self):
+        # Arrange
+        self.service.client_repository = MagicMock()
+        self.service.client_repository.get_existing_client_ids.return_value = {1}
+        self.mock_repository.create_orders.return_value = [10]
+        batch = OrderBatchCreate(orders=[
+            {"client_id": 1, "total_price": 10.0, "products": [{"id": 1, "price": 10.0}]},
+            {"client_id": 1, "products": []},
+            {"client_id": 99, "total_price": 5.0, "products": []}
+        ])
+        
+        # Act
+        result = self.service.create_orders_batch(batch)
+        
+        # Assert
+        self.service.client_repository.get_existing_client_ids.assert_called_once_with({1, 99})
+        self.mock_repository.create_orders.assert_called_once()
+        assert len(self.mock_repository.create_orders.call_args[0][0]) == 1
+        assert result.created == 1
+        assert result.failed == 2
+        assert [item.index for item in result.results] == [0, 1, 2]
+        assert result.results[0].id == 10
+        assert "total_price" in result.results[1].error
+        assert result.results[2].error == "Client with ID 99 not found"
+        assert [(order.id, order.version) for order in kitchen_queue.snapshot()] == [(10, 0)]
+    
+    def test_create_orders_batch_atomic_rejects_everything(self):
+        # Arrange
+        self.service.client_repository = MagicMock()
+        self.service.client_repository.get_existing_client_ids.return_value = set()
+        batch = OrderBatchCreate(atomic=True, orders=[
+            {"client_id": 5, "total_price": 10.0, "products": []}
+        ])
+        
+        # Act & Assert
+        with pytest.raises(OrderBatchError) as exc_info:
+            self.service.create_orders_batch(batch)
+        assert exc_info.value.results[0].error == "Client with ID 5 not found"
+        self.mock_repository.create_orders.assert_not_called()
+    
+    def test_create_orders_batch_reports_invalid_line_items(self, sqlite_engine):
+        # Arrange: the real repositories, so the line items are written
+        with sqlite_engine.begin() as conn:
+            conn.execute(insert(ClientDB).values(id=1, name="Ana", cpf="123.456.789-09", cpf_digits="12345678909"))
+        batch = OrderBatchCreate(orders=[
+            {"client_id": 1, "total_price": 10.0, "products": [{"id": 1, "quantity": 1, "price": 10.0}]},
+            {"client_id": 1, "total_price": 5.0, "products": [{"id": "X1", "quantity": 1, "price": 5.0}]}
+        ])
+        
+        # Act
+        with Session(sqlite_engine) as session:
+            result = OrderService(session).create_orders_batch(batch)
+        
+        # Assert
+        assert result.created == 1
+        assert result.failed == 1
+        assert result.results[0].id is not None
+        assert "products[0]: id must be a whole number" in result.results[1].error
+
+
+class TestAsyncOrderService:
+    def setup_method(self):
+        # Create a mock async repository for each test
+        self.mock_repository = AsyncMock()
+        
+        # Create the service with the mock repository
+        with patch('app.service.order_service.AsyncOrderRepository', return_value=self.mock_repository):
+            self.service = AsyncOrderService(AsyncMock())
+        
+        self.sample_order_db = OrderDB(
+            id=1, 
+            client_id=1,
+            total_price=25.99,
+            status=OrderStatus.RECEIVED,
+            products=[{"id": 1, "name": "Product 1", "quantity": 2, "price": 10.99}]
+        )
+    
+    @pytest.mark.asyncio
+    async def test_get_all_orders(self):
+        # Arrange
+        self.mock_repository.get_all_orders.return_value = [self.sample_order_db]
+        
+        # Act
+        result = await self.service.get_all_orders()
+        
+        # Assert
+        self.mock_repository.get_all_orders.assert_awaited_once()
+        assert isinstance(result, OrderListResponse)
+        assert result.orders[0].id == 1
+    
+    @pytest.mark.asyncio
+    async def test_get_order_by_id_not_found(self):
+        # Arrange
+        self.mock_repository.get_order_by_id.return_value = None
+        
+        # Act & Assert
+        with pytest.raises(ValueError, match="Order with ID 999 not found"):
+            await self.service.get_order_by_id(999)
+    
+    @pytest.mark.asyncio
+    async def test_update_order_status(self):
+        # Arrange
+        self.sample_order_db.status = OrderStatus.PREPARING
+        self.mock_repository.update_order_status.return_value = self.sample_order_db
+        
+        # Act
+        result = await self.service.update_order_status(1, OrderStatusUpdate(status=OrderStatus.PREPARING))
+        
+        # Assert
+        self.mock_repository.update_order_status.assert_awaited_once_with(1, OrderStatus.PREPARING, None)
+        assert result.status == OrderStatus.PREPARING
+    
+    @pytest.mark.asyncio
+    async def test_create_orders_batch(self):
+        # Arrange
+        self.service.client_repository = AsyncMock()
+        self.service.client_repository.get_existing_client_ids.return_value = {1}
+        self.mock_repository.create_orders.return_value = [10]
+        batch = OrderBatchCreate(orders=[{"client_id": 1, "total_price": 10.0, "products": []}])
+        
+        # Act
+        result = await self.service.create_orders_batch(batch)
+        
+        # Assert
+        self.mock_repository.create_orders.assert_awaited_once()
+        assert result.created == 1
+        assert result.results[0].id == 10
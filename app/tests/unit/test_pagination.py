@@ -0,0 +1,66 @@
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from sqlalchemy import select
+from app.core.pagination import encode_cursor, decode_cursor, keyset, split_page, get_page_params, MAX_PAGE_SIZE
+from app.domain.order_model import OrderDB
+
+class TestPagination:
+    def test_cursor_round_trip(self):
+        # Act
+        cursor = encode_cursor(42)
+        
+        # Assert
+        assert "42" not in cursor
+        assert decode_cursor(cursor) == 42
+    
+    def test_decode_invalid_cursor(self):
+        # Act & Assert
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor("not-a-cursor")
+    
+    def test_keyset_builds_seek_query(self):
+        # Act
+        statement = keyset(select(OrderDB), OrderDB.id, limit=10, after_id=5)
+        sql = str(statement.compile(compile_kwargs={"literal_binds": True}))
+        
+        # Assert
+        assert "orders.id > 5" in sql
+        assert "ORDER BY orders.id" in sql
+        assert "LIMIT 10" in sql
+    
+    def test_split_page_with_next_page(self):
+        # Arrange
+        rows = [SimpleNamespace(id=i) for i in range(1, 5)]
+        
+        # Act
+        page, next_cursor = split_page(rows, 3)
+        
+        # Assert
+        assert [row.id for row in page] == [1, 2, 3]
+        assert decode_cursor(next_cursor) == 3
+    
+    def test_split_page_last_page(self):
+        # Arrange
+        rows = [SimpleNamespace(id=i) for i in range(1, 3)]
+        
+        # Act
+        page, next_cursor = split_page(rows, 3)
+        
+        # Assert
+        assert len(page) == 2
+        assert next_cursor is None
+    
+    def test_get_page_params_invalid_cursor(self):
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            get_page_params(limit=10, after="bogus")
+        
+        assert exc_info.value.status_code == 400
+    
+    def test_limit_above_maximum_is_rejected(self, authenticated_client):
+        # Act
+        response = authenticated_client.get(f"/api/orders/?limit={MAX_PAGE_SIZE + 1}")
+        
+        # Assert
+        assert response.status_code == 422
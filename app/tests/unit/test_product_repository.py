@@ -1,7 +1,11 @@
 import pytest
 from sqlalchemy.orm import Session
-from unittest.mock import MagicMock, patch
-from app.repository.product_repository import ProductRepository
+from sqlalchemy.dialects import mysql
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import create_engine, select
+from app.repository.migrations import run_migrations
+from app.repository.product_repository import ProductRepository, AsyncProductRepository, PRODUCT_COLUMNS, upsert_products_statement
 from app.domain.product_model import ProductDB
 
 class TestProductRepository:
@@ -21,13 +25,13 @@ class TestProductRepository:
     
     def test_get_all_products(self):
         # Arrange
-        self.mock_session.query.return_value.all.return_value = [self.sample_product]
+        self.mock_session.query.return_value.order_by.return_value.all.return_value = [self.sample_product]
         
         # Act
         products = self.repository.get_all_products()
         
         # Assert
-        self.mock_session.query.assert_called_once_with(ProductDB)
+        self.mock_session.query.assert_called_once_with(*PRODUCT_COLUMNS)
         assert len(products) == 1
         assert products[0].id == 1
         assert products[0].name == "Test Product"
@@ -40,7 +44,7 @@ class TestProductRepository:
         product = self.repository.get_product_by_id(1)
         
         # Assert
-        self.mock_session.query.assert_called_once_with(ProductDB)
+        self.mock_session.query.assert_called_once_with(*PRODUCT_COLUMNS)
         self.mock_session.query.return_value.filter.assert_called_once()
         assert product.id == 1
         assert product.name == "Test Product"
@@ -79,23 +83,49 @@ class TestProductRepository:
             # Assert
             self.mock_session.add.assert_called_once()
             self.mock_session.commit.assert_called_once()
-            self.mock_session.refresh.assert_called_once()
+            self.mock_session.refresh.assert_not_called()
             assert new_product.id == 2
             assert new_product.name == "New Product"
             assert new_product.category == "Bebida"
     
     def test_update_product_found(self):
         # Arrange
-        product_to_update = ProductDB(
-            id=1, 
-            name="Original Product", 
-            category="Lanche", 
-            price=10.99, 
+        self.mock_session.execute.return_value.rowcount = 1
+        
+        update_data = {
+            "name": "Updated Product",
+            "category": "Lanche",
+            "price": 12.99,
+            "description": None
+        }
+        
+        # Act
+        updated_product = self.repository.update_product(1, update_data)
+        
+        # Assert: one UPDATE and the commit, without reading the product
+        self.mock_session.execute.assert_called_once()
+        statement = self.mock_session.execute.call_args[0][0]
+        assert statement.is_update
+        self.mock_session.query.assert_not_called()
+        self.mock_session.commit.assert_called_once()
+        self.mock_session.refresh.assert_not_called()
+        assert updated_product.id == 1
+        assert updated_product.name == "Updated Product"
+        assert updated_product.price == 12.99
+        assert updated_product.category == "Lanche"
+        self.mock_session.get.assert_not_called()
+    
+    def test_update_product_partial_reads_back(self):
+        # Arrange
+        self.mock_session.execute.return_value.rowcount = 1
+        self.mock_session.get.return_value = ProductDB(
+            id=1,
+            name="Updated Product",
+            category="Lanche",
+            price=12.99,
             description="Original description"
         )
         
-        self.mock_session.query.return_value.filter.return_value.first.return_value = product_to_update
-        
         update_data = {
             "name": "Updated Product",
             "price": 12.99
@@ -104,9 +134,9 @@ class TestProductRepository:
         # Act
         updated_product = self.repository.update_product(1, update_data)
         
-        # Assert
+        # Assert: the columns not written come from the database
         self.mock_session.commit.assert_called_once()
-        self.mock_session.refresh.assert_called_once()
+        self.mock_session.get.assert_called_once_with(ProductDB, 1)
         assert updated_product.id == 1
         assert updated_product.name == "Updated Product"
         assert updated_product.price == 12.99
@@ -115,7 +145,7 @@ class TestProductRepository:
     
     def test_update_product_not_found(self):
         # Arrange
-        self.mock_session.query.return_value.filter.return_value.first.return_value = None
+        self.mock_session.execute.return_value.rowcount = 0
         
         update_data = {
             "name": "Updated Product",
@@ -125,3 +155,110 @@ class TestProductRepository:
         # Act & Assert
         with pytest.raises(ValueError, match="Product with ID 999 not found"):
             self.repository.update_product(999, update_data)
+        self.mock_session.commit.assert_not_called()
+    def test_upsert_products_single_statement(self):
+        # Arrange
+        rows = [
+            {"id": None, "name": "New", "category": "Lanche", "price": 9.9, "description": None},
+            {"id": 1, "name": "Renamed", "category": "Lanche", "price": 11.5, "description": None}
+        ]
+        
+        # Act
+        self.repository.upsert_products(rows)
+        
+        # Assert
+        self.mock_session.execute.assert_called_once()
+        self.mock_session.commit.assert_called_once()
+        statement = self.mock_session.execute.call_args[0][0]
+        sql = str(statement.compile(dialect=mysql.dialect()))
+        assert "ON DUPLICATE KEY UPDATE" in sql
+        assert "price = VALUES(price)" in sql
+    
+    def test_upsert_products_statement_on_sqlite(self):
+        # Arrange
+        engine = create_engine("sqlite://")
+        run_migrations(engine)
+        
+        # Act
+        with engine.begin() as conn:
+            conn.execute(upsert_products_statement([
+                {"id": 1, "name": "Old", "category": "Lanche", "price": 9.9, "description": None}
+            ], "sqlite"))
+            conn.execute(upsert_products_statement([
+                {"id": None, "name": "New", "category": "Bebida", "price": 5.0, "description": None},
+                {"id": 1, "name": "Renamed", "category": "Lanche", "price": 11.5, "description": None}
+            ], "sqlite"))
+            rows = conn.execute(select(ProductDB.id, ProductDB.name).order_by(ProductDB.id)).all()
+        engine.dispose()
+        
+        # Assert
+        assert [tuple(row) for row in rows] == [(1, "Renamed"), (2, "New")]
+
+
+class TestAsyncProductRepository:
+    def setup_method(self):
+        # Create a mock async session for each test
+        self.mock_session = AsyncMock(spec=AsyncSession)
+        self.repository = AsyncProductRepository(self.mock_session)
+        
+        # Sample product data
+        self.sample_product = ProductDB(
+            id=1,
+            name="Test Product",
+            category="Lanche",
+            price=10.99,
+            description="Test description"
+        )
+    
+    def _mock_result(self, rows):
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = rows
+        result.scalars.return_value.first.return_value = rows[0] if rows else None
+        result.all.return_value = rows
+        result.first.return_value = rows[0] if rows else None
+        self.mock_session.execute.return_value = result
+    
+    @pytest.mark.asyncio
+    async def test_get_all_products(self):
+        # Arrange
+        self._mock_result([self.sample_product])
+        
+        # Act
+        products = await self.repository.get_all_products()
+        
+        # Assert
+        self.mock_session.execute.assert_awaited_once()
+        assert len(products) == 1
+        assert products[0].name == "Test Product"
+    
+    @pytest.mark.asyncio
+    async def test_update_product_found(self):
+        # Arrange
+        self._mock_result([])
+        self.mock_session.execute.return_value.rowcount = 1
+        
+        self.mock_session.get.return_value = ProductDB(
+            id=1, name="Updated Product", category="Lanche", price=10.99, description=None
+        )
+        
+        # Act
+        updated_product = await self.repository.update_product(1, {"name": "Updated Product"})
+        
+        # Assert: a partial update reads the product back
+        self.mock_session.execute.assert_awaited_once()
+        self.mock_session.commit.assert_awaited_once()
+        self.mock_session.refresh.assert_not_awaited()
+        self.mock_session.get.assert_awaited_once_with(ProductDB, 1)
+        assert updated_product.id == 1
+        assert updated_product.name == "Updated Product"
+        assert updated_product.category == "Lanche"
+    
+    @pytest.mark.asyncio
+    async def test_update_product_not_found(self):
+        # Arrange
+        self._mock_result([])
+        self.mock_session.execute.return_value.rowcount = 0
+        
+        # Act & Assert
+        with pytest.raises(ValueError, match="Product with ID 999 not found"):
+            await self.repository.update_product(999, {"name": "Updated Product"})
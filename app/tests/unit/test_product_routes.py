@@ -1,7 +1,8 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from fastapi import status
-from app.domain.product_model import ProductCreate, ProductResponse, ProductListResponse
+from app.domain.product_model import ProductCreate, ProductResponse, ProductListResponse, ProductImportFormat, ProductImportResponse
+from app.exceptions import ProductImportAborted
 
 class TestProductRoutes:
     def setup_method(self):
@@ -15,6 +16,7 @@ class TestProductRoutes:
         }
         
         self.sample_product_response = ProductResponse(**self.sample_product)
+        self.sample_etag = 'W/"abc123"'
         
         self.sample_product_create = {
             "name": "New Product",
@@ -30,22 +32,23 @@ class TestProductRoutes:
         mock_service_class.return_value = mock_service
         
         product_list = ProductListResponse(products=[self.sample_product_response])
-        mock_service.get_all_products.return_value = product_list
+        mock_service.get_all_products_with_etag.return_value = (product_list, self.sample_etag)
         
         # Act
         response = authenticated_client.get("/api/products/")
         
         # Assert
         assert response.status_code == status.HTTP_200_OK
-        assert response.json() == {"products": [self.sample_product]}
-        mock_service.get_all_products.assert_called_once()
+        assert response.json() == {"products": [self.sample_product], "next_cursor": None}
+        mock_service.get_all_products_with_etag.assert_called_once()
+        assert response.headers["etag"] == self.sample_etag
     
     @patch('app.api.product_routes.ProductService')
     def test_get_product_by_id_found(self, mock_service_class, authenticated_client):
         # Arrange
         mock_service = MagicMock()
         mock_service_class.return_value = mock_service
-        mock_service.get_product_by_id.return_value = self.sample_product_response
+        mock_service.get_product_by_id_with_etag.return_value = (self.sample_product_response, self.sample_etag)
         
         # Act
         response = authenticated_client.get("/api/products/1")
@@ -53,14 +56,14 @@ class TestProductRoutes:
         # Assert
         assert response.status_code == status.HTTP_200_OK
         assert response.json() == self.sample_product
-        mock_service.get_product_by_id.assert_called_once_with(1)
+        mock_service.get_product_by_id_with_etag.assert_called_once_with(1)
     
     @patch('app.api.product_routes.ProductService')
     def test_get_product_by_id_not_found(self, mock_service_class, authenticated_client):
         # Arrange
         mock_service = MagicMock()
         mock_service_class.return_value = mock_service
-        mock_service.get_product_by_id.side_effect = ValueError("Product with ID 999 not found")
+        mock_service.get_product_by_id_with_etag.side_effect = ValueError("Product with ID 999 not found")
         
         # Act
         response = authenticated_client.get("/api/products/999")
@@ -69,6 +72,35 @@ class TestProductRoutes:
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert "not found" in response.json()["detail"]
     
+    @patch('app.api.product_routes.ProductService')
+    def test_get_all_products_not_modified(self, mock_service_class, authenticated_client):
+        # Arrange
+        mock_service = MagicMock()
+        mock_service_class.return_value = mock_service
+        product_list = ProductListResponse(products=[self.sample_product_response])
+        mock_service.get_all_products_with_etag.return_value = (product_list, self.sample_etag)
+        
+        # Act
+        response = authenticated_client.get("/api/products/", headers={"If-None-Match": self.sample_etag})
+        
+        # Assert
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["etag"] == self.sample_etag
+    
+    @patch('app.api.product_routes.ProductService')
+    def test_get_product_by_id_not_modified(self, mock_service_class, authenticated_client):
+        # Arrange
+        mock_service = MagicMock()
+        mock_service_class.return_value = mock_service
+        mock_service.get_product_by_id_with_etag.return_value = (self.sample_product_response, self.sample_etag)
+        
+        # Act
+        response = authenticated_client.get("/api/products/1", headers={"If-None-Match": '"other", W/"abc123"'})
+        
+        # Assert
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    
     @patch('app.api.product_routes.ProductService')
     def test_create_product(self, mock_service_class, authenticated_client):
         # Arrange
@@ -86,6 +118,47 @@ class TestProductRoutes:
         # Verify service was called with correct data
         mock_service.create_product.assert_called_once()
         
+    @patch('app.api.product_routes.ProductService')
+    def test_import_products(self, mock_service_class, authenticated_client):
+        # Arrange
+        mock_service = MagicMock()
+        mock_service_class.return_value = mock_service
+        mock_service.import_products.return_value = ProductImportResponse(imported=2, failed=0, errors=[])
+        
+        # Act
+        response = authenticated_client.post(
+            "/api/products/import?format=csv",
+            files={"file": ("menu.csv", b"name,category,price\nX-Burger,Lanche,25.9\n", "text/csv")}
+        )
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"imported": 2, "failed": 0, "errors": []}
+        args = mock_service.import_products.call_args[0]
+        assert args[1] == ProductImportFormat.CSV
+    
+    @patch('app.api.product_routes.ProductService')
+    def test_import_products_chunk_failure(self, mock_service_class, authenticated_client):
+        # Arrange
+        mock_service = MagicMock()
+        mock_service_class.return_value = mock_service
+        summary = ProductImportResponse(imported=500, failed=1, errors=[{"line": 3, "error": "price: invalid"}])
+        mock_service.import_products.side_effect = ProductImportAborted(summary, Exception("Lock wait timeout"))
+        
+        # Act
+        response = authenticated_client.post(
+            "/api/products/import?format=csv",
+            files={"file": ("menu.csv", b"name,category,price\nX-Burger,Lanche,25.9\n", "text/csv")}
+        )
+        
+        # Assert
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        detail = response.json()["detail"]
+        assert detail["imported"] == 500
+        assert detail["failed"] == 1
+        assert detail["errors"] == [{"line": 3, "error": "price: invalid"}]
+        assert "after 500 imported rows" in detail["message"]
+    
     @patch('app.api.product_routes.ProductService')
     def test_update_product_found(self, mock_service_class, authenticated_client):
         # Arrange
@@ -122,3 +195,11 @@ class TestProductRoutes:
         # Assert
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert "not found" in response.json()["detail"]
+    
+    def test_get_product_cache_stats(self, authenticated_client):
+        # Act
+        response = authenticated_client.get("/api/products/cache/stats")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert {"hits", "misses", "evictions", "size"} <= set(response.json())
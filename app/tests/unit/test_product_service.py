@@ -1,10 +1,16 @@
+import io
+import json
 import pytest
-from unittest.mock import MagicMock, patch
-from app.service.product_service import ProductService
-from app.domain.product_model import ProductCreate, ProductResponse, ProductListResponse, ProductDB
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.service.product_service import ProductService, AsyncProductService, product_cache
+from app.exceptions import ProductImportAborted
+from app.domain.product_model import ProductCreate, ProductResponse, ProductListResponse, ProductDB, ProductImportFormat
 
 class TestProductService:
     def setup_method(self):
+        # Start every test with an empty catalog cache
+        product_cache.clear()
+        
         # Create a mock repository for each test
         self.mock_repository = MagicMock()
         
@@ -51,7 +57,7 @@ class TestProductService:
         result = self.service.get_product_by_id(1)
         
         # Assert
-        self.mock_repository.get_product_by_id.assert_called_once_with(1)
+        self.mock_repository.get_product_by_id.assert_called_once_with(1, primary=True)
         assert isinstance(result, ProductResponse)
         assert result.id == 1
         assert result.name == "Test Product"
@@ -92,8 +98,6 @@ class TestProductService:
     
     def test_update_product_found(self):
         # Arrange
-        self.mock_repository.get_product_by_id.return_value = self.sample_product_db
-        
         updated_product = ProductDB(
             id=1, 
             name="Updated Product",
@@ -113,7 +117,7 @@ class TestProductService:
         result = self.service.update_product(1, update_data)
         
         # Assert
-        self.mock_repository.get_product_by_id.assert_called_once_with(1)
+        self.mock_repository.get_product_by_id.assert_not_called()
         self.mock_repository.update_product.assert_called_once()
         assert isinstance(result, ProductResponse)
         assert result.id == 1
@@ -122,7 +126,7 @@ class TestProductService:
     
     def test_update_product_not_found(self):
         # Arrange
-        self.mock_repository.get_product_by_id.return_value = None
+        self.mock_repository.update_product.side_effect = ValueError("Product with ID 999 not found")
         
         # Act & Assert
         update_data = ProductCreate(
@@ -133,3 +137,231 @@ class TestProductService:
         )
         with pytest.raises(ValueError, match="Product with ID 999 not found"):
             self.service.update_product(999, update_data)
+    
+    def test_get_all_products_served_from_cache(self):
+        # Arrange
+        self.mock_repository.get_all_products.return_value = [self.sample_product_db]
+        
+        # Act
+        first = self.service.get_all_products()
+        second = self.service.get_all_products()
+        
+        # Assert
+        self.mock_repository.get_all_products.assert_called_once()
+        assert second == first
+    
+    def test_get_product_by_id_served_from_cache(self):
+        # Arrange
+        self.mock_repository.get_product_by_id.return_value = self.sample_product_db
+        
+        # Act
+        self.service.get_product_by_id(1)
+        result = self.service.get_product_by_id(1)
+        
+        # Assert
+        self.mock_repository.get_product_by_id.assert_called_once_with(1, primary=True)
+        assert result.id == 1
+    
+    def test_update_product_invalidates_cache(self):
+        # Arrange
+        self.mock_repository.get_all_products.return_value = [self.sample_product_db]
+        self.service.get_all_products()
+        self.mock_repository.update_product.return_value = ProductDB(
+            id=1, name="Updated Product", category="Lanche", price=12.99, description=None
+        )
+        
+        # Act
+        self.service.update_product(1, ProductCreate(name="Updated Product", category="Lanche", price=12.99))
+        self.service.get_all_products()
+        cached_product = self.service.get_product_by_id(1)
+        
+        # Assert
+        assert self.mock_repository.get_all_products.call_count == 2
+        self.mock_repository.get_product_by_id.assert_not_called()
+        assert cached_product.name == "Updated Product"
+    
+    def test_read_racing_a_write_is_not_cached(self):
+        # Arrange: a write commits and invalidates while the list query runs
+        def list_during_write(*args, **kwargs):
+            product_cache.clear()
+            return [self.sample_product_db]
+        self.mock_repository.get_all_products.side_effect = list_during_write
+        
+        # Act
+        first = self.service.get_all_products()
+        self.mock_repository.get_all_products.side_effect = None
+        self.mock_repository.get_all_products.return_value = []
+        second = self.service.get_all_products()
+        
+        # Assert: the page read before the write is returned but not cached
+        assert len(first.products) == 1
+        assert second.products == []
+
+    def test_import_products_csv(self):
+        # Arrange
+        product_cache.set(("product", 1), "stale")
+        upload = io.BytesIO(
+            "id,name,category,price,description\n"
+            "1,X-Burger,Lanche,25.9,\n"
+            ",Suco,Bebida,abc,\n"
+            ",Batata,Acompanhamento,9.5,Grande\n".encode("utf-8")
+        )
+        
+        # Act
+        result = self.service.import_products(upload, ProductImportFormat.CSV)
+        
+        # Assert
+        self.mock_repository.upsert_products.assert_called_once()
+        rows = self.mock_repository.upsert_products.call_args[0][0]
+        assert [row["id"] for row in rows] == [1, None]
+        assert rows[0]["description"] is None
+        assert result.imported == 2
+        assert result.failed == 1
+        assert result.errors[0].line == 3
+        assert "price" in result.errors[0].error
+        assert product_cache.get(("product", 1)) is None
+        assert not upload.closed
+    
+    def test_import_products_ndjson_in_chunks(self):
+        # Arrange
+        lines = [
+            json.dumps({"name": f"Product {i}", "category": "Lanche", "price": i})
+            for i in range(5)
+        ]
+        upload = io.BytesIO(("\n".join(lines) + "\n\nnot json\n").encode("utf-8"))
+        
+        # Act
+        with patch('app.service.product_service.IMPORT_BATCH_SIZE', 2):
+            result = self.service.import_products(upload, ProductImportFormat.NDJSON)
+        
+        # Assert
+        assert self.mock_repository.upsert_products.call_count == 3
+        assert result.imported == 5
+        assert result.failed == 1
+        assert result.errors[0].line == 7
+    
+    def test_import_products_reports_invalid_utf8_lines(self):
+        # Arrange
+        upload = io.BytesIO(
+            b"\xef\xbb\xbfname,category,price\n"
+            b"X-Burger,Lanche,25.9\n"
+            b"P\xe3o de queijo,Acompanhamento,8\n"
+            b"Suco,Bebida,7\n"
+        )
+        
+        # Act
+        result = self.service.import_products(upload, ProductImportFormat.CSV)
+        
+        # Assert
+        rows = self.mock_repository.upsert_products.call_args[0][0]
+        assert [row["name"] for row in rows] == ["X-Burger", "Suco"]
+        assert result.imported == 2
+        assert result.failed == 1
+        assert result.errors[0].line == 3
+        assert "UTF-8" in result.errors[0].error
+    
+    def test_import_products_ndjson_reports_invalid_utf8_lines(self):
+        # Arrange
+        upload = io.BytesIO(
+            b'{"name": "P\xe3o", "category": "Lanche", "price": 8}\n'
+            b'{"name": "Agua", "category": "Bebida", "price": 4}\n'
+        )
+        
+        # Act
+        result = self.service.import_products(upload, ProductImportFormat.NDJSON)
+        
+        # Assert
+        assert result.imported == 1
+        assert result.errors[0].line == 1
+        assert "UTF-8" in result.errors[0].error
+    
+    def test_import_products_chunk_failure_reports_imported_rows(self):
+        # Arrange
+        lines = [
+            json.dumps({"name": f"Product {i}", "category": "Lanche", "price": i})
+            for i in range(3)
+        ]
+        upload = io.BytesIO(("\n".join(lines) + "\n").encode("utf-8"))
+        self.mock_repository.upsert_products.side_effect = [None, Exception("Lock wait timeout")]
+        product_cache.set(("product", 1), "stale")
+        
+        # Act
+        with patch('app.service.product_service.IMPORT_BATCH_SIZE', 2):
+            with pytest.raises(ProductImportAborted) as excinfo:
+                self.service.import_products(upload, ProductImportFormat.NDJSON)
+        
+        # Assert
+        assert excinfo.value.summary.imported == 2
+        assert "after 2 imported rows" in str(excinfo.value)
+        assert "Lock wait timeout" in str(excinfo.value)
+        assert product_cache.get(("product", 1)) is None
+
+
+class TestAsyncProductService:
+    def setup_method(self):
+        # Start every test with an empty catalog cache
+        product_cache.clear()
+        
+        # Create a mock async repository for each test
+        self.mock_repository = AsyncMock()
+        
+        # Create the service with the mock repository
+        with patch('app.service.product_service.AsyncProductRepository', return_value=self.mock_repository):
+            self.service = AsyncProductService(AsyncMock())
+        
+        self.sample_product_db = ProductDB(
+            id=1,
+            name="Test Product",
+            category="Lanche",
+            price=10.99,
+            description="Test description"
+        )
+    
+    @pytest.mark.asyncio
+    async def test_get_all_products(self):
+        # Arrange
+        self.mock_repository.get_all_products.return_value = [self.sample_product_db]
+        
+        # Act
+        result = await self.service.get_all_products()
+        
+        # Assert
+        self.mock_repository.get_all_products.assert_awaited_once()
+        assert isinstance(result, ProductListResponse)
+        assert result.products[0].name == "Test Product"
+    
+    @pytest.mark.asyncio
+    async def test_get_product_by_id_not_found(self):
+        # Arrange
+        self.mock_repository.get_product_by_id.return_value = None
+        
+        # Act & Assert
+        with pytest.raises(ValueError, match="Product with ID 999 not found"):
+            await self.service.get_product_by_id(999)
+    
+    @pytest.mark.asyncio
+    async def test_get_product_by_id_with_etag_cached(self):
+        # Arrange
+        self.mock_repository.get_product_by_id.return_value = self.sample_product_db
+        
+        # Act
+        first = await self.service.get_product_by_id_with_etag(1)
+        second = await self.service.get_product_by_id_with_etag(1)
+        
+        # Assert
+        self.mock_repository.get_product_by_id.assert_awaited_once_with(1, primary=True)
+        assert first == second
+        assert first[1].startswith('W/"')
+    
+    @pytest.mark.asyncio
+    async def test_import_products(self):
+        # Arrange
+        upload = io.BytesIO(b'{"name": "Agua", "category": "Bebida", "price": 4}\n')
+        
+        # Act
+        result = await self.service.import_products(upload, ProductImportFormat.NDJSON)
+        
+        # Assert
+        self.mock_repository.upsert_products.assert_awaited_once()
+        assert result.imported == 1
+        assert result.failed == 0
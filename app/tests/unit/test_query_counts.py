@@ -0,0 +1,95 @@
+from fastapi import status
+from sqlalchemy import insert
+from app.domain.client_model import ClientDB
+from app.domain.order_model import OrderDB, OrderStatus
+from app.domain.product_model import ProductDB
+
+class TestQueryCounts:
+    """
+    Upper bounds on the statements each endpoint runs, against SQLite.
+    A failing bound means a new query (often an N+1) was added to the path.
+    """
+    def seed(self, engine):
+        with engine.begin() as conn:
+            conn.execute(insert(ProductDB), [
+                {"id": 1, "name": "X-Burger", "category": "Lanche", "price": 15.0, "description": None},
+                {"id": 2, "name": "Refrigerante", "category": "Bebida", "price": 6.0, "description": None}
+            ])
+            conn.execute(insert(ClientDB), [{"id": 1, "name": "Ana", "cpf": "123.456.789-09", "cpf_digits": "12345678909"}])
+            conn.execute(insert(OrderDB), [
+                {"id": i, "client_id": 1, "total_price": 21.0, "status": OrderStatus.RECEIVED.value,
+                 "products": [{"id": 1, "quantity": 1}, {"id": 2, "quantity": 1}]}
+                for i in range(1, 11)
+            ])
+    
+    def test_list_products(self, sqlite_client, sqlite_engine, assert_max_queries):
+        # Arrange
+        self.seed(sqlite_engine)
+        
+        # Act
+        with assert_max_queries(1):
+            response = sqlite_client.get("/api/products/")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["products"]) == 2
+    
+    def test_update_product(self, sqlite_client, sqlite_engine, assert_max_queries):
+        # Arrange
+        self.seed(sqlite_engine)
+        
+        # Act
+        with assert_max_queries(1):
+            response = sqlite_client.put("/api/products/1", json={
+                "name": "X-Salada", "category": "Lanche", "price": 17.0, "description": "Com salada"
+            })
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["name"] == "X-Salada"
+    
+    def test_list_orders(self, sqlite_client, sqlite_engine, assert_max_queries):
+        # Arrange
+        self.seed(sqlite_engine)
+        
+        # Act
+        with assert_max_queries(1):
+            response = sqlite_client.get("/api/orders/")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["orders"]) == 10
+    
+    def test_get_order(self, sqlite_client, sqlite_engine, assert_max_queries):
+        # Arrange
+        self.seed(sqlite_engine)
+        
+        # Act
+        with assert_max_queries(1):
+            response = sqlite_client.get("/api/orders/3")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+    
+    def test_update_order_status(self, sqlite_client, sqlite_engine, assert_max_queries):
+        # Arrange
+        self.seed(sqlite_engine)
+        
+        # Act
+        with assert_max_queries(2):
+            response = sqlite_client.patch("/api/orders/3/status", json={"status": OrderStatus.PREPARING.value})
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == OrderStatus.PREPARING.value
+    
+    def test_get_client(self, sqlite_client, sqlite_engine, assert_max_queries):
+        # Arrange
+        self.seed(sqlite_engine)
+        
+        # Act
+        with assert_max_queries(1):
+            response = sqlite_client.get("/api/clients/1")
+        
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,288 @@
+"""
+Load test of the full API (routes, services, repositories) against a local SQLite stand-in database.
+
+    python -m benchmarks.load_test [--totems 20] [--kitchens 2] [--duration 10]
+
+Seeds a catalog, customers and an order history, then runs concurrent
+virtual users through the ASGI app with an async HTTP client:
+- totems: CPF login, menu browsing, order placement and an order status check
+- kitchens: polling the kitchen board and advancing orders to the next
+  status with the version they saw, so racing kitchens get 409s
+
+Reports throughput and p50/p95/p99 latency per endpoint. The numbers compare
+runs of this harness with each other; SQLite locking and the in-process
+client make them no forecast of MySQL in production. Runs the synchronous
+services (DB_ASYNC=false).
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+import httpx
+from sqlalchemy import create_engine, event, insert, Engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.core import mysql_connection
+from app.core.jwt import create_access_token
+from app.core.mysql_connection import DB_ASYNC, get_session
+from app.domain.client_model import ClientDB
+from app.domain.order_model import OrderDB, OrderItemDB, OrderStatus, build_order_item_rows
+from app.domain.product_model import ProductDB
+from app.repository.migrations import run_migrations
+from app.service.kitchen_queue import kitchen_queue
+from app.service.product_service import product_cache
+
+CATEGORIES = {
+    "Lanche": (18.0, 42.0),
+    "Acompanhamento": (8.0, 19.0),
+    "Bebida": (5.0, 12.0),
+    "Sobremesa": (7.0, 16.0)
+}
+
+# Next status the kitchen moves an order to
+NEXT_STATUS = {
+    OrderStatus.RECEIVED.value: OrderStatus.PREPARING.value,
+    OrderStatus.PREPARING.value: OrderStatus.READY.value,
+    OrderStatus.READY.value: OrderStatus.FINISHED.value
+}
+
+def format_cpf(digits: str) -> str:
+    return f"{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}"
+
+def create_database(path: str) -> Engine:
+    """
+    Create a file-backed SQLite database migrated to the current schema. WAL
+    lets the totems read while the kitchen writes.
+    """
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+        pool_size=20,
+        max_overflow=20
+    )
+    
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+    
+    run_migrations(engine)
+    return engine
+
+def seed(engine: Engine, rng: random.Random, products: int, customers: int, orders: int) -> Dict[str, list]:
+    """
+    Insert the catalog, the customers and an order history, most of it
+    finished and the rest spread over the kitchen board
+    """
+    catalog = []
+    for product_id in range(1, products + 1):
+        category = list(CATEGORIES)[product_id % len(CATEGORIES)]
+        low, high = CATEGORIES[category]
+        catalog.append({
+            "id": product_id,
+            "name": f"{category} {product_id}",
+            "category": category,
+            "price": round(rng.uniform(low, high), 2),
+            "description": f"Item {product_id} do cardápio"
+        })
+    
+    clients = []
+    for client_id in range(1, customers + 1):
+        digits = f"{client_id:011d}"
+        clients.append({"id": client_id, "name": f"Cliente {client_id}", "cpf": format_cpf(digits), "cpf_digits": digits})
+    
+    history = []
+    statuses = [OrderStatus.FINISHED.value] * 17 + [OrderStatus.RECEIVED.value, OrderStatus.PREPARING.value, OrderStatus.READY.value]
+    for order_id in range(1, orders + 1):
+        items = order_items(rng, catalog)
+        history.append({
+            "id": order_id,
+            "client_id": rng.randint(1, customers),
+            "total_price": round(sum(item["price"] * item["quantity"] for item in items), 2),
+            "status": rng.choice(statuses),
+            "products": items
+        })
+    
+    with engine.begin() as conn:
+        conn.execute(insert(ProductDB), catalog)
+        conn.execute(insert(ClientDB), clients)
+        conn.execute(insert(OrderDB), history)
+        conn.execute(insert(OrderItemDB), [
+            row for order in history for row in build_order_item_rows(order["id"], order["products"])
+        ])
+    return {"products": catalog, "clients": clients}
+
+def order_items(rng: random.Random, catalog: List[dict]) -> List[dict]:
+    return [
+        {"id": product["id"], "name": product["name"], "quantity": rng.randint(1, 3), "price": product["price"]}
+        for product in rng.sample(catalog, rng.randint(1, 4))
+    ]
+
+class Recorder:
+    """
+    Latencies, error and conflict (409) counts per endpoint (method and
+    route template)
+    """
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.conflicts: Dict[str, int] = defaultdict(int)
+    
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str,
+                      **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.errors[endpoint] += 1
+            self.latencies[endpoint].append(time.perf_counter() - start)
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if response.status_code == 409:
+            self.conflicts[endpoint] += 1
+            return None
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+            return None
+        return response
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+async def totem(client: httpx.AsyncClient, recorder: Recorder, data: Dict[str, list],
+                rng: random.Random, deadline: float, think: float) -> None:
+    """
+    Customer journey at a self-service totem, repeated until the deadline
+    """
+    while time.perf_counter() < deadline:
+        customer = rng.choice(data["clients"])
+        login = await recorder.request(client, "GET /api/clients/filter", "GET", "/api/clients/filter",
+                                       params={"cpf": customer["cpf"]})
+        if login is None:
+            continue
+        headers = {"Authorization": f"Bearer {login.json()['token']}"}
+        await asyncio.sleep(think)
+        
+        await recorder.request(client, "GET /api/products/", "GET", "/api/products/", headers=headers)
+        for product in rng.sample(data["products"], 2):
+            await recorder.request(client, "GET /api/products/{product_id}", "GET",
+                                   f"/api/products/{product['id']}", headers=headers)
+        await asyncio.sleep(think)
+        
+        items = order_items(rng, data["products"])
+        created = await recorder.request(client, "POST /api/orders/", "POST", "/api/orders/", headers=headers, json={
+            "client_id": customer["id"],
+            "total_price": round(sum(item["price"] * item["quantity"] for item in items), 2),
+            "products": items
+        })
+        if created is not None:
+            await recorder.request(client, "GET /api/orders/{order_id}", "GET",
+                                   f"/api/orders/{created.json()['id']}", headers=headers)
+        await asyncio.sleep(think)
+
+async def kitchen(client: httpx.AsyncClient, recorder: Recorder, rng: random.Random,
+                  deadline: float, interval: float, batch: int) -> None:
+    """
+    Kitchen display: poll the board and move a few orders forward
+    """
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'cozinha', 'role': 'administrator'})}"}
+    while time.perf_counter() < deadline:
+        board = await recorder.request(client, "GET /api/orders/kitchen", "GET", "/api/orders/kitchen", headers=headers)
+        if board is not None:
+            active = [order for order in board.json()["orders"] if order["status"] in NEXT_STATUS]
+            for order in rng.sample(active, min(batch, len(active))):
+                await recorder.request(client, "PATCH /api/orders/{order_id}/status", "PATCH",
+                                       f"/api/orders/{order['id']}/status", headers=headers,
+                                       json={"status": NEXT_STATUS[order["status"]], "version": order["version"]})
+        await asyncio.sleep(interval)
+
+def report(recorder: Recorder, elapsed: float) -> None:
+    print(f"{'endpoint':<38} {'requests':>8} {'errors':>6} {'409s':>6} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    total = 0
+    for endpoint in sorted(recorder.latencies):
+        values = sorted(recorder.latencies[endpoint])
+        total += len(values)
+        print(f"{endpoint:<38} {len(values):>8} {recorder.errors[endpoint]:>6} {recorder.conflicts[endpoint]:>6} "
+              f"{len(values) / elapsed:>8.1f} "
+              f"{percentile(values, 50) * 1000:>8.1f} {percentile(values, 95) * 1000:>8.1f} "
+              f"{percentile(values, 99) * 1000:>8.1f} {values[-1] * 1000:>8.1f}")
+    print(f"{'total':<38} {total:>8} {sum(recorder.errors.values()):>6} {sum(recorder.conflicts.values()):>6} "
+          f"{total / elapsed:>8.1f}")
+
+async def run(args: argparse.Namespace, engine: Engine) -> None:
+    rng = random.Random(args.seed)
+    data = seed(engine, rng, args.products, args.customers, args.orders)
+    recorder = Recorder()
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(
+            *(totem(client, recorder, data, random.Random(rng.random()), deadline, args.think) for _ in range(args.totems)),
+            *(kitchen(client, recorder, random.Random(rng.random()), deadline, args.kitchen_interval, args.kitchen_batch)
+              for _ in range(args.kitchens))
+        )
+        elapsed = time.perf_counter() - start
+    
+    print(f"{args.totems} totems, {args.kitchens} kitchens, {elapsed:.1f} s, "
+          f"{args.products} products, {args.customers} customers, {args.orders} seeded orders")
+    report(recorder, elapsed)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--totems", type=int, default=20, help="concurrent customer journeys")
+    parser.add_argument("--kitchens", type=int, default=2, help="concurrent kitchen displays")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to run the scenarios")
+    parser.add_argument("--think", type=float, default=0, help="pause in seconds between totem steps")
+    parser.add_argument("--kitchen-interval", type=float, default=0.5, help="seconds between kitchen polls")
+    parser.add_argument("--kitchen-batch", type=int, default=3, help="orders advanced per kitchen poll")
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--orders", type=int, default=20000, help="orders in the seeded history")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the dataset and the scenarios")
+    args = parser.parse_args()
+    if DB_ASYNC:
+        parser.error("the stand-in database serves the synchronous services: run with DB_ASYNC=false")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_database(os.path.join(directory, "loadtest.db"))
+        session_factory = sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)
+        
+        def get_loadtest_session():
+            session = session_factory()
+            try:
+                yield session
+            finally:
+                session.close()
+        
+        # Route the request sessions and the sessions the services open
+        # themselves (kitchen board reload, export) to the stand-in database
+        app.dependency_overrides[get_session] = get_loadtest_session
+        original_session_factory = mysql_connection.SessionLocal
+        mysql_connection.SessionLocal = session_factory
+        kitchen_queue.clear()
+        product_cache.clear()
+        try:
+            asyncio.run(run(args, engine))
+        finally:
+            app.dependency_overrides.pop(get_session, None)
+            mysql_connection.SessionLocal = original_session_factory
+            engine.dispose()
+
+if __name__ == "__main__":
+    main()
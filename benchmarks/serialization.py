@@ -0,0 +1,87 @@
+"""
+CPU cost of the JSON codec paths, measured in-process without a database.
+
+    python -m benchmarks.serialization [--rows 1000] [--requests 50]
+
+- list: GET of an order list through FastAPI, validating every row and
+  re-validating against response_model (before) vs. constructing the rows
+  and rendering with ModelJSONResponse (after).
+- decode: an OrderBatchCreate body, json.loads + validation (before) vs.
+  a single model_validate_json pass (after).
+"""
+import argparse
+import json
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.codec import ModelJSONResponse, from_row, orjson
+from app.domain.order_model import OrderDB, OrderResponse, OrderListResponse, OrderBatchCreate, OrderCreate, OrderStatus
+
+def build_rows(count: int):
+    return [
+        OrderDB(
+            id=i,
+            client_id=i % 50 + 1,
+            total_price=42.5,
+            status=OrderStatus.PREPARING.value,
+            products=[
+                {"id": 1, "name": "X-Burger", "quantity": 2, "price": 15.0},
+                {"id": 7, "name": "Batata", "quantity": 1, "price": 9.5},
+                {"id": 12, "name": "Refrigerante", "quantity": 1, "price": 3.0}
+            ]
+        )
+        for i in range(1, count + 1)
+    ]
+
+def build_app(rows) -> FastAPI:
+    app = FastAPI()
+    
+    @app.get("/before", response_model=OrderListResponse)
+    def before():
+        return OrderListResponse(orders=[OrderResponse.model_validate(row) for row in rows])
+    
+    @app.get("/after", response_model=OrderListResponse)
+    def after():
+        return ModelJSONResponse(OrderListResponse(orders=[from_row(OrderResponse, row) for row in rows]))
+    
+    return app
+
+def cpu_per_call(func, repeat: int) -> float:
+    func()  # warm up
+    start = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - start) / repeat * 1000
+
+def report(name: str, before_ms: float, after_ms: float) -> None:
+    print(f"{name:<8} before {before_ms:8.2f} ms   after {after_ms:8.2f} ms   "
+          f"saved {before_ms - after_ms:8.2f} ms ({(1 - after_ms / before_ms) * 100:4.0f}%)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000, help="orders per list response / batch body")
+    parser.add_argument("--requests", type=int, default=50, help="measured calls per scenario")
+    args = parser.parse_args()
+    
+    rows = build_rows(args.rows)
+    client = TestClient(build_app(rows))
+    assert client.get("/before").json() == client.get("/after").json()
+    
+    print(f"{args.rows} orders per call, {args.requests} calls, CPU time per call "
+          f"(orjson {'installed' if orjson else 'not installed'})")
+    report("list",
+           cpu_per_call(lambda: client.get("/before"), args.requests),
+           cpu_per_call(lambda: client.get("/after"), args.requests))
+    
+    body = json.dumps({
+        "orders": [
+            OrderCreate(client_id=row.client_id, total_price=row.total_price, products=row.products).model_dump(mode="json")
+            for row in rows[:500]
+        ]
+    }).encode("utf-8")
+    report("decode",
+           cpu_per_call(lambda: OrderBatchCreate.model_validate(json.loads(body)), args.requests),
+           cpu_per_call(lambda: OrderBatchCreate.model_validate_json(body), args.requests))
+
+if __name__ == "__main__":
+    main()
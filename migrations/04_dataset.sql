@@ -1,21 +0,0 @@
-USE fastfood;
-
--- Sample product data
-INSERT INTO products (name, category, price, description)
-VALUES ('Produto 1', 'Lanche', 35.90, 'Descrição do produto 1');
-
-INSERT INTO products (name, category, price, description)
-VALUES ('Produto 2', 'Bebida', 12.50, 'Descrição do produto 2');
-
-INSERT INTO products (name, category, price, description)
-VALUES ('Produto 3', 'Sobremesa', 18.90, 'Descrição do produto 3');
-
--- Sample client data
-INSERT INTO clients (name, cpf)
-VALUES ('Client 1', '620.546.640-65');
-
-INSERT INTO clients (name, cpf)
-VALUES ('Client 2', '927.437.110-19');
-
-INSERT INTO clients (name, cpf)
-VALUES ('Client 3', '495.585.060-01');